@@ -0,0 +1,229 @@
+# analytics.py
+"""Backends for scan-heavy queries: whole-universe matrices and group aggregates.
+
+SQLite stays the store and keeps serving point lookups and series. The
+``duckdb`` backend answers scans from a columnar copy of ttm_pat_yoy_growth
+held in a DuckDB file named after the data version it was built from. A new
+copy is written to a temporary file and moved into place when the version
+changes, and copies are only ever opened read-only, so several worker
+processes can share one. DuckDB is optional; without it only the ``sqlite``
+backend is available. It is imported on first use, so importing this module
+(and db_helper) stays fast with the default sqlite backend.
+"""
+import csv
+import glob
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from derived_data import CROSS_SECTION_SCOPES
+
+SOURCE_TABLE = 'ttm_pat_yoy_growth'
+BACKENDS = ('sqlite', 'duckdb')
+
+# Columns copied to the mirror; date stays text so prefix matching is unchanged
+MIRROR_COLUMNS = {
+    'accord_code': 'BIGINT',
+    'company_name': 'VARCHAR',
+    'sector': 'VARCHAR',
+    'mcap_category': 'VARCHAR',
+    'date': 'VARCHAR',
+    'date_key': 'INTEGER',
+    'ttm_pat_yoy_growth': 'DOUBLE'
+}
+
+# Both engines accept this SQL unchanged, so results match row for row
+MATRIX_SQL = """
+    SELECT accord_code, company_name, sector, mcap_category, {field}
+    FROM ttm_pat_yoy_growth
+    WHERE date >= ? AND date < ?
+    ORDER BY date, accord_code
+"""
+SUMMARY_SQL = """
+    SELECT {group_expr} AS group_value, COUNT(*), COUNT({field}), AVG({field}), MIN({field}), MAX({field})
+    FROM ttm_pat_yoy_growth
+    WHERE date >= ? AND date < ?
+    GROUP BY group_value
+    ORDER BY group_value
+"""
+
+
+def load_duckdb():
+    """The duckdb module, or None if it isn't installed"""
+    try:
+        import duckdb
+    except ImportError:
+        return None
+    return duckdb
+
+
+def prefix_upper_bound(prefix):
+    """Smallest string greater than every string starting with prefix"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else '\uffff'
+
+
+def _check_field(field, numeric=False):
+    if field not in MIRROR_COLUMNS or field in ('accord_code', 'date', 'date_key'):
+        raise ValueError(f"Invalid field: {field}")
+    if numeric and MIRROR_COLUMNS[field] != 'DOUBLE':
+        raise ValueError(f"Field is not numeric: {field}")
+
+
+class SQLiteBackend:
+    """Scans run on the SQLite store; ``connect(date)`` returns a read connection"""
+
+    name = 'sqlite'
+
+    def __init__(self, connect):
+        self.connect = connect
+
+    def ensure_current(self, get_version, build=True):
+        """Nothing to refresh; every query reads the store"""
+        return True
+
+    def _query(self, date, sql):
+        conn = self.connect(date)
+        try:
+            return [tuple(row) for row in conn.execute(sql, (date, prefix_upper_bound(date)))]
+        finally:
+            conn.close()
+
+    def quarterly_matrix(self, date, field):
+        _check_field(field)
+        return self._query(date, MATRIX_SQL.format(field=field))
+
+    def group_summary(self, date, field, scope='all'):
+        _check_field(field, numeric=True)
+        return self._query(date, SUMMARY_SQL.format(group_expr=CROSS_SECTION_SCOPES[scope], field=field))
+
+
+class DuckDBBackend:
+    """Scans run on a DuckDB copy of the store, rebuilt when the data version changes.
+
+    ``mirror_path`` names the copy; the version digest is inserted before the
+    extension, e.g. database/analytics.3f2a9c1e04d7.duckdb.
+    """
+
+    name = 'duckdb'
+
+    def __init__(self, source_path, mirror_path, threads=0):
+        if load_duckdb() is None:
+            raise ImportError('The duckdb backend needs the duckdb package (pip install duckdb)')
+        self.source_path = source_path
+        self.mirror_path = mirror_path
+        self.threads = threads
+        self._conn = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def mirror_file(self, version):
+        stem, ext = os.path.splitext(self.mirror_path)
+        digest = hashlib.sha1(version.encode()).hexdigest()[:12]
+        return f"{stem}.{digest}{ext or '.duckdb'}"
+
+    def ensure_current(self, get_version, build=True):
+        """Open the copy for the current data version, building it if needed.
+
+        With ``build=False`` a missing copy is not built; returns False so the
+        caller can read the store instead of waiting for the copy.
+        """
+        version = get_version()
+        if version == self._version:
+            return True
+        if not build and not os.path.exists(self.mirror_file(version)):
+            return False
+        with self._lock:
+            if version == self._version:
+                return True
+            path = self.mirror_file(version)
+            if not os.path.exists(path):
+                build_mirror(self.source_path, path)
+                self._remove_stale(path)
+            config = {'threads': self.threads} if self.threads else {}
+            # The previous connection is left to close itself once no query
+            # still holds a cursor on it
+            self._conn = load_duckdb().connect(path, read_only=True, config=config)
+            self._version = version
+        return True
+
+    def _remove_stale(self, keep):
+        stem, ext = os.path.splitext(self.mirror_path)
+        for path in glob.glob(f"{glob.escape(stem)}.*{ext or '.duckdb'}"):
+            if path == keep:
+                continue
+            # Processes that still have an old copy open keep reading it
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # another worker got there first
+                pass
+
+    def _query(self, date, sql):
+        # One cursor per call: a DuckDB connection must not be shared between threads
+        cursor = self._conn.cursor()
+        try:
+            return cursor.execute(sql, [date, prefix_upper_bound(date)]).fetchall()
+        finally:
+            cursor.close()
+
+    def quarterly_matrix(self, date, field):
+        _check_field(field)
+        return self._query(date, MATRIX_SQL.format(field=field))
+
+    def group_summary(self, date, field, scope='all'):
+        _check_field(field, numeric=True)
+        return self._query(date, SUMMARY_SQL.format(group_expr=CROSS_SECTION_SCOPES[scope], field=field))
+
+
+def build_mirror(source_path, path):
+    """Copy ttm_pat_yoy_growth from SQLite into a new DuckDB file at ``path``.
+
+    Rows are sorted by date so each date's rows sit in a few row groups and
+    DuckDB's min/max zone maps skip the rest. Returns the number of rows.
+    """
+    start_time = time.perf_counter()
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    for stale in (tmp_path, f"{tmp_path}.wal"):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    # CSV keeps this to the standard library and duckdb, without pandas or
+    # DuckDB's sqlite extension (which it downloads on first use)
+    fd, csv_path = tempfile.mkstemp(suffix='.csv', dir=directory)
+    try:
+        source = sqlite3.connect(source_path)
+        try:
+            with os.fdopen(fd, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(MIRROR_COLUMNS)
+                writer.writerows(source.execute(
+                    f"SELECT {', '.join(MIRROR_COLUMNS)} FROM {SOURCE_TABLE}"
+                ))
+        finally:
+            source.close()
+
+        columns = ', '.join(f"'{name}': '{sql_type}'" for name, sql_type in MIRROR_COLUMNS.items())
+        conn = load_duckdb().connect(tmp_path)
+        try:
+            conn.execute(f"""
+                CREATE TABLE {SOURCE_TABLE} AS
+                SELECT * FROM read_csv(?, header = true, columns = {{{columns}}})
+                ORDER BY date, accord_code
+            """, [csv_path])
+            rows = conn.execute(f"SELECT COUNT(*) FROM {SOURCE_TABLE}").fetchone()[0]
+            conn.execute('CHECKPOINT')
+        finally:
+            conn.close()
+    finally:
+        os.remove(csv_path)
+
+    os.replace(tmp_path, path)
+    elapsed = (time.perf_counter() - start_time) * 1000
+    logging.info(f"Built analytics mirror {path} - Rows: {rows}, Time: {elapsed:.2f}ms")
+    return rows
+
@@ -0,0 +1,129 @@
+# assets.py
+"""Content-hashed, precompressed static assets for the dashboard."""
+import gzip
+import hashlib
+import logging
+import os
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Hashed assets never change, so browsers may cache them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# The HTML page must be revalidated so new asset hashes are picked up
+PAGE_CACHE_CONTROL = 'no-cache'
+
+MIMETYPES = {
+    '.css': 'text/css; charset=utf-8',
+    '.js': 'application/javascript; charset=utf-8',
+    '.html': 'text/html; charset=utf-8'
+}
+
+
+def _compress(content):
+    """Precompute the encoded variants of a payload."""
+    variants = {'identity': content, 'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(content, quality=11)
+    return variants
+
+
+def _pick_encoding(variants, accept_encodings):
+    """Smallest variant the client accepts (werkzeug Accept object or None)."""
+    best = 'identity'
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and accept_encodings is not None and accept_encodings[encoding] > 0:
+            if len(variants[encoding]) < len(variants[best]):
+                best = encoding
+    return best
+
+
+class AssetStore:
+    """Static files keyed by content hash, held in memory with gzip/brotli variants.
+
+    ``build()`` writes ``<name>.<hash>.<ext>`` plus ``.gz``/``.br`` copies to the
+    build directory (so a fronting web server can serve them directly) and
+    keeps every variant in memory for the app to serve without touching disk.
+    """
+
+    def __init__(self, static_dir, build_dir):
+        self.static_dir = static_dir
+        self.build_dir = build_dir
+        self.manifest = {}
+        self.files = {}
+
+    def build(self):
+        """Hash and precompress every file under the static directory."""
+        os.makedirs(self.build_dir, exist_ok=True)
+        for root, dirs, filenames in os.walk(self.static_dir):
+            if os.path.abspath(root).startswith(os.path.abspath(self.build_dir)):
+                continue
+            for filename in filenames:
+                path = os.path.join(root, filename)
+                logical = os.path.relpath(path, self.static_dir).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    content = f.read()
+
+                digest = hashlib.sha256(content).hexdigest()[:12]
+                stem, ext = os.path.splitext(logical.replace('/', '_'))
+                hashed = f"{stem}.{digest}{ext}"
+
+                self.manifest[logical] = hashed
+                self.files[hashed] = {
+                    'variants': _compress(content),
+                    'etag': digest,
+                    'mimetype': MIMETYPES.get(ext, 'application/octet-stream')
+                }
+                self._write_variants(hashed)
+
+        logging.info(f"Built {len(self.manifest)} static assets into {self.build_dir}")
+        return self.manifest
+
+    def _write_variants(self, hashed):
+        """Write the hashed file and its compressed copies, skipping existing ones."""
+        suffixes = {'identity': '', 'gzip': '.gz', 'br': '.br'}
+        for encoding, content in self.files[hashed]['variants'].items():
+            path = os.path.join(self.build_dir, hashed + suffixes[encoding])
+            if not os.path.exists(path):
+                with open(path, 'wb') as f:
+                    f.write(content)
+
+    def url(self, logical):
+        """Public URL of an asset by its source path, e.g. 'css/dashboard.css'."""
+        return f"/assets/{self.manifest[logical]}"
+
+    def response(self, hashed, request):
+        """Serve a hashed asset, or None if unknown."""
+        asset = self.files.get(hashed)
+        if asset is None:
+            return None
+        return cached_response(
+            asset['variants'], asset['etag'], asset['mimetype'], IMMUTABLE_CACHE_CONTROL, request
+        )
+
+
+def build_page(html):
+    """Precompress a rendered HTML page and derive its ETag."""
+    content = html.encode('utf-8')
+    return {
+        'variants': _compress(content),
+        'etag': hashlib.sha256(content).hexdigest()[:16],
+        'mimetype': MIMETYPES['.html']
+    }
+
+
+def cached_response(variants, etag, mimetype, cache_control, request):
+    """Build a response for precompressed content with ETag validation."""
+    encoding = _pick_encoding(variants, request.accept_encodings)
+    response = Response(variants[encoding], content_type=mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = cache_control
+    # Strong ETag per encoding, since the bytes differ between variants
+    response.set_etag(etag if encoding == 'identity' else f"{etag}-{encoding}")
+    return response.make_conditional(request)
@@ -0,0 +1,134 @@
+# bench_analytics.py
+"""Compare the sqlite and duckdb analytics backends on whole-universe scans.
+
+Builds a synthetic database, times building the DuckDB copy, then times
+uncached calls on both backends for:
+
+- matrix_day: every company on one quarter-end date ('2024-03-31')
+- matrix_year: every company on every date in one year ('2024')
+- summary_sector / summary_mcap: per-group count, mean, min and max on a date
+
+and checks that both backends return the same rows. The duckdb columns are
+skipped when duckdb is not installed.
+"""
+import argparse
+import importlib
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_db_helper import git_commit, time_calls
+from synthetic_db import generate_database
+
+FIELD = 'ttm_pat_yoy_growth'
+
+
+def build_workloads(rng, dates, n_calls):
+    days = [rng.choice(dates).isoformat() for _ in range(n_calls)]
+    years = [str(rng.choice(dates).year) for _ in range(n_calls)]
+    return {
+        'matrix_day': ('quarterly_matrix', [(day, FIELD) for day in days]),
+        'matrix_year': ('quarterly_matrix', [(year, FIELD) for year in years]),
+        'summary_sector': ('group_summary', [(day, FIELD, 'sector') for day in days]),
+        'summary_mcap': ('group_summary', [(day, FIELD, 'mcap_category') for day in days])
+    }
+
+
+def same_rows(left, right):
+    """Row-for-row equality, allowing float rounding differences in aggregates"""
+    if len(left) != len(right):
+        return False
+    for a, b in zip(left, right):
+        for x, y in zip(a, b):
+            if isinstance(x, float) and isinstance(y, float):
+                if not math.isclose(x, y, rel_tol=1e-9, abs_tol=1e-9):
+                    return False
+            elif x != y:
+                return False
+    return True
+
+
+def run_benchmark(n_companies, n_quarters, n_calls, seed=42):
+    rng = random.Random(seed)
+    work_dir = tempfile.mkdtemp(prefix='udf_analytics_bench_')
+    db_path = os.path.join(work_dir, 'database', 'ttm_pat_yoy_growth.db')
+    dates = generate_database(db_path, n_companies, n_quarters, seed)
+    os.chdir(work_dir)
+
+    db_helper = importlib.import_module('db_helper')
+    analytics = importlib.import_module('analytics')
+    db_helper.startup()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    backends = {'sqlite': analytics.SQLiteBackend(lambda date: db_helper.get_db_connection())}
+    build_s = None
+    if analytics.load_duckdb() is not None:
+        duck = analytics.DuckDBBackend(db_path, os.path.join(work_dir, 'database', 'analytics.duckdb'))
+        start = time.perf_counter()
+        duck.ensure_current(db_helper.get_source_version)
+        build_s = round(time.perf_counter() - start, 3)
+        backends['duckdb'] = duck
+
+    results = {}
+    for name, (method, calls) in build_workloads(rng, dates, n_calls).items():
+        results[name] = {
+            backend_name: time_calls(getattr(backend, method), calls)
+            for backend_name, backend in backends.items()
+        }
+        if 'duckdb' in backends:
+            results[name]['mismatches'] = sum(
+                not same_rows(getattr(backends['sqlite'], method)(*args),
+                              getattr(backends['duckdb'], method)(*args))
+                for args in calls[:20]
+            )
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'companies': n_companies,
+        'quarters': n_quarters,
+        'calls': n_calls,
+        'db_size_mb': round(os.path.getsize(db_path) / (1024 * 1024), 2),
+        'mirror_build_s': build_s,
+        'workloads': results
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--companies', type=int, default=5000)
+    parser.add_argument('--quarters', type=int, default=80)
+    parser.add_argument('--calls', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', default=os.path.join(REPO_ROOT, 'benchmarks', 'results'))
+    args = parser.parse_args()
+
+    report = run_benchmark(args.companies, args.quarters, args.calls, args.seed)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    out_path = os.path.join(
+        args.output_dir, f"analytics_{report['commit'] or 'nocommit'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    with open(out_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{report['companies']} companies x {report['quarters']} quarters, "
+          f"DuckDB copy built in {report['mirror_build_s']}s")
+    print(f"{'workload':<16}{'sqlite p50':>12}{'duckdb p50':>12}{'speedup':>10}{'mismatches':>12}")
+    for name, res in report['workloads'].items():
+        sqlite_p50 = res['sqlite']['p50_ms']
+        duck_p50 = res['duckdb']['p50_ms'] if 'duckdb' in res else None
+        speedup = f"{sqlite_p50 / duck_p50:.1f}" if duck_p50 else '-'
+        print(f"{name:<16}{sqlite_p50:>12}{duck_p50 if duck_p50 is not None else '-':>12}"
+              f"{speedup:>10}{res.get('mismatches', '-'):>12}")
+    print(f"\nResults written to {out_path}")
@@ -0,0 +1,197 @@
+# bench_client.py
+"""Compare udf_client access patterns against one-request-per-cell over real HTTP.
+
+Starts the Flask app in a subprocess on a synthetic database and times the
+same number of point lookups issued as:
+
+- per_cell: a new connection and GET /api/quarterly_data per lookup
+- keep_alive: GET per lookup over a pooled keep-alive connection
+- batched: UDFClient.quarterly_data_many (POST /api/quarterly_data/batch)
+- threads: UDFClient.quarterly_data from a thread pool, coalesced by the client
+- asyncio: AsyncUDFClient.quarterly_data from concurrent tasks
+- disk_cache: a fresh UDFClient answering from a warm on-disk cache
+
+Each pattern gets its own random lookups so none benefits from the server's
+caches being warmed by another. The Flask development server closes every
+connection after one response, so keep_alive only pays off behind a
+production WSGI server such as gunicorn or waitress.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.error import HTTPError, URLError
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_db_helper import git_commit
+from synthetic_db import FIRST_ACCORD_CODE, generate_database
+from udf_client import AsyncUDFClient, ConnectionPool, UDFClient
+
+CONFIG = """[database]
+path = database/ttm_pat_yoy_growth.db
+
+[logging]
+level = WARNING
+file =
+"""
+
+SERVER_SCRIPT = """
+import logging, sys
+sys.path.insert(0, {root!r})
+import app
+flask_app = app.create_app()
+logging.getLogger().setLevel(logging.WARNING)
+logging.getLogger('werkzeug').setLevel(logging.ERROR)
+flask_app.logger.setLevel(logging.WARNING)
+flask_app.run(host='127.0.0.1', port={port}, threaded=True)
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(work_dir, port, timeout=60):
+    """Run the app in a subprocess and wait until it answers."""
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER_SCRIPT.format(root=REPO_ROOT, port=port)],
+        cwd=work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/data_version").read()
+            return process
+        except (URLError, ConnectionError):
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('Server did not start')
+
+
+def make_lookups(rng, n_companies, dates, n):
+    return [(FIRST_ACCORD_CODE + rng.randrange(n_companies), rng.choice(dates).isoformat())
+            for _ in range(n)]
+
+
+def per_cell(base_url, lookups):
+    for code, date in lookups:
+        try:
+            urllib.request.urlopen(f"{base_url}/api/quarterly_data?accord_code={code}&date={date}").read()
+        except HTTPError as e:  # 404 for missing values
+            e.read()
+
+
+def keep_alive(base_url, lookups):
+    pool = ConnectionPool(base_url, size=1)
+    for code, date in lookups:
+        pool.request('GET', f"/api/quarterly_data?accord_code={code}&date={date}")
+    pool.close()
+
+
+def batched(base_url, lookups):
+    with UDFClient(base_url) as client:
+        client.quarterly_data_many(lookups)
+
+
+def threads(base_url, lookups, workers=16):
+    with UDFClient(base_url) as client, ThreadPoolExecutor(workers) as pool:
+        list(pool.map(lambda lookup: client.quarterly_data(*lookup), lookups))
+
+
+def with_asyncio(base_url, lookups):
+    async def run():
+        async with AsyncUDFClient(base_url) as client:
+            await asyncio.gather(*(client.quarterly_data(code, date) for code, date in lookups))
+    asyncio.run(run())
+
+
+def disk_cache(base_url, lookups, cache_path):
+    with UDFClient(base_url, cache_path=cache_path) as client:
+        client.quarterly_data_many(lookups)
+    start = time.perf_counter()
+    with UDFClient(base_url, cache_path=cache_path) as client:
+        client.quarterly_data_many(lookups)
+    return time.perf_counter() - start
+
+
+def run_benchmark(n_companies, n_quarters, n_lookups, seed=42):
+    work_dir = tempfile.mkdtemp(prefix='udf_client_bench_')
+    dates = generate_database(os.path.join(work_dir, 'database', 'ttm_pat_yoy_growth.db'),
+                              n_companies, n_quarters, seed)
+    with open(os.path.join(work_dir, 'config.ini'), 'w') as f:
+        f.write(CONFIG)
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(work_dir, port)
+    rng = random.Random(seed)
+    patterns = {
+        'per_cell': per_cell,
+        'keep_alive': keep_alive,
+        'batched': batched,
+        'threads': threads,
+        'asyncio': with_asyncio
+    }
+    results = {}
+    try:
+        for name, fn in patterns.items():
+            lookups = make_lookups(rng, n_companies, dates, n_lookups)
+            start = time.perf_counter()
+            fn(base_url, lookups)
+            elapsed = time.perf_counter() - start
+            results[name] = {'total_s': round(elapsed, 4), 'lookups_per_s': round(n_lookups / elapsed, 1)}
+        lookups = make_lookups(rng, n_companies, dates, n_lookups)
+        elapsed = disk_cache(base_url, lookups, os.path.join(work_dir, 'client_cache.db'))
+        results['disk_cache'] = {'total_s': round(elapsed, 4), 'lookups_per_s': round(n_lookups / elapsed, 1)}
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'companies': n_companies,
+        'quarters': n_quarters,
+        'lookups': n_lookups,
+        'patterns': results
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--companies', type=int, default=5000)
+    parser.add_argument('--quarters', type=int, default=80)
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', default=os.path.join(REPO_ROOT, 'benchmarks', 'results'))
+    args = parser.parse_args()
+
+    report = run_benchmark(args.companies, args.quarters, args.lookups, args.seed)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    out_path = os.path.join(
+        args.output_dir, f"client_{report['commit'] or 'nocommit'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    with open(out_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    base = report['patterns']['per_cell']['total_s']
+    print(f"{report['lookups']} lookups, {report['companies']} companies x {report['quarters']} quarters")
+    print(f"{'pattern':<14}{'total s':>10}{'lookups/s':>12}{'speedup':>10}")
+    for name, res in report['patterns'].items():
+        print(f"{name:<14}{res['total_s']:>10}{res['lookups_per_s']:>12}{base / res['total_s']:>10.1f}")
+    print(f"\nResults written to {out_path}")
@@ -0,0 +1,169 @@
+# bench_concurrency.py
+"""Measure read latency while a bulk ingest writes to the database.
+
+For each journal mode a fresh synthetic database is generated, reader
+threads issue uncached point lookups in a loop, and after a warm-up period
+``db_helper.ingest_records`` upserts a new quarter for every company. Read
+latency before and during the ingest, and any lock errors, are reported
+per mode, so WAL can be compared with the rollback journal.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_db_helper import git_commit
+from synthetic_db import FIRST_ACCORD_CODE, MCAP_CATEGORIES, SECTORS, generate_database
+
+CONFIG_TEMPLATE = """[database]
+path = database/ttm_pat_yoy_growth.db
+
+[sqlite]
+journal_mode = {journal_mode}
+
+[logging]
+level = WARNING
+file =
+"""
+
+
+def summarise(latencies):
+    """Percentiles of a list of latencies in milliseconds."""
+    if not latencies:
+        return {'reads': 0}
+    latencies = sorted(latencies)
+    pick = lambda q: round(latencies[min(len(latencies) - 1, int(len(latencies) * q))], 3)
+    return {'reads': len(latencies), 'p50_ms': pick(0.5), 'p99_ms': pick(0.99),
+            'max_ms': round(latencies[-1], 3)}
+
+
+def ingest_rows(rng, n_companies, date_str):
+    """One new quarter of rows for every company."""
+    for i in range(n_companies):
+        code = FIRST_ACCORD_CODE + i
+        yield {
+            'accord_code': code,
+            'company_name': f"Company {code}",
+            'sector': rng.choice(SECTORS),
+            'mcap_category': rng.choice(MCAP_CATEGORIES),
+            'date': date_str,
+            'ttm_pat_yoy_growth': round(rng.gauss(10, 20), 4)
+        }
+
+
+def run_mode(journal_mode, n_companies, n_quarters, n_readers, warmup_s, batch_size, seed):
+    """Run readers against one database while it is ingested into."""
+    work_dir = tempfile.mkdtemp(prefix=f"udf_concurrency_{journal_mode.lower()}_")
+    dates = generate_database(os.path.join(work_dir, 'database', 'ttm_pat_yoy_growth.db'),
+                              n_companies, n_quarters, seed)
+    with open(os.path.join(work_dir, 'config.ini'), 'w') as f:
+        f.write(CONFIG_TEMPLATE.format(journal_mode=journal_mode))
+    os.chdir(work_dir)
+
+    db_helper = importlib.import_module('db_helper')
+    # Each mode has its own config.ini, so drop settings read for the previous one
+    db_helper.get_config.cache_clear()
+    db_helper.get_sqlite_settings.cache_clear()
+    db_helper.init_db()
+    db_helper.refresh_derived_data()
+    lookup = db_helper._get_quarterly_row.__wrapped__  # bypass the LRU cache
+
+    phase = {'name': 'baseline'}
+    latencies = {'baseline': [], 'ingest': []}
+    errors = {'baseline': 0, 'ingest': 0}
+    stop = threading.Event()
+
+    def reader(reader_seed):
+        rng = random.Random(reader_seed)
+        while not stop.is_set():
+            code = FIRST_ACCORD_CODE + rng.randrange(n_companies)
+            day = db_helper.parse_date_key(rng.choice(dates).isoformat())
+            current = phase['name']
+            t0 = time.perf_counter()
+            try:
+                lookup(code, day)
+            except sqlite3.OperationalError:
+                errors[current] += 1
+                continue
+            latencies[current].append((time.perf_counter() - t0) * 1000)
+
+    threads = [threading.Thread(target=reader, args=(seed + i,)) for i in range(n_readers)]
+    for thread in threads:
+        thread.start()
+
+    time.sleep(warmup_s)
+    phase['name'] = 'ingest'
+    new_date = f"{dates[-1].year + 1}-03-31 00:00:00"
+    t0 = time.perf_counter()
+    written = db_helper.ingest_records(
+        ingest_rows(random.Random(seed), n_companies, new_date), batch_size=batch_size
+    )
+    ingest_s = time.perf_counter() - t0
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'journal_mode': journal_mode,
+        'rows_ingested': written,
+        'ingest_s': round(ingest_s, 3),
+        'baseline': {**summarise(latencies['baseline']), 'errors': errors['baseline']},
+        'during_ingest': {**summarise(latencies['ingest']), 'errors': errors['ingest'],
+                          'reads_per_s': round(len(latencies['ingest']) / ingest_s, 1)}
+    }
+
+
+def print_summary(results):
+    print(f"{'mode':<8}{'phase':<16}{'reads':>10}{'reads/s':>10}{'p50 ms':>10}"
+          f"{'p99 ms':>10}{'max ms':>10}{'errors':>8}")
+    for res in results:
+        for phase in ('baseline', 'during_ingest'):
+            stats = res[phase]
+            print(f"{res['journal_mode']:<8}{phase:<16}{stats['reads']:>10}"
+                  f"{stats.get('reads_per_s', '-'):>10}{stats.get('p50_ms', '-'):>10}"
+                  f"{stats.get('p99_ms', '-'):>10}{stats.get('max_ms', '-'):>10}{stats['errors']:>8}")
+        print(f"{res['journal_mode']:<8}ingest of {res['rows_ingested']} rows took {res['ingest_s']}s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modes', default='WAL,DELETE', help='comma-separated journal modes')
+    parser.add_argument('--companies', type=int, default=5000)
+    parser.add_argument('--quarters', type=int, default=80)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--warmup', type=float, default=2.0, help='seconds of reads before the ingest')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', default=os.path.join(REPO_ROOT, 'benchmarks', 'results'))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = [
+        run_mode(mode, args.companies, args.quarters, args.readers, args.warmup,
+                 args.batch_size, args.seed)
+        for mode in args.modes.split(',')
+    ]
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    commit = git_commit()
+    out_path = os.path.join(
+        args.output_dir, f"concurrency_{commit or 'nocommit'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    with open(out_path, 'w') as f:
+        json.dump({'commit': commit, 'timestamp': datetime.now().isoformat(timespec='seconds'),
+                   'results': results}, f, indent=2)
+
+    print_summary(results)
+    print(f"\nResults written to {out_path}")
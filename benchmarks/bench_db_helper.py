@@ -0,0 +1,220 @@
+# bench_db_helper.py
+"""Benchmark db_helper query functions and the /api/* routes on a synthetic database.
+
+Runs from a temporary working directory holding database/ttm_pat_yoy_growth.db,
+so the real database and query_log.txt are never touched. Results are written
+as JSON (one file per run) for comparison across commits.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_db import FIRST_ACCORD_CODE, generate_database
+
+
+def git_commit():
+    """Current commit hash of the repository, or None outside a git checkout."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_calls(fn, calls):
+    """Call ``fn(*args)`` for each args tuple and summarise the latencies."""
+    latencies = []
+    start = time.perf_counter()
+    for args in calls:
+        t0 = time.perf_counter()
+        fn(*args)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    total = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'calls': len(latencies),
+        'total_s': round(total, 4),
+        'mean_ms': round(statistics.mean(latencies), 4),
+        'p50_ms': round(latencies[len(latencies) // 2], 4),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 4),
+        'max_ms': round(latencies[-1], 4),
+        'ops_per_s': round(len(latencies) / total, 1) if total else None
+    }
+
+
+def build_workloads(rng, n_companies, dates, n_calls):
+    """Random argument lists for each query function."""
+    codes = [FIRST_ACCORD_CODE + rng.randrange(n_companies) for _ in range(n_calls)]
+    day_dates = [rng.choice(dates).isoformat() for _ in range(n_calls)]
+    field = 'ttm_pat_yoy_growth'
+    return {
+        'get_quarterly_data': [(c, field, d) for c, d in zip(codes, day_dates)],
+        'get_series': [
+            (c, field, dates[0].isoformat(), dates[-1].isoformat()) for c in codes
+        ],
+        'get_quarterly_matrix': [(d, field) for d in day_dates[:max(1, n_calls // 10)]],
+        'get_all_pat_growth': [(c, field) for c in codes]
+    }
+
+
+def route_url(name, args):
+    """Map a db_helper workload entry to the equivalent API request."""
+    if name == 'get_quarterly_data':
+        return f"/api/quarterly_data?accord_code={args[0]}&field={args[1]}&date={args[2]}"
+    if name == 'get_series':
+        return f"/api/series?accord_code={args[0]}&start_date={args[2]}&end_date={args[3]}"
+    if name == 'get_quarterly_matrix':
+        return f"/api/quarterly_matrix?date={args[0]}"
+    return f"/api/all_pat_growth?accord_code={args[0]}"
+
+
+STARTUP_SCRIPT = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+t0 = time.perf_counter()
+import db_helper
+t1 = time.perf_counter()
+result = {{'import_db_helper_ms': (t1 - t0) * 1000}}
+try:
+    import app
+except ImportError:
+    app = None
+if app is not None:
+    t2 = time.perf_counter()
+    flask_app = app.create_app() if hasattr(app, 'create_app') else app.app
+    status = flask_app.test_client().get('/').status_code
+    t3 = time.perf_counter()
+    result['import_app_ms'] = (t2 - t1) * 1000
+    result['first_request_ms'] = (t3 - t2) * 1000
+print(json.dumps(result))
+"""
+
+
+def measure_startup(work_dir, repeats=5):
+    """Median import and first-request times, each measured in a fresh interpreter."""
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.check_output(
+            [sys.executable, '-c', STARTUP_SCRIPT.format(root=REPO_ROOT)],
+            cwd=work_dir, stderr=subprocess.DEVNULL
+        )
+        runs.append(json.loads(out.decode().strip().splitlines()[-1]))
+    return {
+        key: round(statistics.median(run[key] for run in runs), 3)
+        for key in runs[0]
+    }
+
+
+def run_benchmark(n_companies, n_quarters, n_calls, seed=42, include_routes=True,
+                  log_level='WARNING'):
+    """Generate a database, then measure cold and warm latency for every function and route."""
+    rng = random.Random(seed)
+    work_dir = tempfile.mkdtemp(prefix='udf_bench_')
+    db_path = os.path.join(work_dir, 'database', 'ttm_pat_yoy_growth.db')
+
+    t0 = time.perf_counter()
+    dates = generate_database(db_path, n_companies, n_quarters, seed)
+    generate_s = time.perf_counter() - t0
+
+    os.chdir(work_dir)
+    startup = measure_startup(work_dir) if include_routes else {}
+    db_helper = importlib.import_module('db_helper')
+    db_helper.startup()
+    logging.getLogger().setLevel(log_level)
+    workloads = build_workloads(rng, n_companies, dates, n_calls)
+
+    results = {'functions': {}, 'routes': {}}
+    for name, calls in workloads.items():
+        fn = getattr(db_helper, name)
+        db_helper.clear_cache()
+        results['functions'][name] = {
+            'cold': time_calls(fn, calls),
+            'warm': time_calls(fn, calls)
+        }
+
+    if include_routes:
+        try:
+            app_module = importlib.import_module('app')
+        except ImportError as e:
+            logging.warning(f"Skipping route benchmarks, Flask app unavailable: {str(e)}")
+        else:
+            flask_app = app_module.create_app()
+            logging.getLogger().setLevel(log_level)
+            flask_app.logger.setLevel(log_level)
+            client = flask_app.test_client()
+            for name, calls in workloads.items():
+                urls = [(route_url(name, args),) for args in calls]
+                db_helper.clear_cache()
+                results['routes'][name] = {
+                    'cold': time_calls(client.get, urls),
+                    'warm': time_calls(client.get, urls)
+                }
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'companies': n_companies,
+        'quarters': n_quarters,
+        'calls_per_function': n_calls,
+        'generate_db_s': round(generate_s, 3),
+        'db_size_mb': round(os.path.getsize(db_path) / (1024 * 1024), 2),
+        'startup': startup,
+        **results
+    }
+
+
+def print_summary(report):
+    """Print a compact table of the p50 latencies."""
+    print(f"\n{report['companies']} companies x {report['quarters']} quarters "
+          f"({report['db_size_mb']} MB), commit {report['commit']}")
+    for key, value in report['startup'].items():
+        print(f"{key:<32}{value:>14}")
+    print(f"{'target':<32}{'cold p50 ms':>14}{'warm p50 ms':>14}{'cold ops/s':>14}")
+    for kind in ('functions', 'routes'):
+        for name, res in report[kind].items():
+            label = f"{kind[:-1]}:{name}"
+            print(f"{label:<32}{res['cold']['p50_ms']:>14}{res['warm']['p50_ms']:>14}"
+                  f"{res['cold']['ops_per_s']:>14}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--companies', type=int, default=5000)
+    parser.add_argument('--quarters', type=int, default=80)
+    parser.add_argument('--calls', type=int, default=500, help='calls per function')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-routes', action='store_true', help='skip the Flask test client runs')
+    parser.add_argument('--log-level', default='WARNING',
+                        help='log level during the run (per-query INFO logging is part of the cost)')
+    parser.add_argument('--output-dir', default=os.path.join(REPO_ROOT, 'benchmarks', 'results'))
+    args = parser.parse_args()
+
+    report = run_benchmark(args.companies, args.quarters, args.calls, args.seed,
+                           include_routes=not args.no_routes, log_level=args.log_level)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    out_path = os.path.join(
+        args.output_dir,
+        f"db_helper_{report['commit'] or 'nocommit'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    with open(out_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_summary(report)
+    print(f"\nResults written to {out_path}")
@@ -0,0 +1,129 @@
+# bench_metrics.py
+"""Measure metric lookup latency as the number of stored metrics grows.
+
+Adds metrics to a synthetic database in steps (e.g. 1, 10, 100, 300), each
+with a value for every company and quarter, and after each step times
+uncached single-metric and multi-metric point lookups and series reads.
+With metric_values keyed by (metric_id, accord_code, date_key), latency
+should stay flat while the table grows.
+"""
+import argparse
+import importlib
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_db_helper import git_commit, time_calls
+from synthetic_db import FIRST_ACCORD_CODE, generate_database
+
+
+def add_metrics(db_helper, metrics_store, first, last, n_companies, date_keys, rng):
+    """Register metrics first..last-1 and write a value for every company and quarter."""
+    conn = db_helper.get_db_connection()
+    try:
+        for m in range(first, last):
+            metric_id = metrics_store.register_metric(conn, f"metric_{m:04d}")
+            rows = [
+                (metric_id, FIRST_ACCORD_CODE + i, date_key, round(rng.gauss(10, 20), 4))
+                for i in range(n_companies) for date_key in date_keys
+            ]
+            metrics_store.write_metric_values(conn, rows)
+            conn.commit()
+    finally:
+        conn.close()
+    db_helper.clear_cache()
+
+
+def run_benchmark(steps, n_companies, n_quarters, n_calls, seed=42):
+    rng = random.Random(seed)
+    work_dir = tempfile.mkdtemp(prefix='udf_metrics_bench_')
+    db_path = os.path.join(work_dir, 'database', 'ttm_pat_yoy_growth.db')
+    dates = generate_database(db_path, n_companies, n_quarters, seed)
+    os.chdir(work_dir)
+
+    db_helper = importlib.import_module('db_helper')
+    metrics_store = importlib.import_module('metrics_store')
+    db_helper.startup()
+    logging.getLogger().setLevel(logging.WARNING)
+    date_keys = [d.year * 10000 + d.month * 100 + d.day for d in dates]
+
+    results = []
+    stored = 0
+    for target in steps:
+        t0 = time.perf_counter()
+        add_metrics(db_helper, metrics_store, stored, target, n_companies, date_keys, rng)
+        load_s = time.perf_counter() - t0
+        stored = target
+
+        registry = db_helper.get_metric_registry()
+        ids = [info['metric_id'] for info in registry.values()]
+        names = list(registry)
+        codes = [FIRST_ACCORD_CODE + rng.randrange(n_companies) for _ in range(n_calls)]
+        keys = [rng.choice(date_keys) for _ in range(n_calls)]
+
+        # __wrapped__ skips the LRU cache so every call reaches SQLite
+        point = db_helper._get_metric_values.__wrapped__
+        series = db_helper.get_metric_series.__wrapped__
+        results.append({
+            'metrics': stored,
+            'metric_rows': stored * n_companies * len(date_keys),
+            'db_size_mb': round(os.path.getsize(db_path) / (1024 * 1024), 2),
+            'load_s': round(load_s, 3),
+            'point_1_metric': time_calls(point, [
+                ((rng.choice(ids),), c, k) for c, k in zip(codes, keys)
+            ]),
+            'point_5_metrics': time_calls(point, [
+                (tuple(sorted(rng.sample(ids, min(5, len(ids))))), c, k) for c, k in zip(codes, keys)
+            ]),
+            'series': time_calls(series, [
+                (rng.choice(names), c, dates[0].isoformat(), dates[-1].isoformat()) for c in codes
+            ])
+        })
+        logging.warning(f"Benchmarked {stored} metrics")
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'companies': n_companies,
+        'quarters': n_quarters,
+        'calls': n_calls,
+        'steps': results
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--steps', default='1,10,100,300', help='cumulative metric counts')
+    parser.add_argument('--companies', type=int, default=1000)
+    parser.add_argument('--quarters', type=int, default=20)
+    parser.add_argument('--calls', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', default=os.path.join(REPO_ROOT, 'benchmarks', 'results'))
+    args = parser.parse_args()
+
+    report = run_benchmark([int(n) for n in args.steps.split(',')], args.companies,
+                           args.quarters, args.calls, args.seed)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    out_path = os.path.join(
+        args.output_dir, f"metrics_{report['commit'] or 'nocommit'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    with open(out_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{'metrics':>8}{'rows':>12}{'MB':>9}{'1-metric p50':>14}{'5-metric p50':>14}"
+          f"{'series p50':>12}{'p95 (1)':>10}")
+    for step in report['steps']:
+        print(f"{step['metrics']:>8}{step['metric_rows']:>12}{step['db_size_mb']:>9}"
+              f"{step['point_1_metric']['p50_ms']:>14}{step['point_5_metrics']['p50_ms']:>14}"
+              f"{step['series']['p50_ms']:>12}{step['point_1_metric']['p95_ms']:>10}")
+    print(f"\nResults written to {out_path}")
@@ -0,0 +1,192 @@
+# bench_shared_cache.py
+"""Compare per-process caches with the shared cache tier across worker processes.
+
+Starts N worker processes on one synthetic database, each issuing its own
+random sequence of series, matrix and screen calls drawn from the same
+skewed key distribution (as web workers behind one load balancer would).
+Runs once with only the per-process LRU caches and once with the shared
+tier enabled, and reports the queries that reached SQLite, cache hit rates,
+per-worker peak RSS and wall time.
+"""
+import argparse
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_db_helper import git_commit
+from synthetic_db import FIRST_ACCORD_CODE, generate_database
+
+CONFIG = """[database]
+path = database/ttm_pat_yoy_growth.db
+
+[shared_cache]
+enabled = {enabled}
+directory = {directory}
+max_mb = {max_mb}
+
+[logging]
+level = WARNING
+file =
+"""
+
+FIELD = 'ttm_pat_yoy_growth'
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if platform.system() == 'Darwin' else 1024), 2)
+
+
+def build_calls(seed, n_calls, n_companies, dates, skew):
+    """(function name, args) calls; a few hot companies and dates get most traffic."""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) ** skew for rank in range(n_companies)]
+    codes = rng.choices(range(FIRST_ACCORD_CODE, FIRST_ACCORD_CODE + n_companies), weights, k=n_calls)
+    date_weights = [1 / (rank + 1) ** skew for rank in range(len(dates))]
+    days = [d.isoformat() for d in rng.choices(list(reversed(dates)), date_weights, k=n_calls)]
+    calls = []
+    for code, day in zip(codes, days):
+        kind = rng.random()
+        if kind < 0.7:
+            calls.append(('get_series', (code, FIELD, dates[0].isoformat(), dates[-1].isoformat())))
+        elif kind < 0.85:
+            calls.append(('get_quarterly_matrix', (day, FIELD)))
+        else:
+            calls.append(('screen_companies', (day,)))
+    return calls
+
+
+def worker(work_dir, calls, results):
+    os.chdir(work_dir)
+    import db_helper
+    db_helper.startup()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    start = time.perf_counter()
+    for name, args in calls:
+        getattr(db_helper, name)(*args)
+    elapsed = time.perf_counter() - start
+
+    info = db_helper.get_cache_info()
+    names = {'get_series': 'series', 'get_quarterly_matrix': 'quarterly_matrix', 'screen_companies': 'screen'}
+    local_hits = sum(info[n]['hits'] for n in names.values())
+    local_misses = sum(info[n]['misses'] for n in names.values())
+    shared_hits = info.get('shared', {}).get('hits', 0)
+    results.put({
+        'wall_s': round(elapsed, 3),
+        'local_hits': local_hits,
+        'shared_hits': shared_hits,
+        'sqlite_queries': local_misses - shared_hits,
+        'peak_rss_mb': peak_rss_mb()
+    })
+
+
+def run_mode(work_dir, enabled, n_workers, n_calls, n_companies, dates, skew, max_mb, seed):
+    cache_dir = os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else work_dir,
+                             f"udf_bench_{os.getpid()}_{int(enabled)}")
+    with open(os.path.join(work_dir, 'config.ini'), 'w') as f:
+        f.write(CONFIG.format(enabled=str(enabled).lower(), directory=cache_dir, max_mb=max_mb))
+
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(
+            work_dir, build_calls(seed + i, n_calls, n_companies, dates, skew), results
+        ))
+        for i in range(n_workers)
+    ]
+    start = time.perf_counter()
+    for p in processes:
+        p.start()
+    workers = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+    wall = time.perf_counter() - start
+
+    total_calls = n_workers * n_calls
+    summary = {
+        'wall_s': round(wall, 3),
+        'sqlite_queries': sum(w['sqlite_queries'] for w in workers),
+        'local_hit_rate': round(sum(w['local_hits'] for w in workers) / total_calls, 4),
+        'shared_hits': sum(w['shared_hits'] for w in workers),
+        'hit_rate': round(1 - sum(w['sqlite_queries'] for w in workers) / total_calls, 4),
+        'mean_worker_s': round(sum(w['wall_s'] for w in workers) / n_workers, 3),
+        'max_peak_rss_mb': max(w['peak_rss_mb'] or 0 for w in workers),
+        'shared_file_mb': round(sum(
+            os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir)
+        ) / (1024 * 1024), 2) if enabled else None,
+        'workers': workers
+    }
+    if enabled:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return summary
+
+
+def run_benchmark(n_workers, n_calls, n_companies, n_quarters, skew, max_mb, seed=42):
+    work_dir = tempfile.mkdtemp(prefix='udf_shared_cache_bench_')
+    dates = generate_database(os.path.join(work_dir, 'database', 'ttm_pat_yoy_growth.db'),
+                              n_companies, n_quarters, seed)
+    # Build the derived tables once here, so workers starting together don't race to do it
+    with open(os.path.join(work_dir, 'config.ini'), 'w') as f:
+        f.write(CONFIG.format(enabled='false', directory='', max_mb=max_mb))
+    os.chdir(work_dir)
+    importlib.import_module('db_helper').startup()
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'workers': n_workers,
+        'calls_per_worker': n_calls,
+        'companies': n_companies,
+        'quarters': n_quarters,
+        'skew': skew,
+        'modes': {
+            'per_process': run_mode(work_dir, False, n_workers, n_calls, n_companies, dates, skew, max_mb, seed),
+            'shared': run_mode(work_dir, True, n_workers, n_calls, n_companies, dates, skew, max_mb, seed)
+        }
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--calls', type=int, default=3000, help='calls per worker')
+    parser.add_argument('--companies', type=int, default=5000)
+    parser.add_argument('--quarters', type=int, default=80)
+    parser.add_argument('--skew', type=float, default=1.0, help='Zipf exponent of key popularity')
+    parser.add_argument('--max-mb', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', default=os.path.join(REPO_ROOT, 'benchmarks', 'results'))
+    args = parser.parse_args()
+
+    report = run_benchmark(args.workers, args.calls, args.companies, args.quarters,
+                           args.skew, args.max_mb, args.seed)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    out_path = os.path.join(
+        args.output_dir, f"shared_cache_{report['commit'] or 'nocommit'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    with open(out_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{report['workers']} workers x {report['calls_per_worker']} calls")
+    print(f"{'mode':<14}{'wall s':>9}{'SQLite queries':>16}{'hit rate':>10}{'shared hits':>13}"
+          f"{'peak RSS MB':>13}{'file MB':>9}")
+    for name, res in report['modes'].items():
+        print(f"{name:<14}{res['wall_s']:>9}{res['sqlite_queries']:>16}{res['hit_rate']:>10}"
+              f"{res['shared_hits']:>13}{res['max_peak_rss_mb']:>13}{res['shared_file_mb'] or '-':>9}")
+    print(f"\nResults written to {out_path}")
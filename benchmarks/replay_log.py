@@ -0,0 +1,237 @@
+# replay_log.py
+"""Replay the request lines recorded in query_log.txt against a server.
+
+Parses the werkzeug access lines the app logs, e.g.
+
+    2025-11-14 18:30:13,827 - INFO - 127.0.0.1 - - [14/Nov/2025 18:30:13] "GET /api/series?... HTTP/1.1" 200 -
+
+into a workload of (offset, method, path, logged status), keeping the gaps
+between requests. The workload is replayed open-loop: each request is sent at
+its offset divided by --speed (0 sends them back to back) from a pool of
+--concurrency threads, and idle gaps longer than --max-gap seconds (server
+restarts, lunch) are shortened to it. Reports latency percentiles, error
+rates and throughput overall and per endpoint, and how many responses now
+have a different status than the one logged.
+
+Without --url the app is started on a synthetic database (enough companies
+for the accord codes in the log); with --url the requests go to a running
+server, e.g. the real one on port 5000. Only GET lines are replayed, as
+request bodies are not logged.
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.error import HTTPError, URLError
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_client import CONFIG, free_port, start_server
+from bench_db_helper import git_commit
+from synthetic_db import generate_database
+
+# asctime of the log record, then werkzeug's request line; error lines are wrapped in ANSI colours
+REQUEST_LINE = re.compile(
+    r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2},\d{3}) - \w+ - \S+ - - \[[^\]]*\] '
+    r'"(?:\x1b\[[\d;]*m)*([A-Z]+) (\S+) HTTP/[\d.]+(?:\x1b\[[\d;]*m)*" (\d{3})'
+)
+
+
+def parse_log(paths, prefix='/api/'):
+    """Workload entries from one or more log files, in time order.
+
+    Each entry is {'offset_s', 'method', 'path', 'status'}, with offsets
+    relative to the first request.
+    """
+    requests = []
+    for path in paths:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                match = REQUEST_LINE.match(line)
+                if match is None:
+                    continue
+                stamp, method, target, status = match.groups()
+                if method != 'GET' or not target.startswith(prefix):
+                    continue
+                requests.append((datetime.strptime(stamp, '%Y-%m-%d %H:%M:%S,%f'), target, int(status)))
+    requests.sort(key=lambda r: r[0])
+    if not requests:
+        return []
+    first = requests[0][0]
+    return [
+        {'offset_s': round((stamp - first).total_seconds(), 3), 'method': 'GET',
+         'path': target, 'status': status}
+        for stamp, target, status in requests
+    ]
+
+
+def schedule(workload, speed, max_gap, repeat=1):
+    """Send times in seconds from the start, with gaps capped and scaled by speed."""
+    times = []
+    now = 0.0
+    previous = None
+    for _ in range(repeat):
+        # Each repeat starts right after the previous one ends (the gap is negative)
+        for entry in workload:
+            if previous is not None:
+                now += max(0.0, min(entry['offset_s'] - previous, max_gap))
+            previous = entry['offset_s']
+            times.append(now / speed if speed else 0.0)
+    return times
+
+
+def percentiles(values):
+    if not values:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+    values = sorted(values)
+
+    def pick(q):
+        return round(values[min(len(values) - 1, int(len(values) * q))], 3)
+
+    return {'p50_ms': pick(0.5), 'p95_ms': pick(0.95), 'p99_ms': pick(0.99), 'max_ms': round(values[-1], 3)}
+
+
+def summarise(results, wall_s):
+    latencies = [r['latency_ms'] for r in results]
+    failed = sum(r['status'] is None or r['status'] >= 500 for r in results)
+    return {
+        'requests': len(results),
+        'errors': failed,
+        'error_rate': round(failed / len(results), 4) if results else None,
+        'client_errors': sum(r['status'] is not None and 400 <= r['status'] < 500 for r in results),
+        'status_changed': sum(r['status'] != r['logged_status'] for r in results),
+        'throughput_rps': round(len(results) / wall_s, 1) if wall_s else None,
+        **percentiles(latencies)
+    }
+
+
+def replay(base_url, workload, speed=1.0, concurrency=8, max_gap=5.0, repeat=1, timeout=30.0):
+    """Send the workload and return one result dict per request."""
+    entries = workload * repeat
+    send_at = schedule(workload, speed, max_gap, repeat)
+    results = [None] * len(entries)
+
+    def send(i, start):
+        entry = entries[i]
+        lag_ms = (time.perf_counter() - start - send_at[i]) * 1000
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(base_url + entry['path'], timeout=timeout) as response:
+                response.read()
+                status = response.status
+        except HTTPError as e:
+            e.read()
+            status = e.code
+        except (URLError, ConnectionError, TimeoutError):
+            status = None
+        results[i] = {
+            'endpoint': entry['path'].split('?', 1)[0],
+            'status': status,
+            'logged_status': entry['status'],
+            'latency_ms': (time.perf_counter() - t0) * 1000,
+            'lag_ms': max(lag_ms, 0.0)
+        }
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(len(entries)):
+            delay = send_at[i] - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, i, start)
+    return results, time.perf_counter() - start
+
+
+def run_replay(log_paths, url=None, speed=1.0, concurrency=8, max_gap=5.0, repeat=1,
+               prefix='/api/', companies=5000, quarters=80, seed=42):
+    workload = parse_log(log_paths, prefix)
+    if not workload:
+        raise ValueError(f"No {prefix} GET request lines found in {', '.join(log_paths)}")
+
+    process = work_dir = None
+    if url is None:
+        work_dir = tempfile.mkdtemp(prefix='udf_replay_')
+        generate_database(os.path.join(work_dir, 'database', 'ttm_pat_yoy_growth.db'), companies, quarters, seed)
+        with open(os.path.join(work_dir, 'config.ini'), 'w') as f:
+            f.write(CONFIG)
+        port = free_port()
+        process = start_server(work_dir, port)
+        url = f"http://127.0.0.1:{port}"
+    try:
+        results, wall = replay(url.rstrip('/'), workload, speed, concurrency, max_gap, repeat)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    endpoints = {}
+    for r in results:
+        endpoints.setdefault(r['endpoint'], []).append(r)
+    lags = [r['lag_ms'] for r in results]
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'logs': [os.path.abspath(p) for p in log_paths],
+        'target': 'synthetic' if process is not None else url,
+        'speed': speed,
+        'concurrency': concurrency,
+        'max_gap_s': max_gap,
+        'repeat': repeat,
+        'wall_s': round(wall, 3),
+        'overall': summarise(results, wall),
+        'send_lag_p95_ms': percentiles(lags)['p95_ms'],
+        'endpoints': {name: summarise(rs, wall) for name, rs in sorted(endpoints.items())}
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('logs', nargs='*', default=[os.path.join(REPO_ROOT, 'query_log.txt')],
+                        help='log files, e.g. query_log.txt and its rotated backups')
+    parser.add_argument('--url', help='server to replay against (default: start one on a synthetic database)')
+    parser.add_argument('--speed', type=float, default=1.0, help='time compression factor, 0 = no pacing')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--max-gap', type=float, default=5.0, help='cap on idle gaps in seconds of log time')
+    parser.add_argument('--repeat', type=int, default=1, help='replay the workload this many times')
+    parser.add_argument('--prefix', default='/api/', help='only replay paths starting with this')
+    parser.add_argument('--companies', type=int, default=5000)
+    parser.add_argument('--quarters', type=int, default=80)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save-workload', help='also write the parsed workload to this JSON file')
+    parser.add_argument('--output-dir', default=os.path.join(REPO_ROOT, 'benchmarks', 'results'))
+    args = parser.parse_args()
+
+    if args.save_workload:
+        with open(args.save_workload, 'w') as f:
+            json.dump(parse_log(args.logs, args.prefix), f, indent=2)
+
+    report = run_replay(args.logs, args.url, args.speed, args.concurrency, args.max_gap, args.repeat,
+                        args.prefix, args.companies, args.quarters, args.seed)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    out_path = os.path.join(
+        args.output_dir, f"replay_{report['commit'] or 'nocommit'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    with open(out_path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{report['overall']['requests']} requests in {report['wall_s']}s against {report['target']} "
+          f"(speed {report['speed']}, concurrency {report['concurrency']})")
+    print(f"{'endpoint':<28}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'errors':>8}{'changed':>9}{'req/s':>8}")
+    for name, res in [*report['endpoints'].items(), ('all', report['overall'])]:
+        print(f"{name:<28}{res['requests']:>9}{res['p50_ms']:>9}{res['p95_ms']:>9}{res['p99_ms']:>9}"
+              f"{res['errors']:>8}{res['status_changed']:>9}{res['throughput_rps']:>8}")
+    if report['speed']:
+        print(f"\nSend lag p95: {report['send_lag_p95_ms']} ms (high values mean --concurrency is too low)")
+    print(f"\nResults written to {out_path}")
@@ -0,0 +1,102 @@
+# synthetic_db.py
+"""Generate a synthetic ttm_pat_yoy_growth database for benchmarking."""
+import argparse
+import os
+import random
+import sqlite3
+from datetime import date
+
+SECTORS = [
+    'Banks', 'IT Services', 'Pharmaceuticals', 'Automobiles', 'FMCG',
+    'Capital Goods', 'Chemicals', 'Metals', 'Power', 'Realty', 'Telecom', 'Textiles'
+]
+MCAP_CATEGORIES = ['Large Cap', 'Mid Cap', 'Small Cap', 'Micro Cap']
+FIRST_ACCORD_CODE = 100000
+
+
+def quarter_ends(n_quarters, last_year=2025, last_quarter=3):
+    """Return the last ``n_quarters`` quarter-end dates, oldest first."""
+    ends = []
+    year, quarter = last_year, last_quarter
+    for _ in range(n_quarters):
+        month = quarter * 3
+        day = 31 if month in (3, 12) else 30
+        ends.append(date(year, month, day))
+        quarter -= 1
+        if quarter == 0:
+            year, quarter = year - 1, 4
+    return ends[::-1]
+
+
+def generate_database(db_path, n_companies=5000, n_quarters=80, seed=42):
+    """Create (or replace) a database with the same schema as ``db_helper.init_db``.
+
+    Dates are stored as 'YYYY-MM-DD 00:00:00' like the production data.
+    Returns the list of quarter-end dates used.
+    """
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute('''
+    CREATE TABLE ttm_pat_yoy_growth (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        accord_code INTEGER NOT NULL,
+        company_name TEXT,
+        sector TEXT,
+        mcap_category TEXT,
+        date TEXT,
+        ttm_pat_yoy_growth REAL,
+        UNIQUE(accord_code, date)
+    )
+    ''')
+
+    dates = quarter_ends(n_quarters)
+    date_strings = [f"{d.isoformat()} 00:00:00" for d in dates]
+
+    for i in range(n_companies):
+        accord_code = FIRST_ACCORD_CODE + i
+        name = f"Company {accord_code}"
+        sector = rng.choice(SECTORS)
+        mcap = rng.choice(MCAP_CATEGORIES)
+        # Companies list at different times, so series lengths vary
+        listed_from = rng.randrange(0, max(1, n_quarters // 4))
+        growth = rng.gauss(10, 20)
+        rows = []
+        for date_str in date_strings[listed_from:]:
+            growth = 0.7 * growth + rng.gauss(3, 15)
+            # Occasional missing values, as in the real data
+            value = None if rng.random() < 0.02 else round(growth, 4)
+            rows.append((accord_code, name, sector, mcap, date_str, value))
+        cursor.executemany('''
+            INSERT INTO ttm_pat_yoy_growth
+            (accord_code, company_name, sector, mcap_category, date, ttm_pat_yoy_growth)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', rows)
+
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_accord_code_date
+    ON ttm_pat_yoy_growth (accord_code, date)
+    ''')
+    conn.commit()
+    conn.close()
+    return dates
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('path', help='database file to create')
+    parser.add_argument('--companies', type=int, default=5000)
+    parser.add_argument('--quarters', type=int, default=80)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--force', action='store_true', help='replace the file if it exists')
+    args = parser.parse_args()
+
+    if os.path.exists(args.path) and not args.force:
+        parser.error(f"{args.path} exists; pass --force to replace it")
+
+    generate_database(args.path, args.companies, args.quarters, args.seed)
+    print(f"Generated {args.companies} companies x {args.quarters} quarters at {args.path}")
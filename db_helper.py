@@ -1,32 +1,365 @@
 import sqlite3
-from functools import lru_cache
+import base64
+import hashlib
+import json
+from functools import lru_cache, wraps
 import configparser
 import os
 import logging
 from datetime import datetime
 import time
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('query_log.txt'),
-        logging.StreamHandler()
-    ]
-)
+import analytics
+import derived_data
+import metrics_store
+import partitions
+import shared_cache
 
-# Read configuration
-config = configparser.ConfigParser()
-config.read('config.ini')
+CONFIG_PATH = 'config.ini'
+VALID_FIELDS = ['ttm_pat_yoy_growth', 'sector', 'mcap_category', 'company_name']
+# Upper bound on companies per multi-series request (SQLite host parameter limit is 999 on old builds)
+MAX_MULTI_CODES = 500
+# Upper bound on point lookups per batch request
+MAX_BATCH_LOOKUPS = 1000
+# SQLite's default limit on attached databases; wider partitioned reads use the main database
+MAX_ATTACHED_DATABASES = 10
+# Page size bounds for keyset-paginated endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+DEFAULT_DB_PATH = os.path.join('database', 'ttm_pat_yoy_growth.db')
+# Accepted spellings of a day for point lookups and ingest, tried in order
+DATE_INPUT_FORMATS = ['%Y-%m-%d', '%Y/%m/%d', '%Y%m%d', '%d-%m-%Y', '%d/%m/%Y']
+MONTH_INPUT_FORMATS = ['%Y-%m', '%Y/%m']
+
+# Set by startup() so schema checks and logging setup run once per process
+_started = False
+# Source revision the partition files were last checked against, and the files
+# built at that revision; reads are only routed to these
+_partition_state = {'revision': None, 'paths': set()}
+
+@lru_cache(maxsize=None)
+def get_config():
+    """Read config.ini once, on first use"""
+    config = configparser.ConfigParser(inline_comment_prefixes=('#',))
+    config.read(CONFIG_PATH)
+    return config
+
+def configure_logging():
+    """Set up query logging from the [logging] section of config.ini"""
+    config = get_config()
+    root = logging.getLogger()
+    if root.handlers:
+        # Already configured by the host application
+        return
+    
+    # Imported here: logging.handlers pulls in socket/pickle, which only the app needs
+    from logging.handlers import RotatingFileHandler
+    
+    handlers = [logging.StreamHandler()]
+    log_file = config.get('logging', 'file', fallback='query_log.txt')
+    if log_file:
+        handlers.append(RotatingFileHandler(
+            log_file,
+            maxBytes=config.getint('logging', 'max_size', fallback=1048576),
+            backupCount=config.getint('logging', 'backup_count', fallback=3)
+        ))
+    
+    logging.basicConfig(
+        level=config.get('logging', 'level', fallback='INFO'),
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=handlers
+    )
+
+def get_db_path():
+    """Database file path from the [database] section of config.ini"""
+    return get_config().get('database', 'path', fallback=DEFAULT_DB_PATH)
+
+# Defaults for the [sqlite] section of config.ini
+SQLITE_DEFAULTS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': '-65536',
+    'mmap_size': '268435456',
+    'temp_store': 'MEMORY',
+    'busy_timeout': '5000'
+}
+# Per-connection pragmas; journal_mode is persistent and set once in init_db
+CONNECTION_PRAGMAS = ['synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout']
+
+@lru_cache(maxsize=None)
+def get_sqlite_settings() -> dict:
+    """SQLite tuning profile from config.ini, falling back to SQLITE_DEFAULTS"""
+    config = get_config()
+    settings = {}
+    for name, default in SQLITE_DEFAULTS.items():
+        value = config.get('sqlite', name, fallback=default).strip()
+        # Values are interpolated into PRAGMA statements, so only allow plain words/numbers
+        if not value.lstrip('-').isalnum():
+            raise ValueError(f"Invalid [sqlite] {name} value: {value}")
+        settings[name] = value
+    return settings
+
+def _apply_pragmas(conn):
+    settings = get_sqlite_settings()
+    for name in CONNECTION_PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {settings[name]}")
 
 # Database connection
 def get_db_connection():
-    db_path = os.path.join('database', 'ttm_pat_yoy_growth.db')
-    conn = sqlite3.connect(db_path)
+    settings = get_sqlite_settings()
+    conn = sqlite3.connect(get_db_path(), timeout=int(settings['busy_timeout']) / 1000)
     conn.row_factory = sqlite3.Row
+    _apply_pragmas(conn)
+    return conn
+
+@lru_cache(maxsize=None)
+def get_partition_settings() -> dict:
+    """Partitioned-read settings from the [partitions] section of config.ini"""
+    config = get_config()
+    return {
+        'enabled': config.getboolean('partitions', 'enabled', fallback=False),
+        'directory': config.get('partitions', 'directory',
+                                fallback=os.path.join('database', 'partitions')),
+        'years_per_partition': config.getint('partitions', 'years_per_partition', fallback=1),
+        'max_partitions_per_query': min(
+            config.getint('partitions', 'max_partitions_per_query', fallback=2), MAX_ATTACHED_DATABASES
+        )
+    }
+
+def get_read_connection(start_key: int = None, end_key: int = None):
+    """Connection for reading ttm_pat_yoy_growth rows dated start_key..end_key.
+
+    With partitioning enabled, the partition holding start_key is opened
+    read-only and immutable as the main schema; further partitions are
+    attached behind a TEMP view named ttm_pat_yoy_growth, so queries run
+    unchanged. Falls back to get_db_connection() when partitioning is off, the
+    range is unknown, a partition is missing or was built before the source
+    table's latest change (see current_partitions) or the range spans more than max_partitions_per_query
+    partitions (each ATTACH costs more than a long range scan of the main
+    database saves).
+    """
+    settings = get_partition_settings()
+    if not settings['enabled'] or start_key is None:
+        return get_db_connection()
+    paths = partitions.partitions_for_range(
+        settings['directory'], start_key, end_key if end_key is not None else start_key,
+        settings['years_per_partition'], settings['max_partitions_per_query']
+    )
+    if not paths or not current_partitions().issuperset(paths):
+        return get_db_connection()
+    
+    conn = sqlite3.connect(partitions.partition_uri(paths[0]), uri=True)
+    conn.row_factory = sqlite3.Row
+    _apply_pragmas(conn)
+    for i, path in enumerate(paths[1:], start=1):
+        conn.execute(f"ATTACH DATABASE ? AS p{i}", (partitions.partition_uri(path),))
+    if len(paths) > 1:
+        # The temp schema is searched first, so this view shadows main.ttm_pat_yoy_growth
+        union = ' UNION ALL '.join(
+            ['SELECT * FROM main.ttm_pat_yoy_growth']
+            + [f"SELECT * FROM p{i}.ttm_pat_yoy_growth" for i in range(1, len(paths))]
+        )
+        conn.execute(f"CREATE TEMP VIEW ttm_pat_yoy_growth AS {union}")
     return conn
 
+@lru_cache(maxsize=None)
+def get_analytics_settings() -> dict:
+    """Scan/aggregate backend settings from the [analytics] section of config.ini"""
+    config = get_config()
+    backend = config.get('analytics', 'backend', fallback='sqlite').strip().lower()
+    if backend not in analytics.BACKENDS:
+        raise ValueError(f"Invalid [analytics] backend: {backend}")
+    return {
+        'backend': backend,
+        'mirror_path': config.get('analytics', 'mirror_path',
+                                  fallback=os.path.join('database', 'analytics.duckdb')),
+        'threads': config.getint('analytics', 'threads', fallback=0)
+    }
+
+@lru_cache(maxsize=None)
+def get_analytics_backend():
+    """Backend for whole-universe scans and aggregates, chosen in config.ini.
+
+    Point lookups and series always read SQLite. Falls back to the sqlite
+    backend, with a warning, when duckdb is configured but not installed.
+    """
+    settings = get_analytics_settings()
+    if settings['backend'] == 'duckdb':
+        if analytics.load_duckdb() is not None:
+            return analytics.DuckDBBackend(get_db_path(), settings['mirror_path'], settings['threads'])
+        logging.warning("[analytics] backend = duckdb but duckdb is not installed; using sqlite")
+    return _sqlite_analytics()
+
+@lru_cache(maxsize=None)
+def _sqlite_analytics():
+    return analytics.SQLiteBackend(lambda date: get_read_connection(*_partition_keys(date)))
+
+def _analytics():
+    """The configured backend, or SQLite while its copy of the data is being rebuilt.
+
+    Requests never build the DuckDB copy; refresh_derived_data does, after
+    each load, so a query waits neither for the build nor for its lock.
+    """
+    backend = get_analytics_backend()
+    if backend.ensure_current(get_source_version, build=False):
+        return backend
+    return _sqlite_analytics()
+
+@lru_cache(maxsize=None)
+def get_shared_cache():
+    """Cross-worker cache tier from the [shared_cache] section of config.ini, or None.
+
+    Each database gets its own file in the directory, named after a hash of
+    its absolute path, so deployments on one host never share entries.
+    """
+    config = get_config()
+    if not config.getboolean('shared_cache', 'enabled', fallback=False):
+        return None
+    directory = config.get('shared_cache', 'directory', fallback='/dev/shm/udf_shared_cache')
+    digest = hashlib.sha256(os.path.abspath(get_db_path()).encode()).hexdigest()[:16]
+    path = os.path.join(directory, f"{digest}.db")
+    max_mb = config.getint('shared_cache', 'max_mb', fallback=256)
+    try:
+        return shared_cache.SharedCache(path, max_bytes=max_mb * 1024 * 1024)
+    except (OSError, sqlite3.Error) as e:
+        logging.warning(f"Shared cache unavailable at {path}, using per-process caches only: {str(e)}")
+        return None
+
+def shared(name: str):
+    """Consult the shared cache tier before running a query.
+
+    Goes under @lru_cache, so each worker's own cache is checked first and
+    only its misses reach the shared tier. Entries are tagged with
+    get_data_version(), so a data load retires them. A no-op when the tier
+    is disabled.
+    """
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = get_shared_cache()
+            if cache is None:
+                return fn(*args, **kwargs)
+            key = f"{name}:{args!r}:{sorted(kwargs.items())!r}"
+            version = get_data_version()
+            found, value = cache.get(key, version)
+            if found:
+                return value
+            value = fn(*args, **kwargs)
+            cache.set(key, version, value)
+            return value
+        return wrapper
+    return decorate
+
+def _latest_available_date(cursor, accord_code: int) -> str:
+    """Company's last stored date from company_date_range, or None"""
+    query = "SELECT last_date FROM company_date_range WHERE accord_code = ?"
+    try:
+        cursor.execute(query, (accord_code,))
+    except sqlite3.OperationalError:
+        # Partition connections hold only ttm_pat_yoy_growth; attach the main database on demand
+        cursor.execute("ATTACH DATABASE ? AS source", (get_db_path(),))
+        cursor.execute(query, (accord_code,))
+    latest = cursor.fetchone()
+    return latest[0] if latest else None
+
+def _partition_keys(*dates) -> tuple:
+    """(first, last) date keys spanned by the given dates, for partition routing.
+
+    A bare year counts as its first day; returns (None, None) for anything
+    unparseable so the query reads the main database.
+    """
+    keys = []
+    for date in dates:
+        text = str(date).strip()
+        try:
+            keys.append(int(text) * 10000 if len(text) == 4 and text.isdigit() else parse_date_key(text))
+        except ValueError:
+            return None, None
+    return min(keys), max(keys)
+
+def current_partitions() -> set:
+    """Partition files built from the source table as it is now.
+
+    Reads the source revision, which every insert, update and delete bumps
+    (see derived_data.init_change_tracking), and reloads the matching
+    partitions from partition_meta when it has moved, so a change made by
+    another process or tool stops reads going to partitions that predate it.
+    """
+    conn = get_db_connection()
+    try:
+        revision = derived_data.get_source_revision(conn)
+        if revision != _partition_state['revision']:
+            built = partitions.get_partition_versions(conn)
+            _partition_state['paths'] = {
+                path for path, (_, built_revision) in built.items() if built_revision == revision
+            }
+            _partition_state['revision'] = revision
+        return _partition_state['paths']
+    finally:
+        conn.close()
+
+def rebuild_partitions(years=None, previous_revision: int = None) -> list:
+    """Rebuild the partition files for the given years (all years by default).
+
+    Partitions are recorded at the source table's version and revision read
+    before the copy, so a change made during the build leaves them stale
+    rather than wrongly current. When only some years are rebuilt after a
+    load, the others still match the data if they were current at
+    ``previous_revision``, the revision before the load, and are recorded at
+    the new one too. A full rebuild removes partitions for years that no
+    longer have data.
+    """
+    settings = get_partition_settings()
+    conn = get_db_connection()
+    try:
+        version = derived_data.get_data_version(conn)
+        revision = derived_data.get_source_revision(conn)
+    finally:
+        conn.close()
+    written = partitions.build_partitions(
+        get_db_path(), settings['directory'], settings['years_per_partition'], years
+    )
+    conn = get_db_connection()
+    try:
+        built = partitions.get_partition_versions(conn)
+        existing = set(partitions.list_partitions(settings['directory']).values())
+        if years is None:
+            partitions.remove_partitions(conn, sorted(existing - set(written)))
+            current = set(written)
+        else:
+            current = set(written) | {
+                path for path in existing
+                if previous_revision is not None and path in built and built[path][1] == previous_revision
+            }
+        partitions.record_partition_versions(conn, sorted(current), version, revision)
+    finally:
+        conn.close()
+    _partition_state['revision'] = None
+    return written
+
+def sync_partitions() -> list:
+    """Rebuild every partition if any was built from an older source table.
+
+    Partitions only copy ttm_pat_yoy_growth, so they are compared with its
+    version alone and metric loads do not rebuild them. A change made outside
+    ingest_records can touch any year, so one stale partition means all are
+    rebuilt. Returns the paths written.
+    """
+    settings = get_partition_settings()
+    if not settings['enabled']:
+        return []
+    conn = get_db_connection()
+    try:
+        version = derived_data.get_data_version(conn)
+        built = partitions.get_partition_versions(conn)
+    finally:
+        conn.close()
+    existing = set(partitions.list_partitions(settings['directory']).values())
+    if existing and all(path in built and built[path][0] == version for path in existing):
+        return []
+    logging.info(f"Partitions in {settings['directory']} are out of date, rebuilding")
+    return rebuild_partitions()
+
 # Create necessary tables and indexes if they don't exist
 def init_db():
     conn = get_db_connection()
@@ -52,55 +385,144 @@ def init_db():
     ON ttm_pat_yoy_growth (accord_code, date)
     ''')
     
+    # Integer YYYYMMDD day key, filled at ingest, by triggers for rows written
+    # by other tools, and backfilled by derived_data.refresh_date_keys for
+    # rows stored before the column existed
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(ttm_pat_yoy_growth)")]
+    if 'date_key' not in columns:
+        cursor.execute("ALTER TABLE ttm_pat_yoy_growth ADD COLUMN date_key INTEGER")
+    derived_data.init_date_key_triggers(conn)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_accord_code_date_key
+    ON ttm_pat_yoy_growth (accord_code, date_key)
+    ''')
+    
+    # Screening indexes: per-date keyset scans by accord_code, with or
+    # without sector/mcap equality filters
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_date_accord_code
+    ON ttm_pat_yoy_growth (date, accord_code)
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_date_sector_mcap_code
+    ON ttm_pat_yoy_growth (date, sector, mcap_category, accord_code)
+    ''')
+    
+    metrics_store.init_metrics_schema(conn)
+    
+    # Journal mode is stored in the database file, so it only needs setting once
+    journal_mode = get_sqlite_settings()['journal_mode']
+    mode = cursor.execute(f"PRAGMA journal_mode = {journal_mode}").fetchone()[0]
+    if mode.upper() != journal_mode.upper():
+        logging.warning(f"SQLite journal_mode {journal_mode} not applied, using {mode}")
+    
     conn.commit()
     conn.close()
 
-# Initialize the database
-init_db()
+def startup():
+    """Configure logging and check the schema; call once when the app starts.
+
+    Importing this module has no side effects, so CLI scripts and worker
+    processes only pay for this when they actually serve queries.
+    """
+    global _started
+    if _started:
+        return
+    configure_logging()
+    os.makedirs(os.path.dirname(get_db_path()) or '.', exist_ok=True)
+    init_db()
+    refresh_derived_data()
+    _started = True
+    logging.info(f"db_helper started with database {get_db_path()}")
 
-@lru_cache(maxsize=1024)
 def get_quarterly_data(accord_code: int, field: str, date: str) -> float:
-    """Get a single data point for a company on a specific date"""
+    """Get a single data point for a company on a specific date.
+
+    Returns the value on that day if there is one, otherwise the latest value
+    in the same month. ``date`` may be in any of DATE_INPUT_FORMATS (or just
+    'YYYY-MM'); it is reduced to a date key first, so every spelling of the
+    same day shares one cache entry.
+    """
+    return get_quarterly_data_or_latest(accord_code, field, date)[0]
+
+def get_quarterly_data_or_latest(accord_code: int, field: str, date: str) -> tuple:
+    """Like get_quarterly_data, but returns (value, latest_available_date).
+
+    On a hit latest_available_date is None. On a miss it is the company's
+    last stored date (None if the company has no data), so the caller can
+    suggest it without another query.
+    """
+    values, latest = get_quarterly_fields(accord_code, (field,), date)
+    value = values[field]
+    return value, latest if value is None else None
+
+def get_quarterly_fields(accord_code: int, fields, date: str) -> tuple:
+    """Several fields of a company's row on a date: ({field: value}, latest_available_date).
+
+    Uses the same exact-day-else-latest-in-month row as get_quarterly_data.
+    The whole row is fetched and cached once per (company, day), so any mix
+    of fields for that key costs one probe.
+    """
+    fields = fields.split(',') if isinstance(fields, str) else list(fields)
+    metric_fields = [field for field in fields if field not in VALID_FIELDS]
+    registry = get_metric_registry() if metric_fields else {}
+    invalid = [field for field in metric_fields if field not in registry]
+    if not fields or invalid:
+        raise ValueError(
+            f"Invalid field. Must be one of: {', '.join(VALID_FIELDS)} or a registered metric"
+        )
+    accord_code = int(accord_code)
+    date_key = parse_date_key(date)
+    
+    values = {}
+    if metric_fields:
+        found = _get_metric_values(
+            tuple(sorted(registry[field]['metric_id'] for field in metric_fields)), accord_code, date_key
+        )
+        values = {field: found.get(registry[field]['metric_id']) for field in metric_fields}
+    
+    # The source row also carries the latest-date suggestion, so probe it for
+    # source fields or when a metric is missing
+    latest = None
+    if len(values) < len(fields) or None in values.values():
+        row, latest = _get_quarterly_row(accord_code, date_key)
+        for field in fields:
+            if field in VALID_FIELDS:
+                values[field] = row[field] if row else None
+    return {field: values[field] for field in fields}, latest
+
+@lru_cache(maxsize=2048)
+def _get_quarterly_row(accord_code: int, date_key: int) -> tuple:
+    """One probe of idx_accord_code_date_key: exact day first, else latest in the month.
+
+    Returns (row dict or None, latest available date). Misses are cached like
+    hits, with the suggestion from company_date_range attached, so a repeated
+    miss never reaches the database. Rows with a NULL value also carry the
+    suggestion, since a single-field lookup on them is a miss.
+    """
     start_time = time.perf_counter()
-    result = None
+    row = None
+    suggestion = None
     try:
-        conn = get_db_connection()
+        month_start = date_key // 100 * 100
+        conn = get_read_connection(month_start, month_start + 99)
         cursor = conn.cursor()
         
-        # Validate field
-        valid_fields = ['ttm_pat_yoy_growth', 'sector', 'mcap_category', 'company_name']
-        if field not in valid_fields:
-            raise ValueError(f"Invalid field. Must be one of: {', '.join(valid_fields)}")
-        
-        # Convert input date to match database format if needed
-        if ' ' not in date and ':' not in date:
-            # If date is in YYYY-MM-DD format, add time
-            date = f"{date} 00:00:00"
-            
-        # Try exact match first
         query = f"""
-            SELECT {field} 
-            FROM ttm_pat_yoy_growth 
-            WHERE accord_code = ? AND date = ?
+            SELECT date, {', '.join(VALID_FIELDS)}
+            FROM ttm_pat_yoy_growth
+            WHERE accord_code = ? AND date_key BETWEEN ? AND ?
+            ORDER BY date_key = ? DESC, date_key DESC
             LIMIT 1
         """
-        cursor.execute(query, (accord_code, date))
+        cursor.execute(query, (accord_code, month_start, month_start + 99, date_key))
         result = cursor.fetchone()
+        row = dict(result) if result else None
+        
+        if row is None or None in row.values():
+            suggestion = _latest_available_date(cursor, accord_code)
         
-        # If no exact match, try with date range (YYYY-MM format)
-        if not result:
-            query = f"""
-                SELECT {field} 
-                FROM ttm_pat_yoy_growth 
-                WHERE accord_code = ? AND date LIKE ?
-                ORDER BY date DESC
-                LIMIT 1
-            """
-            month_pattern = f"{date[:7]}%"  # Match YYYY-MM-* pattern
-            cursor.execute(query, (accord_code, month_pattern))
-            result = cursor.fetchone()
-        
-        return result[0] if result else None
+        return row, suggestion
         
     except Exception as e:
         logging.error(f"Error in get_quarterly_data: {str(e)}")
@@ -108,18 +530,102 @@ def get_quarterly_data(accord_code: int, field: str, date: str) -> float:
     finally:
         elapsed = (time.perf_counter() - start_time) * 1000
         logging.info(
-            f"get_quarterly_data - Code: {accord_code}, Field: {field}, "
-            f"Date: {date}, Time: {elapsed:.2f}ms, "
-            f"Success: {result is not None if 'result' in locals() else False}"
+            f"get_quarterly_data - Code: {accord_code}, "
+            f"Date: {date_key}, Time: {elapsed:.2f}ms, "
+            f"Success: {row is not None}"
+            + (f", Latest: {suggestion}" if row is None else "")
+        )
+        conn.close()
+
+@lru_cache(maxsize=1)
+def get_metric_registry() -> dict:
+    """Registered metrics by name; cached until the next clear_cache()"""
+    conn = get_db_connection()
+    try:
+        return metrics_store.get_metric_registry(conn)
+    finally:
+        conn.close()
+
+@lru_cache(maxsize=2048)
+def _get_metric_values(metric_ids: tuple, accord_code: int, date_key: int) -> dict:
+    """{metric_id: value} for one company and day, exact day first, else latest in the month.
+
+    One primary-key seek per metric, so latency does not depend on how many
+    metrics are stored.
+    """
+    start_time = time.perf_counter()
+    values = {}
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        month_start = date_key // 100 * 100
+        cursor.execute(f"""
+            SELECT metric_id, date_key, value
+            FROM metric_values
+            WHERE metric_id IN ({', '.join('?' * len(metric_ids))})
+            AND accord_code = ? AND date_key BETWEEN ? AND ?
+            ORDER BY metric_id, date_key = ? DESC, date_key DESC
+        """, (*metric_ids, accord_code, month_start, month_start + 99, date_key))
+        for metric_id, _, value in cursor.fetchall():
+            values.setdefault(metric_id, value)
+        
+        return values
+        
+    except Exception as e:
+        logging.error(f"Error in get_metric_values: {str(e)}")
+        raise
+    finally:
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logging.info(
+            f"get_metric_values - Code: {accord_code}, Metrics: {len(metric_ids)}, "
+            f"Date: {date_key}, Time: {elapsed:.2f}ms, Found: {len(values)}"
         )
         conn.close()
 
 @lru_cache(maxsize=512)
+@shared('metric_series')
+def get_metric_series(metric: str, accord_code: int, start_date: str, end_date: str) -> list:
+    """Get a registered metric's time series for a company between dates (inclusive)"""
+    registry = get_metric_registry()
+    if metric not in registry:
+        raise ValueError(f"Unknown metric: {metric}")
+    start_time = time.perf_counter()
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT date_key, value
+            FROM metric_values
+            WHERE metric_id = ? AND accord_code = ?
+            AND date_key BETWEEN ? AND ?
+            ORDER BY date_key
+        """, (registry[metric]['metric_id'], accord_code,
+              parse_date_key(start_date), parse_date_key(end_date)))
+        results = cursor.fetchall()
+        
+        return [(format_date_key(row[0]), row[1]) for row in results]
+        
+    except Exception as e:
+        logging.error(f"Error in get_metric_series: {str(e)}")
+        raise
+    finally:
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logging.info(
+            f"get_metric_series - Metric: {metric}, Code: {accord_code}, "
+            f"Range: {start_date} to {end_date}, "
+            f"Time: {elapsed:.2f}ms, Rows: {len(results) if 'results' in locals() else 0}"
+        )
+        conn.close()
+
+@lru_cache(maxsize=512)
+@shared('series')
 def get_series(accord_code: int, field: str, start_date: str, end_date: str) -> list:
     """Get time series data for a company between dates"""
     start_time = time.perf_counter()
     try:
-        conn = get_db_connection()
+        conn = get_read_connection(*_partition_keys(start_date, end_date))
         cursor = conn.cursor()
         
         query = f"""
@@ -146,23 +652,82 @@ def get_series(accord_code: int, field: str, start_date: str, end_date: str) ->
         )
         conn.close()
 
-@lru_cache(maxsize=512)
-def get_quarterly_matrix(date: str, field: str) -> list:
-    """Get data for all companies on a specific date"""
+def get_series_multi(accord_codes, field: str, start_date: str, end_date: str) -> dict:
+    """Get aligned time series for several companies.
+
+    Codes are de-duplicated and sorted first, so any ordering of the same peer
+    group shares one cache entry.
+    """
+    codes = tuple(sorted(set(int(code) for code in accord_codes)))
+    if not codes:
+        raise ValueError("At least one accord_code is required")
+    if len(codes) > MAX_MULTI_CODES:
+        raise ValueError(f"At most {MAX_MULTI_CODES} accord codes can be requested at once")
+    if field not in VALID_FIELDS:
+        raise ValueError(f"Invalid field. Must be one of: {', '.join(VALID_FIELDS)}")
+    return _get_series_multi(codes, field, start_date, end_date)
+
+@lru_cache(maxsize=256)
+@shared('series_multi')
+def _get_series_multi(accord_codes: tuple, field: str, start_date: str, end_date: str) -> dict:
+    """Fetch all series in one indexed query and pivot into a dates x companies matrix"""
     start_time = time.perf_counter()
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
         
+        placeholders = ', '.join('?' * len(accord_codes))
         query = f"""
-            SELECT accord_code, company_name, sector, mcap_category, {field}
+            SELECT date, accord_code, {field}
             FROM ttm_pat_yoy_growth
-            WHERE date LIKE ? || '%'
+            WHERE accord_code IN ({placeholders})
+            AND date BETWEEN ? AND ?
+            ORDER BY date
         """
-        cursor.execute(query, (date,))
+        cursor.execute(query, (*accord_codes, start_date, end_date))
         results = cursor.fetchall()
         
-        return [tuple(row) for row in results]
+        # One row per date, one column per company; gaps stay None
+        column = {code: i for i, code in enumerate(accord_codes)}
+        dates = []
+        values = []
+        for date, accord_code, value in results:
+            if not dates or dates[-1] != date:
+                dates.append(date)
+                values.append([None] * len(accord_codes))
+            values[-1][column[accord_code]] = value
+        
+        return {
+            'codes': list(accord_codes),
+            'dates': dates,
+            'values': values
+        }
+        
+    except Exception as e:
+        logging.error(f"Error in get_series_multi: {str(e)}")
+        raise
+    finally:
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logging.info(
+            f"get_series_multi - Codes: {len(accord_codes)}, Field: {field}, "
+            f"Range: {start_date} to {end_date}, "
+            f"Time: {elapsed:.2f}ms, Rows: {len(results) if 'results' in locals() else 0}"
+        )
+        conn.close()
+
+@lru_cache(maxsize=512)
+@shared('quarterly_matrix')
+def get_quarterly_matrix(date: str, field: str) -> list:
+    """Get data for all companies on a specific date, ordered by accord_code.
+
+    ``date`` may be any prefix of the stored date ('2024-03-31', '2024-03').
+    Runs on the configured analytics backend.
+    """
+    start_time = time.perf_counter()
+    try:
+        backend = _analytics()
+        results = backend.quarterly_matrix(date, field)
+        return results
         
     except Exception as e:
         logging.error(f"Error in get_quarterly_matrix: {str(e)}")
@@ -171,11 +736,84 @@ def get_quarterly_matrix(date: str, field: str) -> list:
         elapsed = (time.perf_counter() - start_time) * 1000
         logging.info(
             f"get_quarterly_matrix - Date: {date}, Field: {field}, "
+            f"Backend: {backend.name if 'backend' in locals() else None}, "
+            f"Time: {elapsed:.2f}ms, Rows: {len(results) if 'results' in locals() else 0}"
+        )
+
+@lru_cache(maxsize=256)
+@shared('group_summary')
+def get_group_summary(date: str, field: str = 'ttm_pat_yoy_growth', scope: str = 'all') -> list:
+    """Companies, non-null count, mean, min and max of a field per group on a date.
+
+    ``scope`` groups by sector or mcap_category ('all' gives one row); rows
+    are (group_value, companies, count, mean, min, max) ordered by group_value.
+    """
+    _check_scope(scope)
+    start_time = time.perf_counter()
+    try:
+        backend = _analytics()
+        results = backend.group_summary(date, field, scope)
+        return results
+        
+    except Exception as e:
+        logging.error(f"Error in get_group_summary: {str(e)}")
+        raise
+    finally:
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logging.info(
+            f"get_group_summary - Date: {date}, Field: {field}, Scope: {scope}, "
+            f"Backend: {backend.name if 'backend' in locals() else None}, "
+            f"Time: {elapsed:.2f}ms, Rows: {len(results) if 'results' in locals() else 0}"
+        )
+
+@lru_cache(maxsize=1024)
+@shared('quarterly_matrix_page')
+def get_quarterly_matrix_page(date: str, field: str, limit: int = DEFAULT_PAGE_SIZE,
+                              after: tuple = None) -> tuple:
+    """Get one page of all companies on a date, ordered by date and accord_code.
+
+    Matches the same rows as get_quarterly_matrix (every date starting with
+    ``date``). Keyset pagination on (date, accord_code): each page is a seek
+    into idx_date_accord_code, so page N costs the same as page 1. ``after``
+    is the (date, accord_code) of the last row of the previous page.
+    Returns (rows, next_after).
+    """
+    _check_page_size(limit)
+    if after is not None and (len(after) != 2 or None in after):
+        raise ValueError("Invalid cursor")
+    start_time = time.perf_counter()
+    try:
+        conn = get_read_connection(*_partition_keys(date))
+        cursor = conn.cursor()
+        
+        query = f"""
+            SELECT accord_code, company_name, sector, mcap_category, {field}, date
+            FROM ttm_pat_yoy_growth
+            WHERE date >= ? AND date < ? AND (date, accord_code) > (?, ?)
+            ORDER BY date, accord_code
+            LIMIT ?
+        """
+        after_date, after_code = after if after is not None else ('', -1)
+        cursor.execute(query, (date, analytics.prefix_upper_bound(date), after_date, after_code, limit + 1))
+        results = cursor.fetchall()
+        
+        rows = [tuple(row)[:5] for row in results[:limit]]
+        next_after = (results[limit - 1][5], rows[-1][0]) if len(results) > limit else None
+        return rows, next_after
+        
+    except Exception as e:
+        logging.error(f"Error in get_quarterly_matrix_page: {str(e)}")
+        raise
+    finally:
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logging.info(
+            f"get_quarterly_matrix_page - Date: {date}, Field: {field}, After: {after}, "
             f"Time: {elapsed:.2f}ms, Rows: {len(results) if 'results' in locals() else 0}"
         )
         conn.close()
 
 @lru_cache(maxsize=512)
+@shared('all_pat_growth')
 def get_all_pat_growth(accord_code: int, field: str) -> list:
     """Get all historical data for a specific company"""
     start_time = time.perf_counter()
@@ -205,39 +843,429 @@ def get_all_pat_growth(accord_code: int, field: str) -> list:
         )
         conn.close()
 
+@lru_cache(maxsize=1024)
+@shared('all_pat_growth_page')
+def get_all_pat_growth_page(accord_code: int, field: str, limit: int = DEFAULT_PAGE_SIZE,
+                            after_date: str = None) -> tuple:
+    """Get one page of a company's history, ordered by date.
+
+    Keyset pagination on (accord_code, date) using idx_accord_code_date.
+    Returns (rows, next_after_date).
+    """
+    _check_page_size(limit)
+    start_time = time.perf_counter()
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        query = f"""
+            SELECT date, {field}
+            FROM ttm_pat_yoy_growth
+            WHERE accord_code = ? AND date > ?
+            ORDER BY date
+            LIMIT ?
+        """
+        cursor.execute(query, (accord_code, after_date or '', limit + 1))
+        results = cursor.fetchall()
+        
+        rows = [(row[0], row[1]) for row in results[:limit]]
+        next_after = rows[-1][0] if len(results) > limit else None
+        return rows, next_after
+        
+    except Exception as e:
+        logging.error(f"Error in get_all_pat_growth_page: {str(e)}")
+        raise
+    finally:
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logging.info(
+            f"get_all_pat_growth_page - Code: {accord_code}, Field: {field}, After: {after_date}, "
+            f"Time: {elapsed:.2f}ms, Rows: {len(results) if 'results' in locals() else 0}"
+        )
+        conn.close()
+
+@lru_cache(maxsize=4096)
+def parse_date_key(date: str) -> int:
+    """Integer YYYYMMDD key for a date in any of DATE_INPUT_FORMATS.
+
+    Any time part ('YYYY-MM-DD HH:MM:SS', 'YYYY-MM-DDTHH:MM') is ignored.
+    A month on its own ('YYYY-MM') gives day 00, which matches no day exactly
+    and so selects the latest value in that month.
+    """
+    text = str(date).strip().replace('T', ' ').split(' ')[0]
+    for fmt in DATE_INPUT_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return parsed.year * 10000 + parsed.month * 100 + parsed.day
+    for fmt in MONTH_INPUT_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return parsed.year * 10000 + parsed.month * 100
+    raise ValueError(f"Invalid date: {date}. Use YYYY-MM-DD")
+
+def format_date_key(date_key: int) -> str:
+    """Stored 'YYYY-MM-DD 00:00:00' form of a date key"""
+    return f"{date_key // 10000:04d}-{date_key // 100 % 100:02d}-{date_key % 100:02d} 00:00:00"
+
+def _check_scope(scope: str):
+    if scope not in derived_data.CROSS_SECTION_SCOPES:
+        raise ValueError(
+            f"Invalid scope. Must be one of: {', '.join(derived_data.CROSS_SECTION_SCOPES)}"
+        )
+
+@lru_cache(maxsize=1024)
+def get_cross_section(accord_code: int, date: str, scope: str = 'all') -> dict:
+    """Get a company's precomputed rank, percentile and z-score on a date.
+
+    Uses the same exact-day-else-latest-in-month row as get_quarterly_data.
+    """
+    _check_scope(scope)
+    date_key = parse_date_key(date)
+    month = format_date_key(date_key // 100 * 100)[:7]
+    start_time = time.perf_counter()
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT date, scope, accord_code, group_value, value, rank, group_size, percentile, zscore
+            FROM cross_sectional_stats
+            WHERE accord_code = ? AND scope = ? AND date >= ? AND date < ?
+            ORDER BY date = ? DESC, date DESC
+            LIMIT 1
+        """, (accord_code, scope, month, analytics.prefix_upper_bound(month), format_date_key(date_key)))
+        result = cursor.fetchone()
+        
+        return dict(result) if result else None
+        
+    except Exception as e:
+        logging.error(f"Error in get_cross_section: {str(e)}")
+        raise
+    finally:
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logging.info(
+            f"get_cross_section - Code: {accord_code}, Date: {date}, Scope: {scope}, "
+            f"Time: {elapsed:.2f}ms, Success: {result is not None if 'result' in locals() else False}"
+        )
+        conn.close()
+
+@lru_cache(maxsize=256)
+@shared('cross_section_matrix')
+def get_cross_section_matrix(date: str, scope: str = 'all') -> list:
+    """Get precomputed ranks, percentiles and z-scores for all companies on a date.
+
+    Matches every date starting with ``date``, like get_quarterly_matrix.
+    """
+    _check_scope(scope)
+    start_time = time.perf_counter()
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT accord_code, group_value, value, rank, group_size, percentile, zscore
+            FROM cross_sectional_stats
+            WHERE date >= ? AND date < ? AND scope = ?
+            ORDER BY date, group_value, rank
+        """, (date, analytics.prefix_upper_bound(date), scope))
+        results = cursor.fetchall()
+        
+        return [tuple(row) for row in results]
+        
+    except Exception as e:
+        logging.error(f"Error in get_cross_section_matrix: {str(e)}")
+        raise
+    finally:
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logging.info(
+            f"get_cross_section_matrix - Date: {date}, Scope: {scope}, "
+            f"Time: {elapsed:.2f}ms, Rows: {len(results) if 'results' in locals() else 0}"
+        )
+        conn.close()
+
+def encode_cursor(position: dict) -> str:
+    """Opaque keyset cursor token for the last row of a page"""
+    raw = json.dumps(position, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(token: str) -> dict:
+    """Inverse of encode_cursor; raises ValueError for malformed tokens"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, dict):
+        raise ValueError("Invalid cursor")
+    return position
+
+def _check_page_size(limit: int) -> int:
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return limit
+
+@lru_cache(maxsize=512)
+@shared('screen')
+def screen_companies(date: str, sectors: tuple = None, mcap_categories: tuple = None,
+                     min_value: float = None, max_value: float = None,
+                     limit: int = DEFAULT_PAGE_SIZE, after: tuple = None) -> tuple:
+    """Get companies matching the filters on a date, one keyset page at a time.
+
+    Matches the same dates as get_quarterly_matrix_page (every date starting
+    with ``date``). Filters are compiled to a parameterised WHERE clause
+    served by the (date, sector, mcap_category, accord_code) and
+    (date, accord_code) indexes. Rows are ordered by date and accord_code and
+    the page starts after ``after``, the (date, accord_code) of the previous
+    page's last row, so every page costs the same regardless of depth.
+    Returns (rows, next_after) where next_after is None on the last page.
+    """
+    _check_page_size(limit)
+    if after is not None and (len(after) != 2 or None in after):
+        raise ValueError("Invalid cursor")
+    start_time = time.perf_counter()
+    try:
+        conn = get_read_connection(*_partition_keys(date))
+        cursor = conn.cursor()
+        
+        clauses = ['date >= ?', 'date < ?']
+        params = [date, analytics.prefix_upper_bound(date)]
+        if sectors:
+            clauses.append(f"sector IN ({', '.join('?' * len(sectors))})")
+            params.extend(sectors)
+        if mcap_categories:
+            clauses.append(f"mcap_category IN ({', '.join('?' * len(mcap_categories))})")
+            params.extend(mcap_categories)
+        if min_value is not None:
+            clauses.append('ttm_pat_yoy_growth >= ?')
+            params.append(min_value)
+        if max_value is not None:
+            clauses.append('ttm_pat_yoy_growth <= ?')
+            params.append(max_value)
+        if after is not None:
+            clauses.append('(date, accord_code) > (?, ?)')
+            params.extend(after)
+        
+        # Fetch one extra row to know whether another page exists
+        query = f"""
+            SELECT accord_code, company_name, sector, mcap_category, ttm_pat_yoy_growth, date
+            FROM ttm_pat_yoy_growth
+            WHERE {' AND '.join(clauses)}
+            ORDER BY date, accord_code
+            LIMIT ?
+        """
+        cursor.execute(query, (*params, limit + 1))
+        results = cursor.fetchall()
+        
+        rows = [tuple(row)[:5] for row in results[:limit]]
+        next_after = (results[limit - 1][5], rows[-1][0]) if len(results) > limit else None
+        return rows, next_after
+        
+    except Exception as e:
+        logging.error(f"Error in screen_companies: {str(e)}")
+        raise
+    finally:
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logging.info(
+            f"screen_companies - Date: {date}, Sectors: {sectors}, Mcap: {mcap_categories}, "
+            f"Range: {min_value} to {max_value}, After: {after}, "
+            f"Time: {elapsed:.2f}ms, Rows: {len(results) if 'results' in locals() else 0}"
+        )
+        conn.close()
+
+# Source columns accepted by ingest_records, in insert order
+INGEST_COLUMNS = ['accord_code', 'company_name', 'sector', 'mcap_category', 'date', 'ttm_pat_yoy_growth']
+
+def ingest_records(records, batch_size: int = 5000, refresh: bool = True) -> int:
+    """Insert or update source rows, then rebuild derived tables and clear caches.
+
+    ``records`` is an iterable of dicts keyed by INGEST_COLUMNS. Rows are
+    upserted on (accord_code, date) and committed every ``batch_size`` rows,
+    so write locks are held briefly; in WAL mode readers are never blocked.
+    Returns the number of rows written.
+    """
+    start_time = time.perf_counter()
+    columns = INGEST_COLUMNS + ['date_key']
+    query = f"""
+        INSERT INTO ttm_pat_yoy_growth ({', '.join(columns)})
+        VALUES ({', '.join('?' * len(columns))})
+        ON CONFLICT(accord_code, date) DO UPDATE SET
+            company_name = excluded.company_name,
+            sector = excluded.sector,
+            mcap_category = excluded.mcap_category,
+            ttm_pat_yoy_growth = excluded.ttm_pat_yoy_growth
+    """
+    written = 0
+    years = set()
+    partitioned = get_partition_settings()['enabled']
+    conn = get_db_connection()
+    try:
+        if partitioned:
+            previous_revision = derived_data.get_source_revision(conn)
+        batch = []
+        for record in records:
+            row = dict(record)
+            # Canonicalise once here so lookups never reformat stored dates
+            row['date_key'] = parse_date_key(row['date'])
+            if row['date_key'] % 100 == 0:
+                raise ValueError(f"Invalid date: {row['date']}. A full day is required")
+            row['date'] = format_date_key(row['date_key'])
+            years.add(row['date_key'] // 10000)
+            batch.append(tuple(row.get(col) for col in columns))
+            if len(batch) >= batch_size:
+                conn.executemany(query, batch)
+                conn.commit()
+                written += len(batch)
+                batch = []
+        if batch:
+            conn.executemany(query, batch)
+            conn.commit()
+            written += len(batch)
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Error in ingest_records: {str(e)}")
+        raise
+    finally:
+        conn.close()
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logging.info(f"ingest_records - Rows: {written}, Time: {elapsed:.2f}ms")
+    
+    if partitioned and years:
+        rebuild_partitions(sorted(years), previous_revision)
+    if refresh:
+        refresh_derived_data(force=True)
+    # Upserts can change values without changing the derived tables' inputs
+    clear_cache()
+    return written
+
+@lru_cache(maxsize=1)
+def get_data_version() -> str:
+    """Fingerprint of the source data; cached until the next clear_cache()"""
+    conn = get_db_connection()
+    try:
+        return f"{derived_data.get_data_version(conn)}|{metrics_store.get_metrics_version(conn)}"
+    finally:
+        conn.close()
+
+@lru_cache(maxsize=1)
+def get_source_version() -> str:
+    """Fingerprint of ttm_pat_yoy_growth alone, which is all the analytics copy holds"""
+    conn = get_db_connection()
+    try:
+        return derived_data.get_data_version(conn)
+    finally:
+        conn.close()
+
+def ingest_metric_values(records, batch_size: int = 5000) -> int:
+    """Insert or update metric values and clear caches.
+
+    ``records`` is an iterable of dicts with 'metric', 'accord_code', 'date'
+    and 'value'. Unknown metric names are registered on first use; use
+    register_metric first to give them a description or unit. Returns the
+    number of values written.
+    """
+    start_time = time.perf_counter()
+    written = 0
+    conn = get_db_connection()
+    try:
+        metric_ids = {name: info['metric_id']
+                      for name, info in metrics_store.get_metric_registry(conn).items()}
+        batch = []
+        for record in records:
+            name = record['metric']
+            if name not in metric_ids:
+                metric_ids[name] = metrics_store.register_metric(conn, name, reserved=VALID_FIELDS)
+            date_key = parse_date_key(record['date'])
+            if date_key % 100 == 0:
+                raise ValueError(f"Invalid date: {record['date']}. A full day is required")
+            batch.append((metric_ids[name], int(record['accord_code']), date_key, record['value']))
+            if len(batch) >= batch_size:
+                written += metrics_store.write_metric_values(conn, batch)
+                conn.commit()
+                batch = []
+        if batch:
+            written += metrics_store.write_metric_values(conn, batch)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logging.error(f"Error in ingest_metric_values: {str(e)}")
+        raise
+    finally:
+        conn.close()
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logging.info(f"ingest_metric_values - Rows: {written}, Time: {elapsed:.2f}ms")
+    
+    clear_cache()
+    return written
+
+def register_metric(name: str, description: str = None, unit: str = None) -> int:
+    """Register a metric (or update its description/unit) and return its metric_id"""
+    conn = get_db_connection()
+    try:
+        metric_id = metrics_store.register_metric(conn, name, description, unit, reserved=VALID_FIELDS)
+        conn.commit()
+    finally:
+        conn.close()
+    clear_cache()
+    return metric_id
+
+def refresh_derived_data(force: bool = False) -> list:
+    """Rebuild derived tables, stale partitions and the analytics copy after a data load.
+
+    Clears caches if any derived table changed.
+    """
+    conn = get_db_connection()
+    try:
+        rebuilt = derived_data.refresh_derived_tables(conn, force=force)
+    finally:
+        conn.close()
+    if rebuilt:
+        clear_cache()
+    sync_partitions()
+    get_source_version.cache_clear()
+    get_analytics_backend().ensure_current(get_source_version)
+    return rebuilt
+
+# Cached query functions, reported by get_cache_info and cleared by clear_cache
+CACHED_QUERIES = {
+    'quarterly_data': _get_quarterly_row,
+    'series': get_series,
+    'series_multi': _get_series_multi,
+    'quarterly_matrix': get_quarterly_matrix,
+    'quarterly_matrix_page': get_quarterly_matrix_page,
+    'group_summary': get_group_summary,
+    'all_pat_growth': get_all_pat_growth,
+    'all_pat_growth_page': get_all_pat_growth_page,
+    'cross_section': get_cross_section,
+    'cross_section_matrix': get_cross_section_matrix,
+    'screen': screen_companies,
+    'data_version': get_data_version,
+    'source_version': get_source_version,
+    'metric_registry': get_metric_registry,
+    'metric_values': _get_metric_values,
+    'metric_series': get_metric_series
+}
+
 def clear_cache():
     """Clear all cached queries"""
-    get_quarterly_data.cache_clear()
-    get_series.cache_clear()
-    get_quarterly_matrix.cache_clear()
-    get_all_pat_growth.cache_clear()
+    for cached in CACHED_QUERIES.values():
+        cached.cache_clear()
     logging.info("All caches cleared")
 
 def get_cache_info() -> dict:
     """Get cache statistics"""
-    return {
-        'quarterly_data': {
-            'hits': get_quarterly_data.cache_info().hits,
-            'misses': get_quarterly_data.cache_info().misses,
-            'maxsize': get_quarterly_data.cache_info().maxsize,
-            'currsize': get_quarterly_data.cache_info().currsize
-        },
-        'series': {
-            'hits': get_series.cache_info().hits,
-            'misses': get_series.cache_info().misses,
-            'maxsize': get_series.cache_info().maxsize,
-            'currsize': get_series.cache_info().currsize
-        },
-        'quarterly_matrix': {
-            'hits': get_quarterly_matrix.cache_info().hits,
-            'misses': get_quarterly_matrix.cache_info().misses,
-            'maxsize': get_quarterly_matrix.cache_info().maxsize,
-            'currsize': get_quarterly_matrix.cache_info().currsize
-        },
-        'all_pat_growth': {
-            'hits': get_all_pat_growth.cache_info().hits,
-            'misses': get_all_pat_growth.cache_info().misses,
-            'maxsize': get_all_pat_growth.cache_info().maxsize,
-            'currsize': get_all_pat_growth.cache_info().currsize
+    info = {}
+    for name, cached in CACHED_QUERIES.items():
+        stats = cached.cache_info()
+        info[name] = {
+            'hits': stats.hits,
+            'misses': stats.misses,
+            'maxsize': stats.maxsize,
+            'currsize': stats.currsize
         }
-    }
\ No newline at end of file
+    cache = get_shared_cache()
+    if cache is not None:
+        info['shared'] = cache.stats()
+    return info
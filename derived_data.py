@@ -0,0 +1,245 @@
+# derived_data.py
+"""Tables derived from ttm_pat_yoy_growth, rebuilt in bulk whenever the data changes.
+
+Every function takes an open sqlite3 connection, so this module has no
+configuration of its own and can be used by db_helper and by ingest scripts.
+"""
+import logging
+import math
+import sqlite3
+import time
+from datetime import datetime
+
+SOURCE_TABLE = 'ttm_pat_yoy_growth'
+
+# Grouping used for each cross-sectional scope; 'all' ranks the whole universe
+CROSS_SECTION_SCOPES = {
+    'all': "'all'",
+    'sector': 'COALESCE(sector, \'\')',
+    'mcap_category': 'COALESCE(mcap_category, \'\')'
+}
+
+# Integer YYYYMMDD key of a stored 'YYYY-MM-DD ...' date
+DATE_KEY_SQL = "CAST(substr({date}, 1, 4) || substr({date}, 6, 2) || substr({date}, 9, 2) AS INTEGER)"
+
+# Columns whose updates change the data version; date_key is derived from date
+TRACKED_COLUMNS = ['accord_code', 'company_name', 'sector', 'mcap_category', 'date', SOURCE_TABLE]
+
+
+def init_derived_schema(conn):
+    """Create the derived tables if they don't exist."""
+    cursor = conn.cursor()
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS derived_meta (
+        name TEXT PRIMARY KEY,
+        source_version TEXT,
+        refreshed_at TEXT,
+        rows INTEGER,
+        elapsed_ms REAL
+    )
+    ''')
+    init_change_tracking(conn)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS cross_sectional_stats (
+        date TEXT NOT NULL,
+        scope TEXT NOT NULL,
+        accord_code INTEGER NOT NULL,
+        group_value TEXT,
+        value REAL,
+        rank INTEGER,
+        group_size INTEGER,
+        percentile REAL,
+        zscore REAL,
+        PRIMARY KEY (date, scope, accord_code)
+    ) WITHOUT ROWID
+    ''')
+    # One company's statistics around a date (db_helper.get_cross_section)
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_cross_section_company
+    ON cross_sectional_stats (accord_code, scope, date)
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS company_date_range (
+        accord_code INTEGER PRIMARY KEY,
+        first_date TEXT,
+        last_date TEXT,
+        first_date_key INTEGER,
+        last_date_key INTEGER,
+        rows INTEGER
+    )
+    ''')
+    conn.commit()
+
+
+def init_change_tracking(conn):
+    """Count every insert, update and delete on the source table with triggers.
+
+    Being part of the schema, the triggers also see writes made by other
+    tools, so a change to any column (a company moving sector, say) bumps
+    the data version.
+    """
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS source_revision (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        revision INTEGER NOT NULL
+    )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO source_revision (id, revision) VALUES (1, 0)')
+    bump = 'BEGIN UPDATE source_revision SET revision = revision + 1 WHERE id = 1; END'
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS trg_source_insert AFTER INSERT ON {SOURCE_TABLE} {bump}')
+    conn.execute(f'CREATE TRIGGER IF NOT EXISTS trg_source_delete AFTER DELETE ON {SOURCE_TABLE} {bump}')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_source_update
+        AFTER UPDATE OF {', '.join(TRACKED_COLUMNS)} ON {SOURCE_TABLE} {bump}
+    ''')
+
+
+def get_source_revision(conn):
+    """Number of changes to the source table counted by init_change_tracking.
+
+    A single-row read, cheap enough to check before every partitioned read.
+    """
+    try:
+        return conn.execute('SELECT revision FROM source_revision WHERE id = 1').fetchone()[0]
+    except (sqlite3.OperationalError, TypeError):
+        return 0  # Tracking not set up yet
+
+
+def get_data_version(conn):
+    """Fingerprint of the source table; changes on any insert, delete or update.
+
+    The revision counted by init_change_tracking catches every change; the
+    row count, max id and totals tell apart different databases that
+    happen to be at the same revision.
+    """
+    row = conn.execute(f'''
+        SELECT COUNT(*), COALESCE(MAX(id), 0), TOTAL({SOURCE_TABLE}), COUNT(DISTINCT date)
+        FROM {SOURCE_TABLE}
+    ''').fetchone()
+    return f"{row[0]}:{row[1]}:{row[2]:.6f}:{row[3]}:{get_source_revision(conn)}"
+
+
+def init_date_key_triggers(conn):
+    """Derive date_key in the database for rows written without one.
+
+    db_helper.ingest_records sets the key itself; these triggers cover rows
+    inserted, or re-dated, by other tools while the app is running, so point
+    lookups by date_key never miss them.
+    """
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_date_key_insert
+        AFTER INSERT ON {SOURCE_TABLE}
+        WHEN NEW.date_key IS NULL AND NEW.date IS NOT NULL
+        BEGIN
+            UPDATE {SOURCE_TABLE} SET date_key = {DATE_KEY_SQL.format(date='NEW.date')}
+            WHERE rowid = NEW.rowid;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS trg_date_key_update
+        AFTER UPDATE OF date ON {SOURCE_TABLE}
+        WHEN NEW.date IS NOT NULL
+        BEGIN
+            UPDATE {SOURCE_TABLE} SET date_key = {DATE_KEY_SQL.format(date='NEW.date')}
+            WHERE rowid = NEW.rowid;
+        END
+    ''')
+
+
+def refresh_date_keys(conn):
+    """Fill the integer YYYYMMDD date_key for rows loaded without one.
+
+    Covers databases created before the column and its triggers existed.
+    """
+    cursor = conn.execute(f'''
+        UPDATE {SOURCE_TABLE}
+        SET date_key = {DATE_KEY_SQL.format(date='date')}
+        WHERE date_key IS NULL AND date IS NOT NULL
+    ''')
+    return cursor.rowcount
+
+
+def refresh_company_date_range(conn):
+    """First and last available date per company, used to suggest dates on a miss."""
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM company_date_range')
+    cursor.execute(f'''
+        INSERT INTO company_date_range
+        (accord_code, first_date, last_date, first_date_key, last_date_key, rows)
+        SELECT accord_code, MIN(date), MAX(date), MIN(date_key), MAX(date_key), COUNT(*)
+        FROM {SOURCE_TABLE}
+        GROUP BY accord_code
+    ''')
+    return conn.execute('SELECT COUNT(*) FROM company_date_range').fetchone()[0]
+
+
+def refresh_cross_sectional_stats(conn):
+    """Rank, percentile and z-score of every value within its date, per scope.
+
+    One INSERT ... SELECT with window functions per scope, so the whole
+    history is processed in a single set-based pass. Ranks are descending
+    (1 = highest growth), percentiles ascending (100 = highest, including the
+    only member of a group), z-scores use the population standard deviation
+    of the group.
+    """
+    conn.create_function('sqrt', 1, lambda x: math.sqrt(max(x, 0.0)) if x is not None else None,
+                         deterministic=True)
+    cursor = conn.cursor()
+    cursor.execute('DELETE FROM cross_sectional_stats')
+
+    for scope, group_expr in CROSS_SECTION_SCOPES.items():
+        cursor.execute(f'''
+            INSERT INTO cross_sectional_stats
+            (date, scope, accord_code, group_value, value, rank, group_size, percentile, zscore)
+            SELECT date, ?, accord_code, grp, v,
+                RANK() OVER (PARTITION BY date, grp ORDER BY v DESC),
+                COUNT(*) OVER grp_window,
+                CASE WHEN COUNT(*) OVER grp_window = 1 THEN 100.0
+                     ELSE 100.0 * PERCENT_RANK() OVER (PARTITION BY date, grp ORDER BY v) END,
+                (v - AVG(v) OVER grp_window)
+                    / NULLIF(sqrt(AVG(v * v) OVER grp_window
+                                  - AVG(v) OVER grp_window * AVG(v) OVER grp_window), 0)
+            FROM (
+                SELECT date, accord_code, {group_expr} AS grp, {SOURCE_TABLE} AS v
+                FROM {SOURCE_TABLE}
+                WHERE {SOURCE_TABLE} IS NOT NULL
+            )
+            WINDOW grp_window AS (PARTITION BY date, grp)
+        ''', (scope,))
+
+    return conn.execute('SELECT COUNT(*) FROM cross_sectional_stats').fetchone()[0]
+
+
+# (name, refresh function) pairs, run in order by refresh_derived_tables
+REFRESHERS = [
+    ('date_keys', refresh_date_keys),
+    ('company_date_range', refresh_company_date_range),
+    ('cross_sectional_stats', refresh_cross_sectional_stats),
+]
+
+
+def refresh_derived_tables(conn, force=False):
+    """Rebuild every derived table whose source version is out of date.
+
+    Returns the names of the tables that were rebuilt.
+    """
+    init_derived_schema(conn)
+    version = get_data_version(conn)
+    stored = dict(conn.execute('SELECT name, source_version FROM derived_meta').fetchall())
+
+    rebuilt = []
+    for name, refresh in REFRESHERS:
+        if not force and stored.get(name) == version:
+            continue
+        start_time = time.perf_counter()
+        rows = refresh(conn)
+        elapsed = (time.perf_counter() - start_time) * 1000
+        conn.execute('''
+            INSERT OR REPLACE INTO derived_meta (name, source_version, refreshed_at, rows, elapsed_ms)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (name, version, datetime.now().isoformat(timespec='seconds'), rows, elapsed))
+        conn.commit()
+        rebuilt.append(name)
+        logging.info(f"Refreshed {name} - Rows: {rows}, Time: {elapsed:.2f}ms")
+
+    return rebuilt
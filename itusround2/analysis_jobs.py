@@ -0,0 +1,368 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+import pandas as pd
+
+from portfolio_manager import PortfolioManager
+from price_loader import file_fingerprint
+
+# Stages of PortfolioManager.run_all reported as progress, in pipeline order
+JOB_STAGES = [
+    'load_files', 'validate_universe', 'compute_weights', 'compute_returns',
+    'fetch_benchmark', 'compute_beta', 'compute_weighted_metrics', 'aggregate'
+]
+RESULT_TABLES = ['stock_level', 'sector_aggregates', 'portfolio_summary']
+STATUS_FILE = 'status.json'
+# A job directory without a status file is taken to be mid-claim for this long
+CLAIM_TIMEOUT_S = 60
+
+
+def job_params(request):
+    """Validate an analysis request and return it in canonical form.
+
+    Accepts ``start_date``, ``end_date`` and optionally ``benchmark_ticker``,
+    ``accord_codes`` (a subset of the universe) and ``use_price_matrix``.
+    Equivalent requests (date formats, code order) give identical params.
+    """
+    if not isinstance(request, dict):
+        raise ValueError("Request body must be a JSON object")
+    unknown = set(request) - {'start_date', 'end_date', 'benchmark_ticker', 'accord_codes', 'use_price_matrix'}
+    if unknown:
+        raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    try:
+        start = pd.Timestamp(request['start_date'])
+        end = pd.Timestamp(request['end_date'])
+    except KeyError as e:
+        raise ValueError(f"Missing parameter: {e.args[0]}")
+    except (TypeError, ValueError):
+        raise ValueError("Invalid start_date or end_date. Use YYYY-MM-DD")
+    if start >= end:
+        raise ValueError("start_date must be before end_date")
+
+    codes = request.get('accord_codes')
+    if codes is not None:
+        try:
+            codes = sorted(set(int(code) for code in codes))
+        except (TypeError, ValueError):
+            raise ValueError("accord_codes must be a list of integers")
+        if not codes:
+            raise ValueError("accord_codes must not be empty")
+
+    return {
+        'start_date': str(start.date()),
+        'end_date': str(end.date()),
+        'benchmark_ticker': str(request.get('benchmark_ticker') or '^NSEI'),
+        'accord_codes': codes,
+        'use_price_matrix': bool(request.get('use_price_matrix', False))
+    }
+
+
+def job_key(params, fingerprints):
+    """Job id: hash of the canonical params and the input files' content hashes."""
+    payload = json.dumps({'params': params, 'inputs': fingerprints}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def _write_json(path, data):
+    """Write JSON atomically so readers in other processes never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp_path, path)
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+
+def _orphaned(status):
+    """True for a queued or running job whose process on this host has exited.
+
+    A queued job belongs to the web process that submitted it (its pool holds
+    the task); a running one to the pool worker executing it. Jobs submitted
+    on another host can't be checked and are assumed alive.
+    """
+    if status['state'] not in ('queued', 'running') or status.get('host') != socket.gethostname():
+        return False
+    pid = status.get('worker_pid') if status['state'] == 'running' else status.get('owner_pid')
+    return pid is not None and not _pid_alive(pid)
+
+
+def _update_status(job_dir, **fields):
+    """Merge fields into a job's status file (only the job's own worker writes it)."""
+    path = os.path.join(job_dir, STATUS_FILE)
+    with open(path) as f:
+        status = json.load(f)
+    status.update(fields)
+    _write_json(path, status)
+    return status
+
+
+def _run_job(job_dir, params, inputs):
+    """Run one analysis in a worker process and store its tables as Parquet."""
+    def progress(event, record):
+        if event == 'start':
+            _update_status(job_dir, stage=record['stage'])
+        elif record['status'] == 'ok' and record['stage'] in JOB_STAGES:
+            done = JOB_STAGES.index(record['stage']) + 1
+            _update_status(job_dir, progress=round(done / len(JOB_STAGES), 3))
+
+    _update_status(job_dir, state='running', started_at=_now(), worker_pid=os.getpid())
+    try:
+        manager = PortfolioManager(
+            universe_path=inputs['universe_path'],
+            prices_path=inputs['prices_path'],
+            start_date=params['start_date'],
+            end_date=params['end_date'],
+            benchmark_ticker=params['benchmark_ticker'],
+            cache_dir=inputs['cache_dir'],
+            use_price_matrix=params['use_price_matrix'],
+            report_path=os.path.join(job_dir, 'run_report.json'),
+            progress=progress,
+            log_dir=os.path.join(job_dir, 'logs')
+        )
+        if params['accord_codes'] is not None:
+            manager._load_files()
+            universe = manager.universe[manager.universe['accord_code'].isin(params['accord_codes'])]
+            if universe.empty:
+                raise ValueError("None of the accord_codes are in the universe")
+            manager.use_data(universe, manager.prices, manager.price_matrix)
+        if inputs.get('benchmark_path'):
+            manager.set_benchmark(pd.read_csv(inputs['benchmark_path'], index_col=0, parse_dates=True))
+
+        results = manager.run_all(output_path=None)
+        for name in RESULT_TABLES:
+            results[name].to_parquet(os.path.join(job_dir, f"{name}.parquet"), index=False)
+        _update_status(
+            job_dir, state='done', stage=None, progress=1.0, finished_at=_now(),
+            portfolio_metrics={k: float(v) for k, v in manager.portfolio_metrics.items()}
+        )
+    except Exception as e:
+        logging.error(f"Analysis job {os.path.basename(job_dir)} failed: {str(e)}")
+        _update_status(job_dir, state='error', error=str(e), finished_at=_now())
+
+
+class AnalysisJobs:
+    """Run PortfolioManager analyses in a process pool, with results stored by input hash.
+
+    Each job lives in ``results_dir/<job id>/``: a status file updated at every
+    pipeline stage and, once done, one Parquet file per result table. The job
+    id hashes the request parameters and the contents of the input files, so
+    an identical request returns the stored (or running) job instead of
+    starting another, and editing an input file gives new ids. Status and
+    results are read from disk, so any web worker process can serve them.
+    """
+
+    def __init__(self, universe_path, prices_path, results_dir='jobs', cache_dir='cache',
+                 benchmark_path=None, workers=2):
+        self.inputs = {
+            'universe_path': os.path.abspath(universe_path),
+            'prices_path': os.path.abspath(prices_path),
+            'cache_dir': os.path.abspath(cache_dir),
+            'benchmark_path': os.path.abspath(benchmark_path) if benchmark_path else None
+        }
+        self.results_dir = os.path.abspath(results_dir)
+        os.makedirs(self.results_dir, exist_ok=True)
+        self.workers = workers
+        self._executor = self._new_executor()
+        self._executor_lock = threading.Lock()
+        self._fingerprints = {}
+
+    def _new_executor(self):
+        # spawn: forking a threaded web server can deadlock the child
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+        )
+
+    def _replace_executor(self, broken):
+        """Start a new pool if ``broken`` is still the current one.
+
+        A pool whose worker died (e.g. killed for memory) refuses new tasks.
+        """
+        with self._executor_lock:
+            if self._executor is broken:
+                logging.warning("Analysis job pool broke (a worker died); starting a new one")
+                self._executor = self._new_executor()
+        broken.shutdown(wait=False)
+
+    def _fingerprint(self, path):
+        """Content hash of an input file, recomputed only when its size or mtime changes."""
+        stat = os.stat(path)
+        cached = self._fingerprints.get(path)
+        if cached is None or cached[0] != (stat.st_size, stat.st_mtime_ns):
+            cached = ((stat.st_size, stat.st_mtime_ns), file_fingerprint(path))
+            self._fingerprints[path] = cached
+        return cached[1]
+
+    def _job_dir(self, job_id):
+        # Ids are hex digests; anything else cannot name a job directory
+        if not job_id or not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        return os.path.join(self.results_dir, job_id)
+
+    def submit(self, request):
+        """Queue an analysis, or return the existing job for an identical request.
+
+        Returns (status, created). Jobs that failed, or whose process exited
+        before finishing (e.g. the web server restarted), are run again.
+        """
+        params = job_params(request)
+        fingerprints = {
+            name: self._fingerprint(self.inputs[name])
+            for name in ('universe_path', 'prices_path', 'benchmark_path') if self.inputs[name]
+        }
+        job_id = job_key(params, fingerprints)
+        job_dir = self._job_dir(job_id)
+
+        status = {
+            'job_id': job_id,
+            'state': 'queued',
+            'params': params,
+            'submitted_at': _now(),
+            'started_at': None,
+            'finished_at': None,
+            'stage': None,
+            'progress': 0.0,
+            'error': None,
+            'host': socket.gethostname(),
+            'owner_pid': os.getpid(),
+            'worker_pid': None
+        }
+        if not self._claim(job_dir, status):
+            existing = self.status(job_id)
+            if existing is None:
+                existing = self._unclaimed_status(job_dir)
+            if existing['state'] != 'error':
+                return existing, False
+            # Renaming is atomic, so only one process gets to rerun the job
+            stale_dir = f"{job_dir}.{os.getpid()}.stale"
+            try:
+                os.rename(job_dir, stale_dir)
+            except FileNotFoundError:
+                pass  # Another process moved it first; the claim below settles who reruns
+            else:
+                shutil.rmtree(stale_dir, ignore_errors=True)
+            if not self._claim(job_dir, status):
+                existing = self.status(job_id)
+                if existing is None:
+                    raise RuntimeError(f"Job {job_id} is being resubmitted by another process")
+                return existing, False
+
+        executor = self._executor
+        try:
+            future = executor.submit(_run_job, job_dir, params, self.inputs)
+        except BrokenProcessPool:
+            self._replace_executor(executor)
+            future = self._executor.submit(_run_job, job_dir, params, self.inputs)
+        future.add_done_callback(lambda f: self._check_worker(job_dir, executor, f))
+        logging.info(f"Queued analysis job {job_id} for {params['start_date']} to {params['end_date']}")
+        return status, True
+
+    @staticmethod
+    def _claim(job_dir, status):
+        """Create ``job_dir`` holding ``status``, or return False if the job exists.
+
+        The directory is filled under a temporary name and renamed into place,
+        so a job directory never appears without its status file.
+        """
+        tmp_dir = f"{job_dir}.{os.getpid()}.{threading.get_ident()}.new"
+        os.makedirs(tmp_dir)
+        try:
+            _write_json(os.path.join(tmp_dir, STATUS_FILE), status)
+            if os.path.exists(job_dir):
+                return False
+            try:
+                os.rename(tmp_dir, job_dir)
+            except OSError:
+                if not os.path.exists(job_dir):
+                    raise
+                return False  # Another process claimed it first
+            return True
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    @staticmethod
+    def _unclaimed_status(job_dir):
+        """Status for a job directory with no status file.
+
+        Treated as being set up by another process, unless it has been like
+        that for CLAIM_TIMEOUT_S, when it is reported as failed so the job is
+        run again.
+        """
+        try:
+            age = time.time() - os.stat(job_dir).st_mtime
+        except FileNotFoundError:
+            age = 0.0  # Moved away by a rerun in another process
+        if age < CLAIM_TIMEOUT_S:
+            raise RuntimeError(f"Job {os.path.basename(job_dir)} is being submitted by another process")
+        return {'job_id': os.path.basename(job_dir), 'state': 'error',
+                'error': 'Interrupted: the job was never queued'}
+
+    def _check_worker(self, job_dir, executor, future):
+        """Record a job as failed if its worker process died before reporting.
+
+        When the death broke the pool, a new pool is started for later jobs.
+        """
+        error = future.exception()
+        if error is not None:
+            _update_status(job_dir, state='error', error=str(error) or type(error).__name__,
+                           finished_at=_now())
+        if isinstance(error, BrokenProcessPool):
+            self._replace_executor(executor)
+
+    def status(self, job_id):
+        """A job's status dict, or None if there is no such job.
+
+        A queued or running job whose process has exited is reported (and
+        recorded) as failed, so it can be resubmitted.
+        """
+        job_dir = self._job_dir(job_id)
+        if job_dir is None:
+            return None
+        try:
+            with open(os.path.join(job_dir, STATUS_FILE)) as f:
+                status = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if _orphaned(status):
+            logging.warning(f"Analysis job {job_id} was interrupted ({status['state']} process exited)")
+            fields = {'state': 'error', 'finished_at': _now(),
+                      'error': 'Interrupted: the process running this job exited'}
+            try:
+                status = _update_status(job_dir, **fields)
+            except OSError:
+                status.update(fields)  # Being resubmitted by another process
+        return status
+
+    def result(self, job_id):
+        """{table name: DataFrame} for a finished job."""
+        job_dir = self._job_dir(job_id)
+        return {
+            name: pd.read_parquet(os.path.join(job_dir, f"{name}.parquet"))
+            for name in RESULT_TABLES
+        }
+
+    def close(self, wait=True):
+        with self._executor_lock:
+            executor = self._executor
+        executor.shutdown(wait=wait)
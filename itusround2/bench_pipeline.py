@@ -0,0 +1,107 @@
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+from portfolio_manager import PortfolioManager
+from synthetic_market import write_market
+
+
+def run_case(paths, benchmark, cache_dir, use_price_matrix, start_date, end_date, output_path):
+    """Run the full pipeline once and return its stage report."""
+    manager = PortfolioManager(
+        universe_path=paths['universe'],
+        prices_path=paths['prices'],
+        start_date=start_date,
+        end_date=end_date,
+        cache_dir=cache_dir,
+        use_price_matrix=use_price_matrix
+    )
+    manager.set_benchmark(benchmark)
+    manager.run_all(output_path=output_path)
+    return manager.profiler.report(), manager.universe
+
+
+def benchmark_size(n_stocks, work_dir, start_date, end_date, analysis_start, analysis_end, seed):
+    """Time every stage for one universe size, cold and warm cache, long and matrix modes."""
+    size_dir = os.path.join(work_dir, f"stocks_{n_stocks}")
+    paths, benchmark = write_market(
+        size_dir, n_stocks=n_stocks, start_date=start_date, end_date=end_date, seed=seed
+    )
+    result = {
+        'stocks': n_stocks,
+        'price_rows': sum(1 for _ in open(paths['prices'])) - 1,
+        'price_csv_mb': round(os.path.getsize(paths['prices']) / (1024 * 1024), 2),
+        'runs': {}
+    }
+
+    for use_price_matrix in (False, True):
+        mode = 'matrix' if use_price_matrix else 'long'
+        cache_dir = os.path.join(size_dir, f"cache_{mode}")
+        for cache_state in ('cold', 'warm'):
+            report, universe = run_case(
+                paths, benchmark, cache_dir, use_price_matrix,
+                analysis_start, analysis_end, os.path.join(size_dir, 'output.xlsx')
+            )
+            result['runs'][f"{mode}_{cache_state}"] = {
+                stage['stage']: {'wall_s': stage['wall_s'], 'peak_rss_mb': stage['peak_rss_mb']}
+                for stage in report['stages']
+            }
+            result['runs'][f"{mode}_{cache_state}"]['total_wall_s'] = report['total_wall_s']
+        result[f"{mode}_betas_computed"] = int(universe['beta'].notna().sum())
+
+    logging.warning(f"Benchmarked {n_stocks} stocks")
+    return result
+
+
+def print_summary(results):
+    """Print stage wall times per size and mode."""
+    stages = ['load_files', 'compute_returns', 'compute_beta', 'export', 'total_wall_s']
+    print(f"{'stocks':>8} {'run':<14}" + ''.join(f"{s:>18}" for s in stages))
+    for res in results:
+        for run_name, timings in res['runs'].items():
+            cells = []
+            for stage in stages:
+                value = timings.get(stage)
+                value = value['wall_s'] if isinstance(value, dict) else value
+                cells.append(f"{value:>18.3f}" if value is not None else f"{'-':>18}")
+            print(f"{res['stocks']:>8} {run_name:<14}" + ''.join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time PortfolioManager stages on synthetic markets.")
+    parser.add_argument('--sizes', default='100,1000,5000', help='comma-separated universe sizes')
+    parser.add_argument('--start-date', default='2022-01-01')
+    parser.add_argument('--end-date', default='2024-12-31')
+    parser.add_argument('--analysis-start', default='2023-11-01')
+    parser.add_argument('--analysis-end', default='2024-11-01')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='JSON results file')
+    parser.add_argument('--keep', action='store_true', help='keep the generated data directory')
+    args = parser.parse_args()
+
+    # Per-stage INFO logs would otherwise dominate the timings of small universes
+    logging.getLogger().setLevel(logging.WARNING)
+
+    work_dir = tempfile.mkdtemp(prefix='portfolio_bench_')
+    cwd = os.getcwd()
+    os.chdir(work_dir)  # missing-price CSVs under logs/ go to the scratch directory
+    try:
+        results = [
+            benchmark_size(int(n), work_dir, args.start_date, args.end_date,
+                           args.analysis_start, args.analysis_end, args.seed)
+            for n in args.sizes.split(',')
+        ]
+    finally:
+        os.chdir(cwd)
+        if not args.keep:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_summary(results)
+    output = args.output or f"bench_pipeline_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(output, 'w') as f:
+        json.dump({'timestamp': datetime.now().isoformat(timespec='seconds'), 'results': results}, f, indent=2)
+    print(f"\nResults written to {output}")
@@ -0,0 +1,128 @@
+import cProfile
+import json
+import logging
+import os
+import platform
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None if unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in KB on Linux
+    divisor = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+    return round(peak / divisor, 2)
+
+
+class StageProfiler:
+    """Record wall time, CPU time, peak RSS and row counts per pipeline stage.
+
+    Usage::
+
+        with profiler.stage('compute_returns') as stage:
+            ...
+            stage['rows'] = len(frame)
+
+    ``cprofile_path`` additionally captures a cProfile of the whole run and
+    ``trace_memory`` records the tracemalloc peak of Python allocations per stage.
+    ``on_stage(event, record)`` is called with 'start' and 'end' around every
+    stage, e.g. to report progress of a background job.
+    """
+
+    def __init__(self, cprofile_path=None, trace_memory=False, on_stage=None):
+        self.cprofile_path = cprofile_path
+        self.trace_memory = trace_memory
+        self.on_stage = on_stage
+        self.stages = []
+        self.started_at = None
+        self.finished_at = None
+        self._profile = None
+
+    def start(self):
+        """Begin a run, discarding stages recorded by a previous run."""
+        self.stages = []
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.finished_at = None
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.cprofile_path:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self):
+        """End a run and dump the cProfile capture if one was requested."""
+        self.finished_at = datetime.now().isoformat(timespec='seconds')
+        if self._profile is not None:
+            self._profile.disable()
+            self._profile.dump_stats(self.cprofile_path)
+            logging.info(f"cProfile stats written to {self.cprofile_path}")
+            self._profile = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name):
+        """Time one stage; the yielded dict can be given a 'rows' count."""
+        record = {'stage': name, 'rows': None, 'status': 'ok'}
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._notify('start', record)
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield record
+        except Exception:
+            record['status'] = 'error'
+            raise
+        finally:
+            record['wall_s'] = round(time.perf_counter() - wall_start, 6)
+            record['cpu_s'] = round(time.process_time() - cpu_start, 6)
+            record['peak_rss_mb'] = peak_rss_mb()
+            if self.trace_memory and tracemalloc.is_tracing():
+                record['py_peak_mb'] = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+            self.stages.append(record)
+            logging.info(
+                f"Stage {name}: {record['wall_s']:.3f}s wall, {record['cpu_s']:.3f}s CPU, "
+                f"rows: {record['rows']}, peak RSS: {record['peak_rss_mb']} MB"
+            )
+            self._notify('end', record)
+
+    def _notify(self, event, record):
+        """Call the on_stage hook; a failing hook is logged, never fatal to the run."""
+        if self.on_stage is None:
+            return
+        try:
+            self.on_stage(event, record)
+        except Exception as e:
+            logging.warning(f"Stage hook failed for {record['stage']}: {str(e)}")
+
+    def report(self, **extra):
+        """Machine-readable summary of the run."""
+        return {
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'total_wall_s': round(sum(s['wall_s'] for s in self.stages), 6),
+            'total_cpu_s': round(sum(s['cpu_s'] for s in self.stages), 6),
+            'peak_rss_mb': peak_rss_mb(),
+            'stages': self.stages,
+            **extra
+        }
+
+    def write_report(self, path, **extra):
+        """Write the run report as JSON."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.report(**extra), f, indent=2, default=str)
+        logging.info(f"Run report written to {path}")
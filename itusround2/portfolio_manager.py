@@ -1,10 +1,16 @@
 import pandas as pd
 import numpy as np
 import yfinance as yf
+import xlsxwriter
 import logging
 from datetime import datetime, timedelta
 import os
 
+from price_loader import file_fingerprint, load_price_history, price_cache_path
+from price_matrix import PriceMatrix
+from pipeline_profiler import StageProfiler
+from stage_cache import StageCache, frame_fingerprint
+
 # Set up logging
 logging.basicConfig(
     level=logging.INFO,
@@ -16,10 +22,30 @@ logging.basicConfig(
 )
 
 class PortfolioManager:
-    def __init__(self, universe_path, prices_path, start_date, end_date, benchmark_ticker="^NSEI"):
-        """Initialize the PortfolioManager with file paths and date range."""
+    def __init__(self, universe_path, prices_path, start_date, end_date, benchmark_ticker="^NSEI",
+                 cache_dir='cache', chunksize=None, use_price_matrix=False,
+                 report_path=None, cprofile_path=None, trace_memory=False, progress=None,
+                 stage_cache=True, log_dir='logs'):
+        """Initialize the PortfolioManager with file paths and date range.
+
+        ``progress(event, record)`` is called when each pipeline stage starts
+        and ends (see ``StageProfiler``). With ``stage_cache`` on, as-of prices,
+        daily returns and betas are stored under ``cache_dir/stages`` keyed by
+        their inputs and reused by later runs (see ``StageCache``). Stocks
+        with missing prices or betas are listed in CSV files under ``log_dir``.
+        """
         self.universe_path = universe_path
         self.prices_path = prices_path
+        self.cache_dir = cache_dir
+        self.chunksize = chunksize
+        self.use_price_matrix = use_price_matrix
+        self.prices_fingerprint = None
+        self.price_matrix = None
+        self.report_path = report_path
+        self.stage_cache = StageCache(os.path.join(cache_dir, 'stages')) if stage_cache else None
+        self.profiler = StageProfiler(
+            cprofile_path=cprofile_path, trace_memory=trace_memory, on_stage=progress
+        )
         self.start_date = pd.Timestamp(start_date)
         self.end_date = pd.Timestamp(end_date)
         self.benchmark_ticker = benchmark_ticker
@@ -27,7 +53,8 @@ class PortfolioManager:
         self.prices = None
         self.benchmark = None
         self.portfolio_metrics = {}
-        os.makedirs('logs', exist_ok=True)
+        self.log_dir = log_dir
+        os.makedirs(log_dir, exist_ok=True)
         logging.info(f"PortfolioManager initialized for period {start_date} to {end_date}")
 
     def _load_files(self):
@@ -41,15 +68,24 @@ class PortfolioManager:
                 'Sector': 'sector'
             })
             
-            # Load and clean price data
-            self.prices = pd.read_csv(self.prices_path)
-            self.prices = self.prices.rename(columns={
-                'date': 'date',
-                'price': 'price'
-            })
-            self.prices['date'] = pd.to_datetime(self.prices['date'])
-            self.prices = self.prices.sort_values(['accord_code', 'date'])
-            self.prices['price'] = pd.to_numeric(self.prices['price'], errors='coerce')
+            # Load typed price data (int32 codes, float32 prices), reusing the Parquet cache
+            self.prices_fingerprint = file_fingerprint(self.prices_path)
+            if self.stage_cache is not None:
+                cached = os.path.exists(price_cache_path(self.prices_path, self.cache_dir, self.prices_fingerprint))
+                self.stage_cache.record('prices', self.prices_fingerprint, 'reused' if cached else 'recomputed')
+            self.prices = load_price_history(
+                self.prices_path,
+                cache_dir=self.cache_dir,
+                chunksize=self.chunksize,
+                fingerprint=self.prices_fingerprint
+            )
+            
+            # Dense memory-mapped matrix shared by as-of lookups and betas
+            if self.use_price_matrix:
+                matrix_dir = os.path.join(
+                    self.cache_dir, f"price_matrix-{self.prices_fingerprint[:16]}"
+                )
+                self.price_matrix = PriceMatrix.build_or_open(self.prices, matrix_dir)
             
             logging.info(f"Loaded {len(self.universe)} stocks and {len(self.prices)} price records")
             
@@ -73,6 +109,9 @@ class PortfolioManager:
 
     def _get_last_price_on_or_before(self, target_date):
         """Get the last available price on or before the target date for each stock."""
+        if self.price_matrix is not None:
+            return self.price_matrix.asof(target_date)
+            
         if self.prices is None:
             raise ValueError("Price data not loaded. Call _load_files() first.")
             
@@ -89,6 +128,31 @@ class PortfolioManager:
         })
         return result
 
+    def _cached_stage(self, stage, inputs, compute):
+        """Reuse the stored result of a stage for these inputs, or compute it.
+
+        Every key includes the price file's content hash; prices given through
+        ``use_data`` have none, so those runs always compute.
+        """
+        if self.stage_cache is None or self.prices_fingerprint is None:
+            return compute()
+        return self.stage_cache.get_or_compute(
+            stage, {'prices': self.prices_fingerprint, **inputs}, compute
+        )
+
+    def _asof_prices(self, target_date):
+        """Last price on or before a date for every stock, via the stage cache.
+
+        Covers all stocks in the price file, so a different universe or the
+        other end of the period reuses the same artifact. Matrix and long
+        lookups are stored apart because their date dtypes differ.
+        """
+        return self._cached_stage(
+            'asof_prices',
+            {'date': pd.Timestamp(target_date).isoformat(), 'matrix': self.price_matrix is not None},
+            lambda: self._get_last_price_on_or_before(target_date)
+        )
+
     def compute_weights(self):
         """Compute equal weights for all stocks in the universe."""
         if self.universe is None:
@@ -102,8 +166,9 @@ class PortfolioManager:
         """Download benchmark data using yfinance with proper date handling."""
         try:
             # Get data with buffer days to ensure we have the required dates
-            start = (self.start_date - pd.Timedelta(days=30)).strftime('%Y-%m-%d')
-            end = (self.end_date + pd.Timedelta(days=30)).strftime('%Y-%m-%d')
+            window_start, window_end = self._benchmark_window()
+            start = window_start.strftime('%Y-%m-%d')
+            end = window_end.strftime('%Y-%m-%d')
             
             logging.info(f"Downloading benchmark data for {self.benchmark_ticker} from {start} to {end}")
             
@@ -117,25 +182,42 @@ class PortfolioManager:
             if bench.empty:
                 raise ValueError(f"No benchmark data found for {self.benchmark_ticker}")
                 
-            # Keep only the 'Close' column and rename it
-            self.benchmark = bench[['Close']].copy()
-            self.benchmark.columns = ['bench_close']
-            
-            # Calculate daily returns
-            self.benchmark['bench_ret'] = self.benchmark['bench_close'].pct_change()
-            
-            # Get the benchmark price on start and end dates
-            self.benchmark_start_price = self._get_last_price_on_or_before_benchmark(self.start_date)
-            self.benchmark_end_price = self._get_last_price_on_or_before_benchmark(self.end_date)
-            
+            self.set_benchmark(bench)
             logging.info(f"Successfully downloaded {len(self.benchmark)} days of benchmark data")
-            logging.info(f"Benchmark price on {self.start_date.date()}: {self.benchmark_start_price}")
-            logging.info(f"Benchmark price on {self.end_date.date()}: {self.benchmark_end_price}")
             
         except Exception as e:
             logging.error(f"Error downloading benchmark data: {str(e)}")
             raise
             
+    def _benchmark_window(self):
+        """Benchmark date window used for beta: 30 days either side of the analysis period."""
+        return self.start_date - pd.Timedelta(days=30), self.end_date + pd.Timedelta(days=30)
+
+    def set_benchmark(self, bench):
+        """Use benchmark prices that were already downloaded (a frame with a 'Close' column).
+
+        Rows outside the analysis window are dropped, so a single wide download
+        can be shared by several managers with different date ranges.
+        """
+        window_start, window_end = self._benchmark_window()
+        bench = bench[(bench.index >= window_start) & (bench.index < window_end)]
+        if bench.empty:
+            raise ValueError(f"No benchmark data found for {self.benchmark_ticker} in the analysis window")
+        
+        # Keep only the 'Close' column and rename it
+        self.benchmark = bench[['Close']].copy()
+        self.benchmark.columns = ['bench_close']
+        
+        # Calculate daily returns
+        self.benchmark['bench_ret'] = self.benchmark['bench_close'].pct_change()
+        
+        # Get the benchmark price on start and end dates
+        self.benchmark_start_price = self._get_last_price_on_or_before_benchmark(self.start_date)
+        self.benchmark_end_price = self._get_last_price_on_or_before_benchmark(self.end_date)
+        
+        logging.info(f"Benchmark price on {self.start_date.date()}: {self.benchmark_start_price}")
+        logging.info(f"Benchmark price on {self.end_date.date()}: {self.benchmark_end_price}")
+
     def _get_last_price_on_or_before_benchmark(self, target_date):
         """Get the last available benchmark price on or before the target date."""
         if self.benchmark is None:
@@ -152,12 +234,12 @@ class PortfolioManager:
 
     def compute_returns(self):
         """Compute returns for each stock between start and end dates."""
-        if self.universe is None or self.prices is None:
+        if self.universe is None or (self.prices is None and self.price_matrix is None):
             raise ValueError("Data not loaded. Call _load_files() first.")
             
         # Get prices for start and end dates
-        start_prices = self._get_last_price_on_or_before(self.start_date)
-        end_prices = self._get_last_price_on_or_before(self.end_date)
+        start_prices = self._asof_prices(self.start_date)
+        end_prices = self._asof_prices(self.end_date)
         
         # Rename columns for clarity
         start_prices = start_prices.rename(columns={
@@ -191,58 +273,45 @@ class PortfolioManager:
         missing_end = self.universe[self.universe['price_end'].isna()]
         
         if not missing_start.empty or not missing_end.empty:
-            os.makedirs('logs', exist_ok=True)
-            missing_start[['accord_code', 'company_name']].to_csv('logs/missing_start_prices.csv', index=False)
-            missing_end[['accord_code', 'company_name']].to_csv('logs/missing_end_prices.csv', index=False)
+            os.makedirs(self.log_dir, exist_ok=True)
+            missing_start[['accord_code', 'company_name']].to_csv(
+                os.path.join(self.log_dir, 'missing_start_prices.csv'), index=False
+            )
+            missing_end[['accord_code', 'company_name']].to_csv(
+                os.path.join(self.log_dir, 'missing_end_prices.csv'), index=False
+            )
             
             logging.warning(
                 f"{len(missing_start)} stocks missing start prices, "
                 f"{len(missing_end)} missing end prices. "
-                "Check logs/missing_*_prices.csv for details."
+                f"Check {os.path.join(self.log_dir, 'missing_*_prices.csv')} for details."
             )
         
         logging.info(
             f"Computed returns for {len(self.universe) - len(missing_start) - len(missing_end)} stocks"
         )
 
-    def compute_beta(self):
-        """Compute beta for each stock relative to the benchmark."""
-        if self.benchmark is None:
-            self._fetch_benchmark()
-            
-        if self.prices is None:
-            raise ValueError("Price data not loaded. Call _load_files() first.")
-            
-        try:
-            # Calculate daily returns for each stock
-            self.prices['stock_ret'] = self.prices.groupby('accord_code')['price'].pct_change()
-            
-            # Prepare stock returns
-            stock_rets = self.prices[['date', 'accord_code', 'stock_ret']].dropna()
-            stock_rets['date'] = pd.to_datetime(stock_rets['date'])
-            
-            # Prepare benchmark returns - keep the index as date
-            bench_rets = self.benchmark[['bench_ret']].copy()
-            bench_rets = bench_rets.reset_index()  # Convert index to column
-            bench_rets = bench_rets.rename(columns={'Date': 'date'})  # yfinance uses 'Date' as index name
-            
-            # Ensure date columns are in datetime format
-            bench_rets['date'] = pd.to_datetime(bench_rets['date'])
-            
-            # Drop any rows with NaN values
-            bench_rets = bench_rets.dropna(subset=['bench_ret'])
-            
-            logging.info(f"Benchmark returns sample:\n{bench_rets.head()}")
-            logging.info(f"Stock returns sample:\n{stock_rets.head()}")
-            
-            # Debug: Print the columns in bench_rets
-            logging.info(f"Benchmark columns: {bench_rets.columns.tolist()}")
-            logging.info(f"Sample benchmark data:\n{bench_rets.head()}")
+    def _daily_returns(self):
+        """Return of each stock between consecutive price observations."""
+        stock_rets = self.prices[['date', 'accord_code']].copy()
+        stock_rets['stock_ret'] = self.prices.groupby('accord_code')['price'].pct_change()
+        stock_rets = stock_rets.dropna()
+        stock_rets['date'] = pd.to_datetime(stock_rets['date'])
+        return stock_rets.reset_index(drop=True)
+
+    def _compute_betas(self, bench_rets):
+        """Beta of every stock in the price data against the benchmark returns."""
+        if self.price_matrix is not None:
+            # Vectorised betas straight from the dense price matrix
+            betas_df = self.price_matrix.betas(bench_rets.set_index('date')['bench_ret'])
+            logging.info(f"Computed matrix betas for {len(betas_df)} of {len(self.price_matrix.codes)} stocks")
+        else:
+            # Daily returns depend only on the price file, so every run reuses them
+            stock_rets = self._cached_stage('daily_returns', {}, self._daily_returns)
+            
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(f"Stock returns sample:\n{stock_rets.head()}")
             
-            # Ensure we have enough data points
-            if len(bench_rets) < 5:
-                raise ValueError("Insufficient benchmark data points for beta calculation")
-                
             # Ensure we have stock returns
             if stock_rets.empty:
                 raise ValueError("No stock returns data available for beta calculation")
@@ -271,10 +340,52 @@ class PortfolioManager:
                     except Exception as e:
                         logging.warning(f"Error calculating beta for {accord_code}: {str(e)}")
             
-            if not betas:
+            betas_df = pd.DataFrame(betas, columns=['accord_code', 'beta'])
+        
+        return betas_df
+
+    def compute_beta(self):
+        """Compute beta for each stock relative to the benchmark."""
+        if self.benchmark is None:
+            self._fetch_benchmark()
+            
+        if self.prices is None and self.price_matrix is None:
+            raise ValueError("Price data not loaded. Call _load_files() first.")
+            
+        try:
+            # Prepare benchmark returns - keep the index as date
+            bench_rets = self.benchmark[['bench_ret']].copy()
+            bench_rets = bench_rets.reset_index()  # Convert index to column
+            bench_rets = bench_rets.rename(columns={'Date': 'date'})  # yfinance uses 'Date' as index name
+            
+            # Ensure date columns are in datetime format
+            bench_rets['date'] = pd.to_datetime(bench_rets['date'])
+            
+            # Drop any rows with NaN values
+            bench_rets = bench_rets.dropna(subset=['bench_ret'])
+            
+            # Sample dumps are only built when debug logging is on
+            if logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(f"Benchmark returns sample:\n{bench_rets.head()}")
+            
+            # Ensure we have enough data points
+            if len(bench_rets) < 5:
+                raise ValueError("Insufficient benchmark data points for beta calculation")
+            
+            # Betas read only the prices and these benchmark returns, so a new
+            # universe or different weights reuse the stored ones
+            betas_df = self._cached_stage(
+                'betas',
+                {
+                    'benchmark': frame_fingerprint(bench_rets),
+                    'matrix': self.price_matrix is not None,
+                    'min_obs': 5
+                },
+                lambda: self._compute_betas(bench_rets)
+            )
+            
+            if betas_df.empty:
                 raise ValueError("No valid betas could be calculated for any stock")
-                
-            betas_df = pd.DataFrame(betas)
             
             # Ensure we don't have duplicate columns before merging
             if 'beta' in self.universe.columns:
@@ -286,11 +397,12 @@ class PortfolioManager:
             # Log any stocks with NaN beta
             nan_beta = self.universe[self.universe['beta'].isna()]
             if not nan_beta.empty:
-                os.makedirs('logs', exist_ok=True)
-                nan_beta[['accord_code', 'company_name']].to_csv('logs/nan_beta_stocks.csv', index=False)
+                os.makedirs(self.log_dir, exist_ok=True)
+                nan_beta_path = os.path.join(self.log_dir, 'nan_beta_stocks.csv')
+                nan_beta[['accord_code', 'company_name']].to_csv(nan_beta_path, index=False)
                 logging.warning(
                     f"Could not calculate beta for {len(nan_beta)} stocks. "
-                    "Check logs/nan_beta_stocks.csv"
+                    f"Check {nan_beta_path}"
                 )
             
             logging.info(f"Computed beta for {len(self.universe) - len(nan_beta)} stocks")
@@ -300,11 +412,6 @@ class PortfolioManager:
             
         except Exception as e:
             logging.error(f"Error in compute_beta: {str(e)}", exc_info=True)
-            if 'merged' in locals():
-                logging.info(f"Merged data sample:\n{merged.head()}")
-                if not merged.empty:
-                    logging.info(f"Unique stocks in merged data: {merged['accord_code'].nunique()}")
-                    logging.info(f"Date range in merged data: {merged['date'].min()} to {merged['date'].max()}")
             raise
 
     def compute_weighted_metrics(self):
@@ -365,81 +472,190 @@ class PortfolioManager:
         
         return summary
 
-    def export_excel(self, filename='output.xlsx'):
-        """Export results to an Excel file with multiple sheets."""
+    # Columns written to the stock-level output, with Excel width and number format
+    STOCK_LEVEL_COLUMNS = [
+        ('accord_code', 15, None),
+        ('company_name', 30, None),
+        ('sector', 20, None),
+        ('weight', 10, 'pct'),
+        ('price_start', 12, 'num'),
+        ('date_start_matched', 12, 'date'),
+        ('price_end', 12, 'num'),
+        ('date_end_matched', 12, 'date'),
+        ('abs_return', 12, 'pct'),
+        ('beta', 12, 'num'),
+        ('weighted_return', 12, 'pct'),
+        ('weighted_beta', 12, 'num')
+    ]
+
+    def _export_tables(self, sector_agg=None, summary=None):
+        """Collect the output tables, reusing aggregates that were already computed."""
         if self.universe is None:
             raise ValueError("No data to export. Run the analysis first.")
             
-        with pd.ExcelWriter(filename, engine='xlsxwriter') as writer:
-            # Stock Level sheet
-            stock_cols = [
-                'accord_code', 'company_name', 'sector', 'weight',
-                'price_start', 'date_start_matched',
-                'price_end', 'date_end_matched',
-                'abs_return', 'beta', 'weighted_return', 'weighted_beta'
-            ]
-            
-            stock_df = self.universe[stock_cols].copy()
-            stock_df.to_excel(writer, sheet_name='Stock Level', index=False)
-            
-            # Sector Aggregates sheet
+        if sector_agg is None:
             sector_agg = self.sector_aggregation()
-            sector_agg[['sector', 'sector_weight', 'sector_weighted_return', 'sector_beta']].to_excel(
-                writer, sheet_name='Aggregates', index=False
-            )
-            
-            # Summary sheet
+        if summary is None:
             summary = self.portfolio_aggregation()
-            summary.to_excel(writer, sheet_name='Summary', index=False)
             
-            # Formatting
-            workbook = writer.book
-            stock_worksheet = writer.sheets['Stock Level']
+        stock_cols = [col for col, _, _ in self.STOCK_LEVEL_COLUMNS]
+        return {
+            'Stock Level': self.universe[stock_cols],
+            'Aggregates': sector_agg[['sector', 'sector_weight', 'sector_weighted_return', 'sector_beta']],
+            'Summary': summary
+        }
+
+    @staticmethod
+    def _write_sheet(worksheet, df, header_format=None, start_row=0, header=True):
+        """Write a frame row by row, as xlsxwriter's constant_memory mode requires.
+
+        Returns the row after the last one written, so several frames can be
+        appended to one sheet by passing it back as ``start_row`` with
+        ``header=False``.
+        """
+        if header:
+            worksheet.write_row(start_row, 0, list(df.columns), header_format)
+            start_row += 1
+        values = df.astype(object).where(df.notna(), None)
+        for row_idx, row in enumerate(values.itertuples(index=False, name=None), start=start_row):
+            worksheet.write_row(row_idx, 0, row)
+        return start_row + len(df)
+
+    def export_excel(self, filename='output.xlsx', sector_agg=None, summary=None):
+        """Export results to an Excel file with multiple sheets.
+
+        Rows are streamed with xlsxwriter's ``constant_memory`` mode, so memory
+        stays flat for large stock-level sheets. Pass the aggregates from
+        ``run_all`` to avoid recomputing them.
+        """
+        tables = self._export_tables(sector_agg, summary)
+        
+        workbook = xlsxwriter.Workbook(filename, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd'
+        })
+        try:
+            header_format = workbook.add_format({'bold': True, 'border': 1})
             
             # Define formats
-            num_format = workbook.add_format({'num_format': '0.00'})
-            pct_format = workbook.add_format({'num_format': '0.00%'})
-            date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
-            
-            # Apply formats to columns
-            stock_worksheet.set_column('A:A', 15)  # accord_code
-            stock_worksheet.set_column('B:B', 30)  # company_name
-            stock_worksheet.set_column('C:C', 20)  # sector
-            stock_worksheet.set_column('D:D', 10, pct_format)  # weight
-            stock_worksheet.set_column('E:E', 12, num_format)  # start_price
-            stock_worksheet.set_column('F:F', 12, date_format)  # start_date
-            stock_worksheet.set_column('G:G', 12, num_format)  # end_price
-            stock_worksheet.set_column('H:H', 12, date_format)  # end_date
-            stock_worksheet.set_column('I:I', 12, pct_format)  # abs_return
-            stock_worksheet.set_column('J:J', 12, num_format)  # beta
-            stock_worksheet.set_column('K:K', 12, pct_format)  # weighted_return
-            stock_worksheet.set_column('L:L', 12, num_format)  # weighted_beta
-            
-            logging.info(f"Results exported to {filename}")
-
-    def run_all(self):
-        """Run the complete analysis pipeline."""
+            formats = {
+                'num': workbook.add_format({'num_format': '0.00'}),
+                'pct': workbook.add_format({'num_format': '0.00%'}),
+                'date': workbook.add_format({'num_format': 'yyyy-mm-dd'})
+            }
+            
+            # Stock Level sheet; column formats must be set before rows are streamed
+            stock_worksheet = workbook.add_worksheet('Stock Level')
+            for col_idx, (_, width, fmt) in enumerate(self.STOCK_LEVEL_COLUMNS):
+                stock_worksheet.set_column(col_idx, col_idx, width, formats.get(fmt))
+            self._write_sheet(stock_worksheet, tables['Stock Level'], header_format)
+            
+            # Sector Aggregates and Summary sheets
+            for sheet_name in ['Aggregates', 'Summary']:
+                worksheet = workbook.add_worksheet(sheet_name)
+                self._write_sheet(worksheet, tables[sheet_name], header_format)
+        finally:
+            workbook.close()
+            
+        logging.info(f"Results exported to {filename}")
+
+    def export_tables(self, basename='output', fmt='parquet', sector_agg=None, summary=None):
+        """Export results as one CSV or Parquet file per table instead of a workbook.
+
+        Files are named ``<basename>_stock_level.<fmt>``, ``<basename>_aggregates.<fmt>``
+        and ``<basename>_summary.<fmt>``.
+        """
+        if fmt not in ('csv', 'parquet'):
+            raise ValueError("fmt must be 'csv' or 'parquet'")
+            
+        paths = []
+        for sheet_name, df in self._export_tables(sector_agg, summary).items():
+            path = f"{basename}_{sheet_name.lower().replace(' ', '_')}.{fmt}"
+            if fmt == 'csv':
+                df.to_csv(path, index=False)
+            else:
+                df.to_parquet(path, index=False)
+            paths.append(path)
+            
+        logging.info(f"Results exported to {', '.join(paths)}")
+        return paths
+
+    def use_data(self, universe, prices, price_matrix=None):
+        """Use universe and price data that were already loaded elsewhere.
+
+        ``run_all`` then skips ``_load_files``. The universe is copied because the
+        pipeline adds columns to it; prices are shared as-is.
+        """
+        self.universe = universe.copy()
+        self.prices = prices
+        self.price_matrix = price_matrix
+
+    def run_all(self, output_path='output.xlsx', output_format='xlsx'):
+        """Run the complete analysis pipeline.
+
+        ``output_format`` is 'xlsx', 'csv' or 'parquet'; for the latter two
+        ``output_path`` is used as the file name prefix. Pass ``output_path=None``
+        to skip the export.
+        """
+        profiler = self.profiler
+        profiler.start()
+        if self.stage_cache is not None:
+            self.stage_cache.start_run()
+        status = 'error'
         try:
             logging.info("Starting portfolio analysis...")
             
             # Load and validate data
-            self._load_files()
-            self._validate_universe()
+            if self.universe is None or (self.prices is None and self.price_matrix is None):
+                with profiler.stage('load_files') as stage:
+                    self._load_files()
+                    stage['rows'] = len(self.prices)
+            with profiler.stage('validate_universe') as stage:
+                self._validate_universe()
+                stage['rows'] = len(self.universe)
             
             # Compute metrics
-            self.compute_weights()
-            self.compute_returns()
-            self.compute_beta()
-            self.compute_weighted_metrics()
+            with profiler.stage('compute_weights') as stage:
+                self.compute_weights()
+                stage['rows'] = len(self.universe)
+            with profiler.stage('compute_returns') as stage:
+                self.compute_returns()
+                stage['rows'] = int(self.universe['abs_return'].notna().sum())
+            if self.benchmark is None:
+                with profiler.stage('fetch_benchmark') as stage:
+                    self._fetch_benchmark()
+                    stage['rows'] = len(self.benchmark)
+            with profiler.stage('compute_beta') as stage:
+                self.compute_beta()
+                stage['rows'] = int(self.universe['beta'].notna().sum())
+            with profiler.stage('compute_weighted_metrics') as stage:
+                self.compute_weighted_metrics()
+                stage['rows'] = len(self.universe)
             
             # Generate results
-            sector_agg = self.sector_aggregation()
-            summary = self.portfolio_aggregation()
-            
-            # Export to Excel
-            self.export_excel('output.xlsx')
-            
+            with profiler.stage('aggregate') as stage:
+                sector_agg = self.sector_aggregation()
+                summary = self.portfolio_aggregation()
+                stage['rows'] = len(sector_agg)
+            
+            # Export, reusing the aggregates computed above
+            if output_path:
+                with profiler.stage('export') as stage:
+                    if output_format == 'xlsx':
+                        self.export_excel(output_path, sector_agg=sector_agg, summary=summary)
+                    else:
+                        basename = os.path.splitext(output_path)[0]
+                        self.export_tables(basename, fmt=output_format, sector_agg=sector_agg, summary=summary)
+                    stage['rows'] = len(self.universe)
+            
+            if self.stage_cache is not None:
+                cache_report = self.stage_cache.report()
+                logging.info(
+                    f"Stage cache - reused: {', '.join(cache_report['reused']) or 'none'}; "
+                    f"recomputed: {', '.join(cache_report['recomputed']) or 'none'}"
+                )
             logging.info("Analysis completed successfully!")
+            status = 'ok'
             
             return {
                 'stock_level': self.universe,
@@ -450,6 +666,18 @@ class PortfolioManager:
         except Exception as e:
             logging.error(f"Error in analysis: {str(e)}", exc_info=True)
             raise
+        finally:
+            profiler.stop()
+            if self.report_path:
+                profiler.write_report(
+                    self.report_path,
+                    status=status,
+                    start_date=str(self.start_date.date()),
+                    end_date=str(self.end_date.date()),
+                    benchmark_ticker=self.benchmark_ticker,
+                    use_price_matrix=self.use_price_matrix,
+                    stage_cache=self.stage_cache.report() if self.stage_cache is not None else None
+                )
 
 if __name__ == "__main__":
     manager = PortfolioManager(
@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import os
+
+import pandas as pd
+
+# Compact column types used for the in-memory price history
+PRICE_COLUMNS = ['accord_code', 'date', 'price']
+CODE_DTYPE = 'int32'
+PRICE_DTYPE = 'float32'
+
+
+def file_fingerprint(path, block_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def price_cache_path(prices_path, cache_dir, fingerprint):
+    """Build the Parquet cache file name for a given source file hash."""
+    stem = os.path.splitext(os.path.basename(prices_path))[0]
+    return os.path.join(cache_dir, f"{stem}-{fingerprint[:16]}.parquet")
+
+
+def _convert_chunk(chunk):
+    """Coerce a raw CSV chunk to the compact price schema."""
+    codes = pd.to_numeric(chunk['accord_code'], errors='coerce')
+    if codes.isna().any():
+        bad = chunk.loc[codes.isna(), 'accord_code'].unique()[:5]
+        raise ValueError(f"Non-integer accord codes in price history: {list(bad)}")
+
+    return pd.DataFrame({
+        'accord_code': codes.astype(CODE_DTYPE),
+        'date': pd.to_datetime(chunk['date']),
+        'price': pd.to_numeric(chunk['price'], errors='coerce').astype(PRICE_DTYPE)
+    })
+
+
+def read_price_csv(prices_path, chunksize=None):
+    """Parse price_history.csv into compact dtypes, optionally in chunks.
+
+    With ``chunksize`` set, the raw text columns of only one chunk are held
+    in memory at a time, so files larger than RAM in their object form can
+    still be loaded.
+    """
+    read_kwargs = {
+        'usecols': PRICE_COLUMNS,
+        'dtype': {'accord_code': str, 'date': str, 'price': str}
+    }
+    if chunksize:
+        chunks = [
+            _convert_chunk(chunk)
+            for chunk in pd.read_csv(prices_path, chunksize=chunksize, **read_kwargs)
+        ]
+        if not chunks:
+            raise ValueError(f"No price records found in {prices_path}")
+        prices = pd.concat(chunks, ignore_index=True)
+    else:
+        prices = _convert_chunk(pd.read_csv(prices_path, **read_kwargs))
+
+    prices = prices.sort_values(['accord_code', 'date'], kind='stable')
+    return prices.reset_index(drop=True)
+
+
+def load_price_history(prices_path, cache_dir='cache', chunksize=None, use_cache=True,
+                       fingerprint=None):
+    """Load the price history, reusing a Parquet cache keyed by file hash.
+
+    The cache file name embeds the hash of the source CSV, so editing the CSV
+    automatically invalidates it. When Parquet support (pyarrow) is missing the
+    CSV is parsed on every call and a warning is logged. Pass ``fingerprint``
+    when the caller has already hashed the file.
+    """
+    if not use_cache:
+        return read_price_csv(prices_path, chunksize=chunksize)
+
+    fingerprint = fingerprint or file_fingerprint(prices_path)
+    cache_file = price_cache_path(prices_path, cache_dir, fingerprint)
+
+    if os.path.exists(cache_file):
+        try:
+            prices = pd.read_parquet(cache_file)
+            logging.info(f"Loaded {len(prices)} price records from cache {cache_file}")
+            return prices
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable price cache {cache_file}: {str(e)}")
+
+    prices = read_price_csv(prices_path, chunksize=chunksize)
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = f"{cache_file}.tmp"
+        prices.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, cache_file)
+        logging.info(f"Wrote price cache {cache_file}")
+    except ImportError as e:
+        logging.warning(f"Parquet support unavailable, price cache disabled: {str(e)}")
+    except OSError as e:
+        logging.warning(f"Could not write price cache {cache_file}: {str(e)}")
+
+    return prices
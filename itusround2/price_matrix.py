@@ -0,0 +1,188 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+# File names inside a price matrix directory
+PRICES_FILE = 'prices.npy'
+CODES_FILE = 'codes.npy'
+DATES_FILE = 'dates.npy'
+# Trading days examined per step when scanning back for as-of prices
+ASOF_BLOCK_ROWS = 32
+# Stocks upcast to float64 at a time by daily_returns and betas
+RETURNS_BLOCK_COLS = 512
+
+
+class PriceMatrix:
+    """Dense trading-days x accord_codes float32 price matrix.
+
+    Missing observations are stored as NaN. A saved matrix is reopened as a
+    read-only memory map, so slices are views onto the file and several
+    processes reading the same matrix share the same OS pages.
+    """
+
+    def __init__(self, values, codes, dates):
+        self.values = values
+        self.codes = np.asarray(codes)
+        self.dates = np.asarray(dates, dtype='datetime64[ns]')
+
+    @classmethod
+    def from_long(cls, prices):
+        """Pivot a long (accord_code, date, price) frame into a dense matrix."""
+        codes = np.unique(prices['accord_code'].to_numpy())
+        dates = np.unique(prices['date'].to_numpy().astype('datetime64[ns]'))
+
+        values = np.full((len(dates), len(codes)), np.nan, dtype=np.float32)
+        row = np.searchsorted(dates, prices['date'].to_numpy().astype('datetime64[ns]'))
+        col = np.searchsorted(codes, prices['accord_code'].to_numpy())
+        values[row, col] = prices['price'].to_numpy(dtype=np.float32)
+
+        return cls(values, codes, dates)
+
+    def save(self, directory):
+        """Write the matrix and its code/date index sidecars to a directory."""
+        tmp_dir = f"{directory}.tmp"
+        os.makedirs(tmp_dir, exist_ok=True)
+
+        out = np.lib.format.open_memmap(
+            os.path.join(tmp_dir, PRICES_FILE), mode='w+',
+            dtype=np.float32, shape=self.values.shape
+        )
+        out[:] = self.values
+        out.flush()
+        del out
+
+        np.save(os.path.join(tmp_dir, CODES_FILE), self.codes)
+        np.save(os.path.join(tmp_dir, DATES_FILE), self.dates.astype('int64'))
+        os.replace(tmp_dir, directory)
+
+    @classmethod
+    def open(cls, directory):
+        """Open a saved matrix as a read-only memory map."""
+        values = np.load(os.path.join(directory, PRICES_FILE), mmap_mode='r')
+        codes = np.load(os.path.join(directory, CODES_FILE))
+        dates = np.load(os.path.join(directory, DATES_FILE)).astype('datetime64[ns]')
+        return cls(values, codes, dates)
+
+    @classmethod
+    def build_or_open(cls, prices, directory):
+        """Open the matrix at ``directory``, building it from ``prices`` if absent."""
+        if os.path.exists(os.path.join(directory, PRICES_FILE)):
+            logging.info(f"Opening price matrix {directory}")
+            return cls.open(directory)
+
+        matrix = cls.from_long(prices)
+        try:
+            matrix.save(directory)
+            logging.info(
+                f"Saved {matrix.values.shape[0]}x{matrix.values.shape[1]} price matrix to {directory}"
+            )
+            return cls.open(directory)
+        except OSError as e:
+            logging.warning(f"Could not persist price matrix {directory}: {str(e)}")
+            return matrix
+
+    def _row_on_or_before(self, target_date):
+        """Index of the last trading day on or before the target date, or -1."""
+        return int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(target_date), 'ns'), side='right')) - 1
+
+    def asof(self, target_date):
+        """Last available price on or before the target date for each stock.
+
+        Returns the same frame shape as ``PortfolioManager._get_last_price_on_or_before``.
+        """
+        row = self._row_on_or_before(target_date)
+        if row < 0:
+            raise ValueError(f"No price data found on or before {target_date}")
+
+        # Scan back from the target row a block at a time, reading only the
+        # columns still without a price; most stocks are found in the first block
+        n_codes = self.values.shape[1]
+        positions = np.full(n_codes, -1, dtype=np.int64)
+        pending = np.arange(n_codes)
+        end = row + 1
+        while pending.size and end > 0:
+            start = max(0, end - ASOF_BLOCK_ROWS)
+            block = self.values[start:end]
+            if pending.size < n_codes:
+                block = block[:, pending]
+            observed = ~np.isnan(block[::-1])
+            has = observed.any(axis=0)
+            positions[pending[has]] = end - 1 - observed.argmax(axis=0)[has]
+            pending = pending[~has]
+            end = start
+
+        cols = np.flatnonzero(positions >= 0)
+        return pd.DataFrame({
+            'accord_code': self.codes[cols],
+            'matched_date': self.dates[positions[cols]],
+            'matched_price': self.values[positions[cols], cols]
+        })
+
+    def daily_returns(self):
+        """Return between consecutive observed prices of each stock (NaN elsewhere)."""
+        n_dates, n_codes = self.values.shape
+        returns = np.empty((n_dates, n_codes), dtype=np.float64)
+        for start in range(0, n_codes, RETURNS_BLOCK_COLS):
+            stop = min(start + RETURNS_BLOCK_COLS, n_codes)
+            returns[:, start:stop] = self._block_returns(start, stop)
+        return returns
+
+    def _block_returns(self, start, stop):
+        """daily_returns of columns start:stop; only this block is copied to float64."""
+        values = self.values[:, start:stop].astype(np.float64)
+        observed = ~np.isnan(values)
+
+        # Forward-fill the previous observed price along the date axis
+        last_seen = np.where(observed, np.arange(len(values))[:, None], -1)
+        np.maximum.accumulate(last_seen, axis=0, out=last_seen)
+        prev_idx = np.vstack([np.full((1, values.shape[1]), -1), last_seen[:-1]])
+        prev = np.take_along_axis(values, np.maximum(prev_idx, 0), axis=0)
+        prev[prev_idx < 0] = np.nan
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            returns = values / prev - 1
+        returns[~observed] = np.nan
+        return returns
+
+    def betas(self, bench_rets, min_obs=5):
+        """Vectorised beta of every stock against benchmark daily returns.
+
+        ``bench_rets`` is a Series of benchmark returns indexed by date. Each
+        stock uses only the dates where both it and the benchmark have a
+        return, matching the per-stock ``np.cov`` in ``compute_beta``. Stocks
+        are processed RETURNS_BLOCK_COLS at a time, so the full returns matrix
+        is never built.
+        """
+        bench = bench_rets.copy()
+        bench.index = pd.DatetimeIndex(bench.index).astype('datetime64[ns]')
+        bench = bench.groupby(level=0).last()
+        b = bench.reindex(pd.DatetimeIndex(self.dates)).to_numpy(dtype=np.float64)
+
+        rows = np.flatnonzero(~np.isnan(b))
+        b = b[rows][:, None]
+
+        n_codes = self.values.shape[1]
+        n = np.empty(n_codes, dtype=np.int64)
+        var = np.empty(n_codes, dtype=np.float64)
+        beta = np.empty(n_codes, dtype=np.float64)
+        for start in range(0, n_codes, RETURNS_BLOCK_COLS):
+            stop = min(start + RETURNS_BLOCK_COLS, n_codes)
+            r = self._block_returns(start, stop)[rows]
+            mask = ~np.isnan(r)
+            block_n = mask.sum(axis=0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean_r = np.where(mask, r, 0).sum(axis=0) / block_n
+                mean_b = np.where(mask, b, 0).sum(axis=0) / block_n
+                dev_b = np.where(mask, b - mean_b, 0)
+                cov = (np.where(mask, r - mean_r, 0) * dev_b).sum(axis=0) / (block_n - 1)
+                var[start:stop] = (dev_b ** 2).sum(axis=0) / (block_n - 1)
+                beta[start:stop] = cov / var[start:stop]
+            n[start:stop] = block_n
+
+        valid = (n >= min_obs) & (var != 0) & np.isfinite(beta)
+        return pd.DataFrame({
+            'accord_code': self.codes[valid],
+            'beta': beta[valid]
+        })
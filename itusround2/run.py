@@ -5,7 +5,8 @@ def main():
         universe_path='universe.csv',
         prices_path='price_history.csv',
         start_date='2023-11-01',
-        end_date='2024-11-01'
+        end_date='2024-11-01',
+        report_path='logs/run_report.json'
     )
     results = manager.run_all()
     print("Analysis completed! Check output.xlsx for results.")
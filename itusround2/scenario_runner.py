@@ -0,0 +1,219 @@
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+import xlsxwriter
+import yfinance as yf
+
+from portfolio_manager import PortfolioManager
+from price_matrix import PriceMatrix
+
+# Data shared by every scenario in a worker process, set once by _init_worker
+_worker_data = {}
+
+
+def scenario_grid(date_ranges, universes=None, benchmark_tickers=("^NSEI",)):
+    """Build scenarios from every combination of date range, universe and benchmark.
+
+    ``universes`` maps a name to a list of accord codes; ``None`` means the
+    full universe.
+    """
+    universes = universes or {'all': None}
+    scenarios = []
+    for (start, end), (universe_name, codes), ticker in itertools.product(
+        date_ranges, universes.items(), benchmark_tickers
+    ):
+        scenarios.append({
+            'name': f"{universe_name}_{start}_{end}_{ticker}",
+            'start_date': start,
+            'end_date': end,
+            'benchmark_ticker': ticker,
+            'accord_codes': codes
+        })
+    return scenarios
+
+
+def _download_benchmarks(scenarios):
+    """Download each benchmark once, covering the widest window any scenario needs."""
+    benchmarks = {}
+    by_ticker = {}
+    for scenario in scenarios:
+        by_ticker.setdefault(scenario.get('benchmark_ticker', '^NSEI'), []).append(scenario)
+
+    for ticker, group in by_ticker.items():
+        start = min(pd.Timestamp(s['start_date']) for s in group) - pd.Timedelta(days=30)
+        end = max(pd.Timestamp(s['end_date']) for s in group) + pd.Timedelta(days=30)
+        logging.info(f"Downloading benchmark data for {ticker} from {start.date()} to {end.date()}")
+
+        bench = yf.download(
+            ticker,
+            start=start.strftime('%Y-%m-%d'),
+            end=end.strftime('%Y-%m-%d'),
+            progress=False
+        )
+        if bench.empty:
+            raise ValueError(f"No benchmark data found for {ticker}")
+        benchmarks[ticker] = bench[['Close']]
+
+    return benchmarks
+
+
+def _init_worker(universe, prices, matrix_dir, benchmarks):
+    """Store the shared inputs in the worker process.
+
+    The price matrix is reopened as a read-only memory map, so all workers
+    read the same pages instead of holding their own copy of the prices.
+    """
+    _worker_data['universe'] = universe
+    _worker_data['prices'] = prices
+    _worker_data['price_matrix'] = PriceMatrix.open(matrix_dir) if matrix_dir else None
+    _worker_data['benchmarks'] = benchmarks
+
+
+def _run_scenario(scenario):
+    """Run the analysis pipeline for one scenario using the worker's shared data."""
+    ticker = scenario.get('benchmark_ticker', '^NSEI')
+    universe = _worker_data['universe']
+    if scenario.get('accord_codes') is not None:
+        universe = universe[universe['accord_code'].isin(scenario['accord_codes'])]
+
+    manager = PortfolioManager(
+        universe_path=None,
+        prices_path=None,
+        start_date=scenario['start_date'],
+        end_date=scenario['end_date'],
+        benchmark_ticker=ticker
+    )
+    manager.use_data(universe, _worker_data['prices'], _worker_data['price_matrix'])
+    manager.set_benchmark(_worker_data['benchmarks'][ticker])
+
+    results = manager.run_all(output_path=None)
+    results['scenario'] = scenario
+    results['portfolio_metrics'] = manager.portfolio_metrics
+    return results
+
+
+def run_scenarios(universe_path, prices_path, scenarios, processes=None,
+                  output_path='scenarios.xlsx', cache_dir='cache'):
+    """Load inputs once and run every scenario across a process pool.
+
+    Returns a list of per-scenario results (in the order given) and, unless
+    ``output_path`` is None, writes one combined Excel report.
+    """
+    loader = PortfolioManager(
+        universe_path, prices_path,
+        start_date=min(s['start_date'] for s in scenarios),
+        end_date=max(s['end_date'] for s in scenarios),
+        cache_dir=cache_dir,
+        use_price_matrix=True
+    )
+    loader._load_files()
+    loader._validate_universe()
+    benchmarks = _download_benchmarks(scenarios)
+
+    # Workers read prices through the memory-mapped matrix instead of a pickled copy
+    matrix_dir = os.path.join(cache_dir, f"price_matrix-{loader.prices_fingerprint[:16]}")
+    if not os.path.exists(matrix_dir):
+        matrix_dir = None
+    shared_prices = None if matrix_dir else loader.prices
+
+    logging.info(f"Running {len(scenarios)} scenarios on {processes or os.cpu_count()} processes")
+    results = [None] * len(scenarios)
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        initializer=_init_worker,
+        initargs=(loader.universe, shared_prices, matrix_dir, benchmarks)
+    ) as executor:
+        futures = {
+            executor.submit(_run_scenario, scenario): i
+            for i, scenario in enumerate(scenarios)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except Exception as e:
+                logging.error(f"Scenario {scenarios[i]['name']} failed: {str(e)}")
+                results[i] = {'scenario': scenarios[i], 'error': str(e)}
+
+    if output_path:
+        export_scenario_report(results, output_path)
+
+    return results
+
+
+def export_scenario_report(results, filename='scenarios.xlsx'):
+    """Write all scenario results into one workbook.
+
+    Each scenario's tables are streamed straight into the sheets with
+    xlsxwriter's ``constant_memory`` mode (see ``PortfolioManager.export_excel``)
+    rather than concatenated first, so memory does not grow with the number
+    of scenarios.
+    """
+    summary_rows = []
+    for result in results:
+        scenario = result['scenario']
+        metrics = result.get('portfolio_metrics', {})
+        summary_rows.append({
+            'scenario': scenario['name'],
+            'start_date': scenario['start_date'],
+            'end_date': scenario['end_date'],
+            'benchmark_ticker': scenario.get('benchmark_ticker', '^NSEI'),
+            'n_stocks': len(result['stock_level']) if 'stock_level' in result else 0,
+            'portfolio_return': metrics.get('Portfolio Return'),
+            'portfolio_beta': metrics.get('Portfolio Beta'),
+            'error': result.get('error')
+        })
+    completed = [result for result in results if 'error' not in result]
+
+    stock_cols = [
+        'scenario', 'accord_code', 'company_name', 'sector', 'weight',
+        'price_start', 'date_start_matched', 'price_end', 'date_end_matched',
+        'abs_return', 'beta', 'weighted_return', 'weighted_beta'
+    ]
+    sector_cols = ['scenario', 'sector', 'sector_weight', 'sector_weighted_return', 'sector_beta']
+
+    workbook = xlsxwriter.Workbook(filename, {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd'
+    })
+    try:
+        header_format = workbook.add_format({'bold': True, 'border': 1})
+        PortfolioManager._write_sheet(
+            workbook.add_worksheet('Scenarios'), pd.DataFrame(summary_rows), header_format
+        )
+        if completed:
+            sheets = [
+                (workbook.add_worksheet('Stock Level'), 'stock_level', stock_cols),
+                (workbook.add_worksheet('Aggregates'), 'sector_aggregates', sector_cols)
+            ]
+            for worksheet, _, cols in sheets:
+                worksheet.write_row(0, 0, cols, header_format)
+            next_rows = [1] * len(sheets)
+            # Sheets are written in turn, but each one's rows stay in order
+            for result in completed:
+                name = result['scenario']['name']
+                for i, (worksheet, table, cols) in enumerate(sheets):
+                    next_rows[i] = PortfolioManager._write_sheet(
+                        worksheet, result[table].assign(scenario=name)[cols],
+                        start_row=next_rows[i], header=False
+                    )
+    finally:
+        workbook.close()
+
+    logging.info(f"Scenario report for {len(results)} scenarios exported to {filename}")
+
+
+if __name__ == "__main__":
+    date_ranges = [
+        ('2023-11-01', '2024-11-01'),
+        ('2024-02-01', '2024-11-01'),
+        ('2024-05-01', '2024-11-01')
+    ]
+    run_scenarios(
+        universe_path='universe.csv',
+        prices_path='price_history.csv',
+        scenarios=scenario_grid(date_ranges)
+    )
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import logging
+import os
+import time
+
+import pandas as pd
+
+# Bump a stage's version when its computation changes; older artifacts are
+# then never looked up again and can be pruned
+STAGE_VERSIONS = {
+    'asof_prices': 1,
+    'daily_returns': 1,
+    'betas': 1
+}
+
+
+def frame_fingerprint(df):
+    """SHA-256 of a frame's values and index, for keying stages on in-memory inputs."""
+    hashed = pd.util.hash_pandas_object(df, index=True)
+    digest = hashlib.sha256(hashed.to_numpy().tobytes())
+    digest.update(','.join(map(str, df.columns)).encode())
+    return digest.hexdigest()
+
+
+class StageCache:
+    """Content-addressed Parquet store for intermediate pipeline results.
+
+    An artifact's key is a hash of the stage name, its version in
+    ``STAGE_VERSIONS`` and its inputs: content hashes of the files or frames
+    it reads plus the parameters it uses. Nothing is invalidated explicitly;
+    changing an input (editing price_history.csv, moving end_date) yields a
+    new key, so a stage is recomputed exactly when something it depends on
+    changed. Artifacts are written to a temporary file and renamed, so
+    concurrent runs can share the directory. ``prune`` removes artifacts
+    that have not been used for a while.
+
+    Every lookup is recorded, and ``report`` lists which stages were reused
+    and which were recomputed in the current run.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.events = []
+
+    def start_run(self):
+        """Forget the lookups recorded by a previous run."""
+        self.events = []
+
+    def key(self, stage, inputs):
+        payload = json.dumps(
+            {'stage': stage, 'version': STAGE_VERSIONS.get(stage, 0), 'inputs': inputs},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def path(self, stage, key):
+        return os.path.join(self.directory, stage, f"{key}.parquet")
+
+    def record(self, stage, key, status, wall_s=None):
+        """Log the outcome of a lookup: 'reused' or 'recomputed'."""
+        self.events.append({'stage': stage, 'key': key, 'status': status, 'wall_s': wall_s})
+        logging.info(f"Stage cache {status}: {stage} ({key[:12]})")
+
+    def get_or_compute(self, stage, inputs, compute):
+        """Return the stored artifact for these inputs, or compute, store and return it."""
+        key = self.key(stage, inputs)
+        path = self.path(stage, key)
+        start = time.perf_counter()
+
+        if os.path.exists(path):
+            try:
+                df = pd.read_parquet(path)
+                os.utime(path)  # last use, for prune
+                self.record(stage, key, 'reused', round(time.perf_counter() - start, 6))
+                return df
+            except Exception as e:
+                logging.warning(f"Ignoring unreadable stage artifact {path}: {str(e)}")
+
+        df = compute()
+        self.record(stage, key, 'recomputed', round(time.perf_counter() - start, 6))
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        except ImportError as e:
+            logging.warning(f"Parquet support unavailable, stage cache disabled: {str(e)}")
+        except OSError as e:
+            logging.warning(f"Could not write stage artifact {path}: {str(e)}")
+        return df
+
+    def report(self):
+        """Which stages were reused and which recomputed in this run."""
+        return {
+            'reused': [e['stage'] for e in self.events if e['status'] == 'reused'],
+            'recomputed': [e['stage'] for e in self.events if e['status'] == 'recomputed'],
+            'lookups': self.events
+        }
+
+    def prune(self, max_age_days=30):
+        """Delete artifacts not used for ``max_age_days``; returns the number removed."""
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+        logging.info(f"Pruned {removed} stage artifacts from {self.directory}")
+        return removed
@@ -0,0 +1,98 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+SECTORS = [
+    'Banks', 'IT Services', 'Pharmaceuticals', 'Automobiles', 'FMCG',
+    'Capital Goods', 'Chemicals', 'Metals', 'Power', 'Realty'
+]
+
+
+def generate_market(n_stocks=500, start_date='2022-01-01', end_date='2024-12-31',
+                    missing_rate=0.02, seed=42):
+    """Generate a universe, long price history and benchmark with realistic structure.
+
+    Daily log returns follow a one-factor model: each stock loads on the
+    benchmark with its own beta, adds a sector shock shared with its peers,
+    and an idiosyncratic term. Some stocks list after the start date and a
+    fraction of days are missing per stock, as in exchange data.
+
+    Returns (universe, prices, benchmark, true_betas) where ``universe`` and
+    ``prices`` use the CSV column names read by ``PortfolioManager`` and
+    ``benchmark`` is a yfinance-style frame with a 'Close' column.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start_date, end_date, name='Date')
+    n_days = len(dates)
+
+    # Benchmark
+    bench_ret = rng.normal(0.0004, 0.011, n_days)
+    benchmark = pd.DataFrame({'Close': 18000 * np.exp(np.cumsum(bench_ret))}, index=dates)
+
+    # Stocks: beta exposure + sector shock + idiosyncratic noise
+    codes = np.arange(100001, 100001 + n_stocks)
+    sector_idx = rng.integers(0, len(SECTORS), n_stocks)
+    betas = rng.uniform(0.4, 1.6, n_stocks)
+    idio_vol = rng.uniform(0.008, 0.03, n_stocks)
+    sector_shocks = rng.normal(0, 0.006, (n_days, len(SECTORS)))
+
+    log_ret = (
+        bench_ret[:, None] * betas[None, :]
+        + sector_shocks[:, sector_idx]
+        + rng.normal(0, 1, (n_days, n_stocks)) * idio_vol[None, :]
+    )
+    prices = rng.uniform(20, 3000, n_stocks)[None, :] * np.exp(np.cumsum(log_ret, axis=0))
+
+    # Late listings and missing days
+    listed_from = np.where(rng.random(n_stocks) < 0.1, rng.integers(0, n_days // 2, n_stocks), 0)
+    observed = rng.random((n_days, n_stocks)) >= missing_rate
+    observed &= np.arange(n_days)[:, None] >= listed_from[None, :]
+
+    day_idx, stock_idx = np.nonzero(observed)
+    price_history = pd.DataFrame({
+        'accord_code': codes[stock_idx],
+        'date': dates[day_idx].strftime('%Y-%m-%d'),
+        'price': np.round(prices[day_idx, stock_idx], 2)
+    })
+
+    universe = pd.DataFrame({
+        'Accord Code': codes,
+        'Company Name': [f"Company {code}" for code in codes],
+        'Sector': np.array(SECTORS)[sector_idx]
+    })
+    true_betas = pd.DataFrame({'accord_code': codes, 'true_beta': betas})
+
+    return universe, price_history, benchmark, true_betas
+
+
+def write_market(directory, **kwargs):
+    """Generate a market and write universe.csv, price_history.csv and benchmark.csv."""
+    universe, prices, benchmark, _ = generate_market(**kwargs)
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        'universe': os.path.join(directory, 'universe.csv'),
+        'prices': os.path.join(directory, 'price_history.csv'),
+        'benchmark': os.path.join(directory, 'benchmark.csv')
+    }
+    universe.to_csv(paths['universe'], index=False)
+    prices.to_csv(paths['prices'], index=False)
+    benchmark.to_csv(paths['benchmark'])
+    return paths, benchmark
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic universe and price history CSVs.")
+    parser.add_argument('directory', nargs='?', default='.')
+    parser.add_argument('--stocks', type=int, default=500)
+    parser.add_argument('--start-date', default='2022-01-01')
+    parser.add_argument('--end-date', default='2024-12-31')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    paths, _ = write_market(
+        args.directory, n_stocks=args.stocks, start_date=args.start_date,
+        end_date=args.end_date, seed=args.seed
+    )
+    print(f"Wrote {', '.join(paths.values())}")
@@ -0,0 +1,80 @@
+# metrics_store.py
+"""Long-format storage for any number of numeric metrics per (accord_code, date).
+
+Values live in one WITHOUT ROWID table keyed by (metric_id, accord_code,
+date_key), so the primary key is the covering index and adding a metric is
+a registry row, not a schema change. Like derived_data, every function
+takes an open sqlite3 connection.
+"""
+import re
+
+# Lowercase identifiers, so metric names are safe in URLs and JSON keys
+METRIC_NAME_PATTERN = re.compile(r'^[a-z][a-z0-9_]{0,63}$')
+
+
+def init_metrics_schema(conn):
+    """Create the registry and value tables if they don't exist."""
+    cursor = conn.cursor()
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS metrics (
+        metric_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        description TEXT,
+        unit TEXT,
+        revision INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS metric_values (
+        metric_id INTEGER NOT NULL,
+        accord_code INTEGER NOT NULL,
+        date_key INTEGER NOT NULL,
+        value REAL,
+        PRIMARY KEY (metric_id, accord_code, date_key)
+    ) WITHOUT ROWID
+    ''')
+    conn.commit()
+
+
+def get_metric_registry(conn):
+    """{name: {'metric_id', 'description', 'unit', 'revision'}} for every registered metric."""
+    rows = conn.execute(
+        'SELECT name, metric_id, description, unit, revision FROM metrics ORDER BY name'
+    ).fetchall()
+    return {
+        row[0]: {'metric_id': row[1], 'description': row[2], 'unit': row[3], 'revision': row[4]}
+        for row in rows
+    }
+
+
+def register_metric(conn, name, description=None, unit=None, reserved=()):
+    """Add a metric (or update its description/unit) and return its metric_id."""
+    if not METRIC_NAME_PATTERN.match(name) or name in reserved:
+        raise ValueError(f"Invalid metric name: {name}")
+    conn.execute('INSERT OR IGNORE INTO metrics (name) VALUES (?)', (name,))
+    if description is not None or unit is not None:
+        conn.execute('''
+            UPDATE metrics SET description = COALESCE(?, description), unit = COALESCE(?, unit)
+            WHERE name = ?
+        ''', (description, unit, name))
+    return conn.execute('SELECT metric_id FROM metrics WHERE name = ?', (name,)).fetchone()[0]
+
+
+def write_metric_values(conn, rows):
+    """Upsert (metric_id, accord_code, date_key, value) rows and bump each metric's revision."""
+    rows = list(rows)
+    conn.executemany('''
+        INSERT OR REPLACE INTO metric_values (metric_id, accord_code, date_key, value)
+        VALUES (?, ?, ?, ?)
+    ''', rows)
+    metric_ids = sorted(set(row[0] for row in rows))
+    conn.executemany(
+        'UPDATE metrics SET revision = revision + 1 WHERE metric_id = ?', [(i,) for i in metric_ids]
+    )
+    return len(rows)
+
+
+def get_metrics_version(conn):
+    """Changes whenever a metric is registered or any values are written."""
+    row = conn.execute('SELECT COUNT(*), COALESCE(SUM(revision), 0) FROM metrics').fetchone()
+    return f"{row[0]}:{row[1]}"
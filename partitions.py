@@ -0,0 +1,195 @@
+# partitions.py
+"""Read-only, date-partitioned copies of ttm_pat_yoy_growth.
+
+Each partition file holds the rows of ``years_per_partition`` calendar
+years with the same schema and indexes as the main table. Partitions are
+written to a temporary file and moved into place atomically, never changed
+in place, so readers can open them with ``immutable=1`` and skip locking;
+a reader that opened the previous version keeps reading it until it closes.
+
+The source-table version and change revision (see derived_data) each
+partition was built from are recorded in the main database
+(``partition_meta``), so partitions built before a later change can be
+skipped by readers and rebuilt.
+"""
+import argparse
+import logging
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+SOURCE_TABLE = 'ttm_pat_yoy_growth'
+PARTITION_PATTERN = re.compile(rf'^{SOURCE_TABLE}_(\d{{4}})\.db$')
+
+# Indexes recreated in every partition, matching db_helper.init_db
+PARTITION_INDEXES = {
+    'idx_accord_code_date': '(accord_code, date)',
+    'idx_accord_code_date_key': '(accord_code, date_key)',
+    'idx_date_accord_code': '(date, accord_code)',
+    'idx_date_sector_mcap_code': '(date, sector, mcap_category, accord_code)'
+}
+
+
+def partition_start_year(year, years_per_partition):
+    """First year of the partition that contains ``year``."""
+    return year - year % years_per_partition
+
+
+def partition_path(directory, start_year):
+    return os.path.join(directory, f"{SOURCE_TABLE}_{start_year}.db")
+
+
+def partition_uri(path):
+    """Read-only, lock-free URI for a partition file."""
+    return f"file:{quote(os.path.abspath(path))}?mode=ro&immutable=1"
+
+
+def partitions_for_range(directory, start_key, end_key, years_per_partition, max_partitions=None):
+    """Paths of the partitions covering date keys start_key..end_key, oldest first.
+
+    Returns None if any of them has not been built or the range spans more
+    than ``max_partitions``, so callers can fall back to the main database.
+    """
+    first = partition_start_year(start_key // 10000, years_per_partition)
+    last = partition_start_year(end_key // 10000, years_per_partition)
+    if max_partitions is not None and (last - first) // years_per_partition + 1 > max_partitions:
+        return None
+    paths = [partition_path(directory, year) for year in range(first, last + 1, years_per_partition)]
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    return paths
+
+
+def list_partitions(directory):
+    """{start_year: path} for every partition file in the directory."""
+    if not os.path.isdir(directory):
+        return {}
+    found = {}
+    for name in os.listdir(directory):
+        match = PARTITION_PATTERN.match(name)
+        if match:
+            found[int(match.group(1))] = os.path.join(directory, name)
+    return dict(sorted(found.items()))
+
+
+def init_partition_meta(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS partition_meta (
+        path TEXT PRIMARY KEY,
+        source_version TEXT,
+        source_revision INTEGER,
+        built_at TEXT
+    )
+    ''')
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(partition_meta)')]
+    if 'source_revision' not in columns:
+        conn.execute('ALTER TABLE partition_meta ADD COLUMN source_revision INTEGER')
+    conn.commit()
+
+
+def get_partition_versions(conn):
+    """{path: (source version, source revision)} each recorded partition was built from."""
+    init_partition_meta(conn)
+    return {
+        path: (version, revision)
+        for path, version, revision in conn.execute(
+            'SELECT path, source_version, source_revision FROM partition_meta'
+        )
+    }
+
+
+def record_partition_versions(conn, paths, version, revision):
+    """Mark partitions as holding the source table at ``version`` and ``revision``."""
+    init_partition_meta(conn)
+    built_at = datetime.now().isoformat(timespec='seconds')
+    conn.executemany(
+        'INSERT OR REPLACE INTO partition_meta (path, source_version, source_revision, built_at) '
+        'VALUES (?, ?, ?, ?)',
+        [(path, version, revision, built_at) for path in paths]
+    )
+    conn.commit()
+
+
+def remove_partitions(conn, paths):
+    """Delete partition files (e.g. for years that no longer have data) and their records."""
+    init_partition_meta(conn)
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    conn.executemany('DELETE FROM partition_meta WHERE path = ?', [(path,) for path in paths])
+    conn.commit()
+
+
+def build_partitions(source_path, directory, years_per_partition=1, years=None):
+    """Write one partition file per period from the main database.
+
+    ``years`` limits the rebuild to the partitions containing those years
+    (e.g. the years touched by an ingest); by default every period with data
+    is written. Returns the paths written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    source = sqlite3.connect(source_path)
+    try:
+        data_years = [row[0] for row in source.execute(
+            f"SELECT DISTINCT date_key / 10000 FROM {SOURCE_TABLE} WHERE date_key IS NOT NULL"
+        )]
+        columns = source.execute(f"SELECT sql FROM sqlite_master WHERE name = '{SOURCE_TABLE}'").fetchone()[0]
+    finally:
+        source.close()
+
+    wanted = set(data_years if years is None else years)
+    starts = sorted(set(partition_start_year(year, years_per_partition) for year in wanted))
+    written = []
+    for start in starts:
+        start_time = time.perf_counter()
+        path = partition_path(directory, start)
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute('PRAGMA journal_mode = OFF')
+            conn.execute('PRAGMA synchronous = OFF')
+            conn.execute(columns)
+            conn.execute('ATTACH DATABASE ? AS source', (source_path,))
+            # Clustered by company then date, the order most lookups read in
+            conn.execute(f'''
+                INSERT INTO main.{SOURCE_TABLE}
+                SELECT * FROM source.{SOURCE_TABLE}
+                WHERE date_key BETWEEN ? AND ?
+                ORDER BY accord_code, date_key
+            ''', (start * 10000, (start + years_per_partition) * 10000 - 1))
+            conn.commit()
+            conn.execute('DETACH DATABASE source')
+            for name, columns_sql in PARTITION_INDEXES.items():
+                conn.execute(f"CREATE INDEX {name} ON {SOURCE_TABLE} {columns_sql}")
+            conn.execute('ANALYZE')
+            rows = conn.execute(f"SELECT COUNT(*) FROM {SOURCE_TABLE}").fetchone()[0]
+            conn.commit()
+        finally:
+            conn.close()
+
+        os.replace(tmp_path, path)
+        written.append(path)
+        elapsed = (time.perf_counter() - start_time) * 1000
+        logging.info(f"Built partition {path} - Rows: {rows}, Time: {elapsed:.2f}ms")
+
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build date partitions from the main database.')
+    parser.add_argument('source', help='main database file')
+    parser.add_argument('directory', help='partition directory')
+    parser.add_argument('--years-per-partition', type=int, default=1)
+    parser.add_argument('--years', default=None, help='comma-separated years to rebuild (default: all)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    years = [int(year) for year in args.years.split(',')] if args.years else None
+    paths = build_partitions(args.source, args.directory, args.years_per_partition, years)
+    print(f"Wrote {len(paths)} partitions to {args.directory}")
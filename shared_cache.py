@@ -0,0 +1,202 @@
+# shared_cache.py
+"""Query result cache shared by every worker process on a host.
+
+The per-process ``lru_cache``s in db_helper stay as the first tier; on a
+miss there, workers look here before running the query. Entries live in one
+SQLite file, by default on tmpfs (/dev/shm), so N workers keep one copy of
+each matrix or series instead of N and a result computed by one worker is a
+hit for all the others.
+
+Values are serialised with ``marshal`` (query results are tuples, lists and
+dicts of numbers, strings and None), and zlib-compressed when large. Each
+entry is tagged with the data version it was computed at and only returned
+for that version, so a data load invalidates everything without a purge.
+When the file grows past ``max_bytes``, entries of other versions and then
+the least recently used ones are evicted.
+
+``marshal`` is not safe against crafted input, so the file must only be
+writable by the user running the app: it lives in a directory that is
+created with mode 0700, and a directory or file that other users own or
+can write to is refused.
+"""
+import logging
+import marshal
+import os
+import sqlite3
+import stat
+import threading
+import time
+import zlib
+
+# Values at least this large are compressed
+COMPRESS_MIN_BYTES = 16384
+# A hit refreshes last_used at most this often, so hot keys don't turn reads into writes
+TOUCH_INTERVAL = 30
+# Puts between checks of the total size
+EVICT_CHECK_EVERY = 64
+# Eviction frees space down to this fraction of max_bytes
+EVICT_TARGET = 0.9
+
+RAW, ZLIB = 0, 1
+
+
+def _check_private(path, st):
+    """Raise PermissionError unless ``st`` is owned by this user and closed to others"""
+    if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by another user")
+    if st.st_mode & 0o077:
+        raise PermissionError(f"{path} is accessible to other users (mode {stat.filemode(st.st_mode)})")
+
+
+def open_private(path):
+    """Create ``path`` (mode 0600) in a private directory, or check the existing one.
+
+    The directory is created with mode 0700. Symlinks are not followed.
+    Raises PermissionError if either is owned by or open to other users.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    _check_private(directory, os.lstat(directory))
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+    try:
+        _check_private(path, os.fstat(fd))
+    finally:
+        os.close(fd)
+
+
+def encode(value):
+    """(codec, bytes) for a value; raises ValueError if it can't be marshalled"""
+    data = marshal.dumps(value)
+    if len(data) >= COMPRESS_MIN_BYTES:
+        return ZLIB, zlib.compress(data, 1)
+    return RAW, data
+
+
+def decode(codec, data):
+    return marshal.loads(zlib.decompress(data) if codec == ZLIB else data)
+
+
+class SharedCache:
+    """Size-bounded LRU key-value store in a SQLite file, safe across processes.
+
+    Errors never reach the caller: a failed read is a miss and a failed
+    write is skipped, so a full or missing tmpfs only costs hit rate.
+    """
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, timeout=5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._local = threading.local()
+        open_private(path)
+        conn = self._conn()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                codec INTEGER NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_entries_last_used ON entries (last_used)')
+
+    def _conn(self):
+        """This thread's connection, reopened after a fork"""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            # Contents are disposable, so durability is traded for write speed
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = OFF')
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def get(self, key, version):
+        """(True, value) if cached at ``version``, else (False, None)"""
+        try:
+            conn = self._conn()
+            row = conn.execute(
+                'SELECT codec, value, last_used FROM entries WHERE key = ? AND version = ?',
+                (key, version)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return False, None
+            now = time.time()
+            if now - row[2] > TOUCH_INTERVAL:
+                conn.execute('UPDATE entries SET last_used = ? WHERE key = ?', (now, key))
+            self.hits += 1
+            return True, decode(row[0], row[1])
+        except (sqlite3.Error, ValueError, EOFError, TypeError, zlib.error) as e:
+            logging.warning(f"Shared cache read failed for {key}: {str(e)}")
+            self.misses += 1
+            return False, None
+
+    def set(self, key, version, value):
+        try:
+            codec, data = encode(value)
+        except ValueError:
+            return  # Not marshallable; stays in the per-process cache only
+        try:
+            conn = self._conn()
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, version, codec, value, size, last_used) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (key, version, codec, data, len(data) + len(key), time.time())
+            )
+            self._puts += 1
+            if self._puts % EVICT_CHECK_EVERY == 0:
+                self.evict(version)
+        except sqlite3.Error as e:
+            logging.warning(f"Shared cache write failed for {key}: {str(e)}")
+
+    def evict(self, version):
+        """Trim to EVICT_TARGET of max_bytes: other versions first, then least recently used"""
+        conn = self._conn()
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        to_free = total - int(self.max_bytes * EVICT_TARGET)
+        freed = 0
+        keys = []
+        candidates = conn.execute(
+            'SELECT key, size FROM entries ORDER BY version = ?, last_used', (version,)
+        ).fetchall()
+        for key, size in candidates:
+            keys.append((key,))
+            freed += size
+            if freed >= to_free:
+                break
+        conn.execute('BEGIN')
+        try:
+            conn.executemany('DELETE FROM entries WHERE key = ?', keys)
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+        logging.info(f"Shared cache evicted {len(keys)} entries ({freed} bytes)")
+        return len(keys)
+
+    def clear(self):
+        self._conn().execute('DELETE FROM entries')
+
+    def stats(self):
+        """Entry count and size of the shared file, and this process's hits and misses"""
+        try:
+            entries, size = self._conn().execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+            ).fetchone()
+        except sqlite3.Error:
+            entries = size = None
+        return {
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses
+        }
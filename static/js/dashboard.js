@@ -0,0 +1,297 @@
+// Store current data for export
+let currentData = null;
+let currentExportName = 'financial_data.csv';
+
+// Display data in a beautiful table
+function displayTable(data, containerId) {
+    const container = document.getElementById(containerId || 'result');
+    if (!data || data.length === 0) {
+        container.innerHTML = `
+            <div class="alert alert-warning">
+                <i class="fas fa-exclamation-circle me-2"></i>No data found
+            </div>`;
+        document.getElementById('exportBtn').style.display = 'none';
+        return;
+    }
+
+    // Store data for export
+    currentData = data;
+    document.getElementById('exportBtn').style.display = 'inline-block';
+
+    let html = `
+    <div class="table-responsive">
+        <table class="table table-hover align-middle">
+            <thead class="table-light">
+                <tr>`;
+
+    // Headers
+    Object.keys(data[0]).forEach(key => {
+        html += `<th>${key.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase())}</th>`;
+    });
+
+    html += `</tr></thead><tbody>`;
+
+    // Rows
+    data.forEach(row => {
+        html += '<tr class="hover-shadow">';
+        Object.values(row).forEach(value => {
+            // Format numbers with 2 decimal places if they're numbers
+            const displayValue = typeof value === 'number' && !Number.isInteger(value) 
+                ? value.toFixed(2) 
+                : (value !== null ? value : 'N/A');
+            html += `<td>${displayValue}</td>`;
+        });
+        html += '</tr>';
+    });
+
+    html += `</tbody></table></div>`;
+
+    container.innerHTML = html;
+}
+
+// Show loading state
+function showLoading(containerId) {
+    const container = document.getElementById(containerId || 'result');
+    container.innerHTML = `
+        <div class="text-center py-4">
+            <div class="spinner-border text-primary" role="status">
+                <span class="visually-hidden">Loading...</span>
+            </div>
+            <p class="mt-2 text-muted">Fetching data...</p>
+        </div>`;
+    document.getElementById('exportBtn').style.display = 'none';
+}
+
+// Show error message
+function showError(message, containerId) {
+    const container = document.getElementById(containerId || 'result');
+    container.innerHTML = `
+        <div class="alert alert-danger">
+            <i class="fas fa-exclamation-triangle me-2"></i>
+            ${message}
+        </div>`;
+    document.getElementById('exportBtn').style.display = 'none';
+}
+
+// Show success message
+function showSuccess(message, containerId) {
+    const container = document.getElementById(containerId || 'result');
+    container.innerHTML = `
+        <div class="alert alert-success">
+            <i class="fas fa-check-circle me-2"></i>
+            ${message}
+        </div>`;
+    document.getElementById('exportBtn').style.display = 'none';
+}
+
+// Generic API call function
+async function callApi(endpoint, params = {}) {
+    const resultDiv = document.getElementById('result');
+    try {
+        showLoading();
+        const queryString = new URLSearchParams(params).toString();
+        const response = await fetch(`/api/${endpoint}?${queryString}`);
+
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.message || 'Failed to fetch data');
+        }
+
+        const data = await response.json();
+
+        if (data.status === 'error') {
+            throw new Error(data.message || 'An error occurred');
+        }
+
+        return data;
+    } catch (error) {
+        console.error('API Error:', error);
+        showError(error.message || 'An error occurred while fetching data');
+        throw error;
+    }
+}
+
+// Get Quarterly Data
+async function getQuarterlyData() {
+    const code = document.getElementById('code1').value;
+    const field = document.getElementById('field1').value;
+    const date = document.getElementById('date1').value;
+    currentExportName = `quarterly_data_${code}_${date}.csv`;
+
+    try {
+        const response = await callApi('quarterly_data', {
+            accord_code: code,
+            field: field,
+            date: date
+        });
+
+        if (response.status === 'success') {
+            const data = response.data;
+            const resultDiv = document.getElementById('result');
+
+            // Store data for export
+            currentData = [data];
+
+            // Create a nice card to display the result
+            resultDiv.innerHTML = `
+                <div class="card border-success">
+                    <div class="card-header bg-success text-white">
+                        <i class="fas fa-chart-pie me-2"></i>Quarterly Data Result
+                    </div>
+                    <div class="card-body">
+                        <div class="row">
+                            <div class="col-md-6">
+                                <p><strong><i class="fas fa-hashtag me-2"></i>Company Code:</strong> ${data.accord_code}</p>
+                                <p><strong><i class="far fa-calendar-alt me-2"></i>Date:</strong> ${new Date(data.date).toLocaleDateString()}</p>
+                                <p><strong><i class="fas fa-tag me-2"></i>Field:</strong> ${field.replace(/_/g, ' ').replace(/\b\w/g, l => l.toUpperCase())}</p>
+                            </div>
+                            <div class="col-md-6">
+                                <div class="p-3 bg-light rounded text-center">
+                                    <h3 class="text-success mb-0">
+                                        ${data.value !== null ? data.value + (field === 'ttm_pat_yoy_growth' ? '%' : '') : 'N/A'}
+                                    </h3>
+                                    <small class="text-muted">${field === 'ttm_pat_yoy_growth' ? 'YoY Growth' : 'Value'}</small>
+                                </div>
+                            </div>
+                        </div>
+                    </div>
+                </div>`;
+            document.getElementById('exportBtn').style.display = 'inline-block';
+        }
+    } catch (error) {
+        // Error is already handled by callApi
+    }
+}
+
+// Get Series Data
+async function getSeriesData() {
+    const code = document.getElementById('code2').value;
+    const start = document.getElementById('start_date').value;
+    const end = document.getElementById('end_date').value;
+    currentExportName = `series_data_${code}_${start}_to_${end}.csv`;
+
+    try {
+        const response = await callApi('series', {
+            accord_code: code,
+            start_date: start,
+            end_date: end
+        });
+
+        if (response.status === 'success') {
+            if (response.data && response.data.length > 0) {
+                displayTable(response.data);
+            } else {
+                showError('No data available for the selected date range');
+            }
+        }
+    } catch (error) {
+        // Error is already handled by callApi
+    }
+}
+
+// Get Matrix Data
+async function getMatrixData() {
+    const date = document.getElementById('matrix_date').value;
+    currentExportName = `all_companies_${date}.csv`;
+
+    try {
+        const response = await callApi('quarterly_matrix', {
+            date: date
+        });
+
+        if (response.status === 'success') {
+            if (response.data && response.data.length > 0) {
+                displayTable(response.data);
+            } else {
+                showError('No data available for the selected date');
+            }
+        }
+    } catch (error) {
+        // Error is already handled by callApi
+    }
+}
+
+// Get All PAT Growth
+async function getAllPatGrowth() {
+    const code = document.getElementById('code4').value;
+    currentExportName = `all_pat_growth_${code}.csv`;
+
+    try {
+        const response = await callApi('all_pat_growth', {
+            accord_code: code
+        });
+
+        if (response.status === 'success') {
+            if (response.data && response.data.length > 0) {
+                displayTable(response.data);
+            } else {
+                showError('No data available for the selected company');
+            }
+        }
+    } catch (error) {
+        // Error is already handled by callApi
+    }
+}
+
+// Export data to CSV
+function exportData() {
+    if (!currentData || currentData.length === 0) {
+        showError('No data to export');
+        return;
+    }
+
+    const headers = Object.keys(currentData[0]);
+    let csvContent = headers.join(',') + '\\n';
+
+    currentData.forEach(row => {
+        const values = headers.map(header => {
+            const value = row[header] !== null ? row[header] : '';
+            // Escape quotes and wrap in quotes if contains comma or quote
+            const escaped = String(value).replace(/"/g, '""');
+            return `"${escaped}"`;
+        });
+        csvContent += values.join(',') + '\\n';
+    });
+
+    const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
+    const url = URL.createObjectURL(blob);
+    const link = document.createElement('a');
+    link.setAttribute('href', url);
+    link.setAttribute('download', currentExportName);
+    link.style.visibility = 'hidden';
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+}
+
+// Add event listeners for better UX
+document.addEventListener('DOMContentLoaded', function() {
+    // Initialize tooltips
+    const tooltipTriggerList = [].slice.call(document.querySelectorAll('[data-bs-toggle="tooltip"]'));
+    tooltipTriggerList.map(function (tooltipTriggerEl) {
+        return new bootstrap.Tooltip(tooltipTriggerEl);
+    });
+
+    // Set default dates to today and one year ago
+    const today = new Date();
+    const oneYearAgo = new Date();
+    oneYearAgo.setFullYear(today.getFullYear() - 1);
+
+    document.getElementById('date1').valueAsDate = today;
+    document.getElementById('start_date').valueAsDate = oneYearAgo;
+    document.getElementById('end_date').valueAsDate = today;
+    document.getElementById('matrix_date').valueAsDate = today;
+
+    // Add keyboard support
+    document.querySelectorAll('input').forEach(input => {
+        input.addEventListener('keypress', function(e) {
+            if (e.key === 'Enter') {
+                const activeTab = document.querySelector('.tab-pane.active');
+                if (activeTab) {
+                    const button = activeTab.querySelector('button:not(.export-btn)');
+                    if (button) button.click();
+                }
+            }
+        });
+    });
+});
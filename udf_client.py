@@ -0,0 +1,367 @@
+# udf_client.py
+"""Client for the UDF API with pooled connections, batched lookups and a local cache.
+
+    client = UDFClient('http://localhost:5000', cache_path='udf_cache.db')
+    client.quarterly_data(100001, '2024-03-31')
+    client.quarterly_data_many([(100001, '2024-03-31'), (100002, '2024-03-31')])
+
+Lookups submitted within ``batch_window`` seconds of each other, from any
+thread or asyncio task, are sent as one POST /api/quarterly_data/batch.
+Cached results are tagged with the server's data version and discarded as
+soon as the server reports a different one. Only the standard library is
+used, so the module can be dropped next to a notebook or spreadsheet add-in.
+"""
+import asyncio
+import http.client
+import json
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlencode, urlsplit
+
+DEFAULT_FIELD = 'ttm_pat_yoy_growth'
+
+
+class UDFError(Exception):
+    """Error returned by the API for a request or a single batched lookup"""
+
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class ConnectionPool:
+    """Keep-alive HTTP connections to one server, shared between threads"""
+
+    def __init__(self, base_url, size=4, timeout=30):
+        parts = urlsplit(base_url)
+        self.connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        )
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    def request(self, method, path, body=None):
+        """Send a request and return (status, headers, decoded JSON body)"""
+        headers = {'Accept': 'application/json'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+
+        try:
+            conn, reused = self._idle.get_nowait(), True
+        except queue.Empty:
+            conn, reused = self.connection_class(self.host, self.port, timeout=self.timeout), False
+        try:
+            response, data = self._send(conn, method, path, payload, headers)
+        except (ConnectionError, http.client.HTTPException):
+            conn.close()
+            if not reused:
+                raise
+            # The server dropped an idle keep-alive connection; retry once on a new one
+            conn = self.connection_class(self.host, self.port, timeout=self.timeout)
+            response, data = self._send(conn, method, path, payload, headers)
+
+        if response.will_close:
+            conn.close()
+        else:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+        return response.status, response.headers, json.loads(data) if data else None
+
+    def _send(self, conn, method, path, payload, headers):
+        conn.request(method, self.prefix + path, body=payload, headers=headers)
+        response = conn.getresponse()
+        return response, response.read()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class ResponseCache:
+    """On-disk cache of API results, each tagged with the data version it was read at"""
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    version TEXT NOT NULL,
+                    value TEXT
+                ) WITHOUT ROWID
+            ''')
+            self._conn.commit()
+
+    def get(self, key, version):
+        """(True, value) if cached at ``version``, else (False, None)"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM responses WHERE key = ? AND version = ?', (key, version)
+            ).fetchone()
+        return (True, json.loads(row[0])) if row else (False, None)
+
+    def set_many(self, items, version):
+        """Store (key, value) pairs read at ``version``"""
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO responses (key, version, value) VALUES (?, ?, ?)',
+                [(key, version, json.dumps(value)) for key, value in items]
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _Batcher:
+    """Collect items submitted within ``window`` seconds and send them in one call.
+
+    ``send`` takes a list of items and returns one result per item; a result
+    that is an exception is raised from that item's future only.
+    """
+
+    def __init__(self, send, window, max_size, executor):
+        self._send = send
+        self.window = window
+        self.max_size = max_size
+        self._executor = executor
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def submit(self, item):
+        future = Future()
+        with self._lock:
+            self._pending.append((item, future))
+            if len(self._pending) >= self.max_size or self.window <= 0:
+                self._executor.submit(self._dispatch, self._take())
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    def flush(self):
+        """Send whatever is pending now instead of waiting for the window to end"""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._executor.submit(self._dispatch, batch)
+
+    def _take(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _dispatch(self, batch):
+        try:
+            results = self._send([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class UDFClient:
+    """Synchronous client; safe to share between threads.
+
+    ``cache_path`` enables the on-disk cache. The data version is taken from
+    the X-Data-Version header of every response and re-checked with
+    /api/data_version when nothing has been heard from the server for
+    ``version_ttl`` seconds.
+    """
+
+    def __init__(self, base_url='http://localhost:5000', pool_size=4, timeout=30,
+                 cache_path=None, batch_window=0.002, max_batch=500, version_ttl=30):
+        self.pool = ConnectionPool(base_url, size=pool_size, timeout=timeout)
+        self.cache = ResponseCache(cache_path) if cache_path else None
+        self.version_ttl = version_ttl
+        self._version = None
+        self._version_seen = 0.0
+        self._version_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='udf-batch')
+        self._batcher = _Batcher(self._send_batch, batch_window, max_batch, self._executor)
+
+    # Transport
+    def _request(self, method, path, body=None):
+        status, headers, data = self.pool.request(method, path, body)
+        if headers.get('X-Data-Version'):
+            self._observe_version(headers['X-Data-Version'])
+        if status >= 400:
+            message = data.get('message') if isinstance(data, dict) else None
+            raise UDFError(status, message or 'Request failed')
+        return status, data
+
+    def _get(self, path, **params):
+        return self._request('GET', f"{path}?{urlencode(params)}" if params else path)
+
+    def _observe_version(self, version):
+        with self._version_lock:
+            if version != self._version:
+                if self._version is not None and self.cache is not None:
+                    self.cache.clear()
+                self._version = version
+            self._version_seen = time.monotonic()
+
+    def data_version(self, refresh=False):
+        """Server data version, fetched again once ``version_ttl`` has passed"""
+        if refresh or self._version is None or time.monotonic() - self._version_seen > self.version_ttl:
+            _, data = self._get('/api/data_version')
+            self._observe_version(data['data_version'])
+        return self._version
+
+    # Cache
+    def _cached(self, key):
+        if self.cache is None:
+            return False, None
+        return self.cache.get(key, self.data_version())
+
+    def _store(self, items):
+        if self.cache is not None and self._version is not None:
+            self.cache.set_many(items, self._version)
+
+    # Point lookups
+    def _send_batch(self, lookups):
+        _, data = self._request('POST', '/api/quarterly_data/batch', {'lookups': lookups})
+        results = []
+        for entry in data['data']:
+            if 'error' in entry:
+                results.append(UDFError(400, entry['error']))
+            else:
+                results.append(entry['values'] if 'values' in entry else entry['value'])
+        self._store([
+            (_lookup_key(lookup), result)
+            for lookup, result in zip(lookups, results) if not isinstance(result, Exception)
+        ])
+        return results
+
+    def submit_quarterly_data(self, accord_code, date, field=DEFAULT_FIELD):
+        """Queue a lookup and return a Future for its value (None when there is no data)"""
+        lookup = {'accord_code': accord_code, 'date': date, 'field': field}
+        found, value = self._cached(_lookup_key(lookup))
+        if found:
+            future = Future()
+            future.set_result(value)
+            return future
+        return self._batcher.submit(lookup)
+
+    def quarterly_data(self, accord_code, date, field=DEFAULT_FIELD):
+        """Value for a company on a date; concurrent calls share one batch request"""
+        return self.submit_quarterly_data(accord_code, date, field).result()
+
+    def submit_quarterly_fields(self, accord_code, date, fields):
+        """Queue a multi-field lookup; the Future gives {field: value}"""
+        lookup = {'accord_code': accord_code, 'date': date, 'fields': list(fields)}
+        found, values = self._cached(_lookup_key(lookup))
+        if found:
+            future = Future()
+            future.set_result(values)
+            return future
+        return self._batcher.submit(lookup)
+
+    def quarterly_fields(self, accord_code, date, fields):
+        """Several fields of a company's row on a date, e.g. growth, sector and mcap"""
+        return self.submit_quarterly_fields(accord_code, date, fields).result()
+
+    def submit_quarterly_data_many(self, lookups):
+        """Queue (accord_code, date) or (accord_code, date, field) tuples and send them now"""
+        futures = [self.submit_quarterly_data(*lookup) for lookup in lookups]
+        self._batcher.flush()
+        return futures
+
+    def quarterly_data_many(self, lookups):
+        """Values for many lookups, in order, using as few batch requests as possible"""
+        return [future.result() for future in self.submit_quarterly_data_many(lookups)]
+
+    # Series
+    def series(self, accord_code, start_date, end_date):
+        """[(date, value), ...] between two dates"""
+        key = f"series:{accord_code}:{start_date}:{end_date}"
+        found, value = self._cached(key)
+        if not found:
+            _, data = self._get('/api/series', accord_code=accord_code,
+                                start_date=start_date, end_date=end_date)
+            value = [(row['date'], row['value']) for row in data['data']]
+            self._store([(key, value)])
+        return [tuple(row) for row in value]
+
+    def close(self):
+        self._batcher.flush()
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+        if self.cache is not None:
+            self.cache.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncUDFClient:
+    """asyncio interface; lookups awaited by concurrent tasks share batch requests"""
+
+    def __init__(self, *args, **kwargs):
+        self.client = UDFClient(*args, **kwargs)
+
+    async def quarterly_data(self, accord_code, date, field=DEFAULT_FIELD):
+        return await asyncio.wrap_future(self.client.submit_quarterly_data(accord_code, date, field))
+
+    async def quarterly_fields(self, accord_code, date, fields):
+        return await asyncio.wrap_future(self.client.submit_quarterly_fields(accord_code, date, fields))
+
+    async def quarterly_data_many(self, lookups):
+        futures = self.client.submit_quarterly_data_many(lookups)
+        return await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+
+    async def series(self, accord_code, start_date, end_date):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.client.series, accord_code, start_date, end_date)
+
+    async def data_version(self, refresh=False):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.client.data_version, refresh)
+
+    async def close(self):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.client.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def _lookup_key(lookup):
+    field = ','.join(lookup['fields']) if 'fields' in lookup else lookup['field']
+    return f"qd:{lookup['accord_code']}:{field}:{lookup['date']}"